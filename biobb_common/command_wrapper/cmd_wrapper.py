@@ -2,17 +2,86 @@
 """Python wrapper for command line
 """
 import os
+import signal
 import subprocess
+import threading
+from collections import deque
 from biobb_common.tools import file_utils as fu
-from typing import Optional, Union
+from typing import Optional, Union, TYPE_CHECKING
 import logging
 from pathlib import Path
 
+if TYPE_CHECKING:
+    import asyncio
+
+# Characters with a special meaning for POSIX shells (pipes, redirects, globbing, expansions, quoting...)
+SHELL_SPECIAL_CHARS = frozenset("|&;<>()$`\\\"' \t\n*?[]{}~!#")
+# POSIX and bash builtins and reserved words, they are not executables found in the PATH
+SHELL_BUILTINS = frozenset([
+    ".", ":", "[", "alias", "bg", "bind", "break", "builtin", "caller", "case", "cd", "command", "compgen",
+    "complete", "compopt", "continue", "coproc", "declare", "dirs", "disown", "do", "done", "echo", "elif",
+    "else", "enable", "esac", "eval", "exec", "exit", "export", "false", "fc", "fg", "fi", "for", "function",
+    "getopts", "hash", "help", "history", "if", "in", "jobs", "kill", "let", "local", "logout", "mapfile",
+    "popd", "printf", "pushd", "pwd", "read", "readarray", "readonly", "return", "select", "set", "shift",
+    "shopt", "source", "suspend", "test", "then", "time", "times", "trap", "true", "type", "typeset",
+    "ulimit", "umask", "unalias", "unset", "until", "wait", "while",
+])
+
+
+def requires_shell(cmd: list[str]) -> bool:
+    """Check if the command line **cmd** needs a shell to be executed.
+
+    A shell is required when any token contains pipes, redirects, globbing,
+    variable expansions, quotes or whitespace (that would be re-tokenised by
+    the shell), when a token is empty or when the command starts with an
+    environment variable assignment or a shell builtin or reserved word
+    (i.e. cd, source, export, ulimit).
+
+    Args:
+        cmd (list): Command line list.
+
+    Returns:
+        bool: True if **cmd** must be executed through a shell.
+    """
+    if not cmd or "=" in cmd[0] or cmd[0] in SHELL_BUILTINS:
+        return True
+    return any(not token or not SHELL_SPECIAL_CHARS.isdisjoint(token) for token in map(str, cmd))
+
+
+def _kill_process_group(process: Union[subprocess.Popen, "asyncio.subprocess.Process"]) -> None:
+    """Kill **process** and every process of its group."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
 
 class CmdWrapper:
     """Command line wrapper using subprocess library
+
+    If **stream** is True stdout and stderr are read line by line while the
+    process is running and forwarded to **out_log** and **err_log** as they
+    arrive. Only the last **tail_lines** lines of each stream are kept in
+    memory (:attr:`stdout_tail` and :attr:`stderr_tail`), so memory usage does not
+    depend on the amount of output produced by the command.
+
+    If **use_shell** is False the **cmd** list is executed directly as the argv
+    of the new process, saving the shell startup. The command must not rely on
+    any shell feature, see :func:`requires_shell`.
+
+    If **timeout** is set the command is started in its own process group,
+    which is killed as a whole when the timeout expires.
+
+    :meth:`alaunch` is the asyncio version of :meth:`launch`, it allows
+    managing many concurrent commands from a single event loop.
     """
 
+    # Maximum length of a single streamed line, longer lines are split
+    max_line_length = 65536
+
     def __init__(self,
                  cmd: list[str],
                  shell_path: Union[str, Path] = os.getenv('SHELL', '/bin/sh'),
@@ -21,7 +90,11 @@ class CmdWrapper:
                  global_log: Optional[logging.Logger] = None,
                  env: Optional[dict] = None,
                  timeout: Optional[int] = None,
-                 disable_logs: Optional[bool] = None) -> None:
+                 disable_logs: Optional[bool] = None,
+                 stream: bool = False,
+                 tail_lines: int = 100,
+                 use_shell: bool = True,
+                 cwd: Optional[Union[str, Path]] = None) -> None:
 
         self.cmd = cmd
         self.shell_path = shell_path
@@ -31,6 +104,11 @@ class CmdWrapper:
         self.env = env
         self.timeout = timeout
         self.disable_logs = disable_logs
+        self.stream = stream
+        self.use_shell = use_shell
+        self.cwd = cwd
+        self.stdout_tail: deque[str] = deque(maxlen=tail_lines)
+        self.stderr_tail: deque[str] = deque(maxlen=tail_lines)
 
     def log_output(self, exit_code: str, command: str, out: Optional[bytes] = None, err: Optional[bytes] = None, timeout: Optional[str] = None,
                    out_log: Optional[logging.Logger] = None, err_log: Optional[logging.Logger] = None, global_log: Optional[logging.Logger] = None) -> None:
@@ -66,16 +144,28 @@ class CmdWrapper:
             print(f"\ncmd_wrapper command print: {cmd}")
 
         new_env = {**os.environ.copy(), **self.env} if self.env else os.environ.copy()
-        process = subprocess.Popen(cmd,
-                                   stdout=subprocess.PIPE,
-                                   stderr=subprocess.PIPE,
-                                   shell=True,
-                                   executable=self.shell_path,
-                                   env=new_env)
+        try:
+            process = subprocess.Popen(cmd if self.use_shell else list(map(str, self.cmd)),
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE,
+                                       shell=self.use_shell,
+                                       executable=self.shell_path if self.use_shell else None,
+                                       cwd=self.cwd,
+                                       env=new_env,
+                                       # Own process group so a timeout kills the children of the tool too
+                                       start_new_session=self.timeout is not None)
+        except OSError as error:
+            # Mimic the shell exit codes: 127 command not found, 126 not executable
+            return_code = 127 if isinstance(error, FileNotFoundError) else 126
+            self.log_output(exit_code=str(return_code), command=cmd, err=str(error).encode("utf-8"), out_log=self.out_log, err_log=self.err_log, global_log=self.global_log)
+            return return_code
+        if self.stream:
+            return self._stream_process(process)
+
         try:
             out, err = process.communicate(timeout=self.timeout)
         except subprocess.TimeoutExpired:
-            process.kill()
+            _kill_process_group(process)
             out, err = process.communicate()
             process.returncode = 1
             self.log_output(exit_code=str(process.returncode), command=" ".join(self.cmd), out=out, err=err, timeout=str(self.timeout), out_log=self.out_log, err_log=self.err_log, global_log=self.global_log)
@@ -84,3 +174,118 @@ class CmdWrapper:
         process.wait()
         self.log_output(exit_code=str(process.returncode), command=" ".join(self.cmd), out=out, err=err, out_log=self.out_log, err_log=self.err_log, global_log=self.global_log)
         return process.returncode
+
+    def _forward_pipe(self, pipe, tail: deque, log: Optional[logging.Logger] = None) -> None:
+        """Read **pipe** line by line logging each line and keeping the last ones in **tail**."""
+        with pipe:
+            for raw_line in iter(lambda: pipe.readline(self.max_line_length), b""):
+                line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+                tail.append(line)
+                if log:
+                    log.info(line)
+
+    def _stream_process(self, process: subprocess.Popen) -> int:
+        readers = [
+            threading.Thread(target=self._forward_pipe, args=(process.stdout, self.stdout_tail, self.out_log), daemon=True),
+            threading.Thread(target=self._forward_pipe, args=(process.stderr, self.stderr_tail, self.err_log), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        timeout_str = None
+        try:
+            process.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process_group(process)
+            process.wait()
+            process.returncode = 1
+            timeout_str = str(self.timeout)
+
+        for reader in readers:
+            # Grandchildren that left the process group may keep the pipes open after a kill
+            reader.join(timeout=5 if timeout_str else None)
+
+        self.log_output(exit_code=str(process.returncode), command=" ".join(self.cmd), timeout=timeout_str, out_log=self.out_log, err_log=self.err_log, global_log=self.global_log)
+        if process.returncode and not self.out_log and not self.disable_logs and self.stderr_tail:
+            print(f"Last {len(self.stderr_tail)} lines of stderr:")
+            print("\n".join(self.stderr_tail))
+        return process.returncode
+
+    async def alaunch(self) -> int:
+        """Execute the command from an asyncio event loop.
+
+        The process is started in a new session, so when the timeout expires
+        or the awaiting task is cancelled its whole process group is killed.
+        Cancellation is propagated once the process has been killed.
+        """
+        import asyncio
+        cmd = " ".join(self.cmd)
+        if self.out_log:
+            self.out_log.info(f'Launching command (it may take a while): {cmd}')
+        elif not self.disable_logs:
+            print(f"\ncmd_wrapper command print: {cmd}")
+
+        new_env = {**os.environ.copy(), **self.env} if self.env else os.environ.copy()
+        try:
+            if self.use_shell:
+                process = await asyncio.create_subprocess_shell(cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                                                                executable=self.shell_path, cwd=self.cwd, env=new_env,
+                                                                start_new_session=True, limit=self.max_line_length)
+            else:
+                process = await asyncio.create_subprocess_exec(*map(str, self.cmd), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                                                               cwd=self.cwd, env=new_env,
+                                                               start_new_session=True, limit=self.max_line_length)
+        except OSError as error:
+            return_code = 127 if isinstance(error, FileNotFoundError) else 126
+            self.log_output(exit_code=str(return_code), command=cmd, err=str(error).encode("utf-8"), out_log=self.out_log, err_log=self.err_log, global_log=self.global_log)
+            return return_code
+
+        if self.stream:
+            running = asyncio.gather(self._aforward_stream(process.stdout, self.stdout_tail, self.out_log),
+                                     self._aforward_stream(process.stderr, self.stderr_tail, self.err_log),
+                                     process.wait())
+        else:
+            running = process.communicate()
+
+        out = err = timeout_str = None
+        try:
+            result = await asyncio.wait_for(running, timeout=self.timeout)
+            if not self.stream:
+                out, err = result
+            return_code = process.returncode
+        except asyncio.TimeoutError:
+            _kill_process_group(process)
+            if self.stream:
+                await process.wait()
+            else:
+                out, err = await process.communicate()
+            return_code = 1
+            timeout_str = str(self.timeout)
+        except asyncio.CancelledError:
+            _kill_process_group(process)
+            await process.wait()
+            raise
+
+        self.log_output(exit_code=str(return_code), command=cmd, out=out, err=err, timeout=timeout_str, out_log=self.out_log, err_log=self.err_log, global_log=self.global_log)
+        if self.stream and return_code and not self.out_log and not self.disable_logs and self.stderr_tail:
+            print(f"Last {len(self.stderr_tail)} lines of stderr:")
+            print("\n".join(self.stderr_tail))
+        return return_code
+
+    async def _aforward_stream(self, stream: "asyncio.StreamReader", tail: deque, log: Optional[logging.Logger] = None) -> None:
+        """Asyncio version of :meth:`_forward_pipe`."""
+        import asyncio
+        while True:
+            try:
+                raw_line = await stream.readuntil(b"\n")
+            except asyncio.IncompleteReadError as error:
+                raw_line = error.partial
+            except asyncio.LimitOverrunError as error:
+                # Line longer than max_line_length, split it
+                raw_line = await stream.readexactly(error.consumed)
+            if not raw_line:
+                break
+            line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+            tail.append(line)
+            if log:
+                log.info(line)
@@ -27,11 +27,17 @@ Available common step properties: (Each Biobb step also has their specific prope
 import yaml
 import json
 import logging
+import functools
 from pathlib import Path
-from copy import deepcopy
 from biobb_common.tools import file_utils as fu
 from typing import Any, Optional
 
+try:
+    # libyaml based loader, an order of magnitude faster than the pure Python one
+    YAML_LOADER = yaml.CSafeLoader
+except AttributeError:
+    YAML_LOADER = yaml.SafeLoader  # type: ignore
+
 GALAXY_CHARACTER_MAP = {
     "__gt__": ">", "__lt__": "<", "__sq__": "'", "__dq__": '"', "__ob__": "[", "__cb__": "]",
     "__oc__": "{", "__cc__": "}", "__cn__": "\n", "__cr__": "\r", "__tc__": "\t", "__pd__": "#"}
@@ -44,9 +50,48 @@ def trans_galaxy_charmap(input_str):
     return input_str
 
 
+def copy_config_value(value: Any) -> Any:
+    """Copy the containers of a parsed configuration value sharing its immutable leaves.
+
+    Configuration values only contain dicts, lists, sets and scalars, so this
+    is equivalent to deepcopy but much faster.
+    """
+    if isinstance(value, dict):
+        return {key: copy_config_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_config_value(item) for item in value]
+    if isinstance(value, set):
+        return set(value)
+    return value
+
+
+@functools.lru_cache(maxsize=32)
+def _load_config_file(config_file_path: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    """Parse the YAML or JSON **config_file_path**. **mtime_ns** and **size**
+    are part of the cache key so modified files are parsed again. The returned
+    dictionary is shared, it must not be modified."""
+    with open(config_file_path) as stream:
+        content = stream.read()
+    try:
+        return yaml.load(content, Loader=YAML_LOADER) or {}
+    except yaml.YAMLError as yaml_error:
+        try:
+            return json.loads(content) or {}
+        except json.JSONDecodeError as json_error:
+            raise Exception(f"Error reading configuration file {config_file_path} is not a valid YAML: {yaml_error} or a valid JSON: {json_error}")
+
+
+# Top level keys of the configuration files that are not steps
+NON_STEP_KEYS = ("global_properties", "paths", "properties", "tool")
+
+
 class ConfReader:
     """Configuration file loader for yaml format files.
 
+    Parsed configuration files are cached by the whole process while they are
+    not modified, so building several ConfReader objects of the same file
+    (i.e. one per step) parses it only once.
+
     Args:
         config (str): Path to the configuration [YAML|JSON] file or JSON string.
         system (str): System name from the systems section in the configuration file.
@@ -56,6 +101,9 @@ class ConfReader:
         self.properties = self._read_config(config)
         self.global_properties = self._get_global_properties()
         self.working_dir_path = fu.get_working_dir_path(working_dir_path=self.global_properties.get("working_dir_path", None), restart=self.global_properties.get("restart", False))
+        # Step properties and paths built on first access, by (step, prefix)
+        self._step_properties: dict[tuple[str, str], dict[str, Any]] = {}
+        self._step_paths: dict[tuple[str, str], dict[str, Any]] = {}
 
     def get_working_dir_path(self) -> str:
         """get_working_dir_path() returns the working directory path.
@@ -78,14 +126,9 @@ class ConfReader:
             config_file_path = Path(config_tokens[0]).resolve()
             if not config_file_path.exists():
                 raise FileNotFoundError(f"Configuration file {config_file_path} not found.")
-            with open(config_file_path) as stream:
-                try:
-                    config_dict = yaml.safe_load(stream) or {}
-                except yaml.YAMLError as yaml_error:
-                    try:
-                        config_dict = json.load(stream) or {}
-                    except json.JSONDecodeError as json_error:
-                        raise Exception(f"Error reading configuration file {config_file_path} is not a valid YAML: {yaml_error} or a valid JSON: {json_error}")
+            stat = config_file_path.stat()
+            # Private copy of the cached configuration
+            config_dict = copy_config_value(_load_config_file(str(config_file_path), stat.st_mtime_ns, stat.st_size))
 
         # Read just one step specified in the configuration file path
         # i.e: Read just Editconf step from workflow_configuration.yaml file
@@ -102,7 +145,7 @@ class ConfReader:
             dict: dictionary of global properties.
         """
         # Add default properties to the global properties
-        return deepcopy((self.properties.get("global_properties") or {}))
+        return copy_config_value((self.properties.get("global_properties") or {}))
 
     def _get_step_properties(self, key: str = "", prefix: str = "", global_log: Optional[logging.Logger] = None) -> dict[str, Any]:
         """_get_step_properties() returns the properties of the configuration file.
@@ -117,7 +160,7 @@ class ConfReader:
             dict: dictionary of properties.
         """
         prop_dic = dict()
-        prop_dic.update(deepcopy(self.global_properties))
+        prop_dic.update(copy_config_value(self.global_properties))
         prop_dic["global_properties_list"] = list(self.global_properties.keys())
         prop_dic["step"] = key
         prop_dic["prefix"] = prefix
@@ -126,10 +169,10 @@ class ConfReader:
         prop_dic["path"] = str(Path(self.working_dir_path).joinpath(prefix, key))
         if key:
             prop_dic["tool"] = self.properties[key].get("tool", None)
-            prop_dic.update(deepcopy((self.properties[key].get("properties") or {})))
+            prop_dic.update(copy_config_value((self.properties[key].get("properties") or {})))
         else:
             prop_dic["tool"] = self.properties.get("tool", None)
-            prop_dic.update(deepcopy((self.properties.get("properties") or {})))
+            prop_dic.update(copy_config_value((self.properties.get("properties") or {})))
 
         return prop_dic
 
@@ -155,28 +198,90 @@ class ConfReader:
             dict: dictionary of properties.
         """
 
-        prop_dic: dict[str, Any] = dict()
-        for key in self.properties:
-            if key in ["global_properties", "paths", "properties", "tool"]:
-                continue
-            prop_dic[key] = self._get_step_properties(key=key, prefix=prefix, global_log=global_log)
-
-        if not prop_dic:
+        step_keys = self._get_step_keys()
+        if not step_keys:
             return self._get_step_properties(prefix=prefix, global_log=global_log)
 
-        return prop_dic
+        return {key: self.get_step_properties(key, prefix=prefix, global_log=global_log) for key in step_keys}
 
     def get_paths_dic(self, prefix: str = "") -> dict[str, Any]:
-        paths_dic: dict[str, Any] = dict()
-        for key in self.properties:
-            if key in ["global_properties", "paths", "properties", "tool"]:
-                continue
-            paths_dic[key] = self._get_step_paths(key=key, prefix=prefix)
-
-        if not paths_dic:
+        step_keys = self._get_step_keys()
+        if not step_keys:
             return self._get_step_paths(prefix=prefix)
 
-        return paths_dic
+        return {key: self.get_step_paths(key, prefix=prefix) for key in step_keys}
+
+    def get_step_properties(self, step: str, prefix: str = "", global_log: Optional[logging.Logger] = None) -> dict[str, Any]:
+        """get_step_properties() returns the properties dictionary of **step**
+        (see :meth:`get_prop_dic`). Only this step is built, on first access,
+        and memoized, so its cost does not depend on the number of steps.
+
+        Args:
+            step (str): Step name.
+            prefix (str): Prefix if provided.
+            global_log (:obj:Logger): Log from the main workflow.
+
+        Returns:
+            dict: dictionary of properties.
+
+        Raises:
+            KeyError: If **step** is not a step of the configuration file.
+        """
+        if step in NON_STEP_KEYS or step not in self.properties:
+            raise KeyError(step)
+        if (step, prefix) not in self._step_properties:
+            self._step_properties[(step, prefix)] = self._get_step_properties(key=step, prefix=prefix)
+        # Private copy, the memoized dictionary is shared by all the calls
+        prop_dic = copy_config_value(self._step_properties[(step, prefix)])
+        prop_dic["global_log"] = global_log
+        return prop_dic
+
+    def get_step_paths(self, step: str, prefix: str = "") -> dict[str, Any]:
+        """get_step_paths() returns the paths dictionary of **step** (see
+        :meth:`get_paths_dic`). Only this step is built, on first access, and
+        memoized.
+
+        Args:
+            step (str): Step name.
+            prefix (str): Prefix if provided.
+
+        Returns:
+            dict: dictionary of paths.
+
+        Raises:
+            KeyError: If **step** is not a step of the configuration file.
+        """
+        if step in NON_STEP_KEYS or step not in self.properties:
+            raise KeyError(step)
+        if (step, prefix) not in self._step_paths:
+            self._step_paths[(step, prefix)] = self._get_step_paths(key=step, prefix=prefix)
+        return dict(self._step_paths[(step, prefix)])
+
+    def _get_step_keys(self) -> list[str]:
+        """_get_step_keys() returns the step names of the configuration file.
+        """
+        return [key for key in self.properties if key not in NON_STEP_KEYS]
+
+    def get_step_dependencies(self) -> dict[str, list[str]]:
+        """get_step_dependencies() returns a dictionary where keys are the step
+        names in the configuration file and every value is the list of steps it
+        depends on, derived from the `dependency/<step>/<path_key>` references of
+        its paths section.
+
+        Returns:
+            dict: dictionary of step dependencies.
+        """
+        dependencies_dic: dict[str, list[str]] = dict()
+        for key in self._get_step_keys():
+            dependencies_dic[key] = []
+            for path_value in (self.properties[key].get("paths") or {}).values():
+                dependency_tokens = str(path_value).strip().split("/")
+                if dependency_tokens[0] == "dependency" and dependency_tokens[1] not in dependencies_dic[key]:
+                    if dependency_tokens[1] not in self.properties:
+                        raise Exception(f"Step {key} depends on the unexisting step {dependency_tokens[1]}")
+                    dependencies_dic[key].append(dependency_tokens[1])
+
+        return dependencies_dic
 
     def _get_step_paths(self, key: str = "", prefix: str = "") -> dict[str, Any]:
         step_paths_dic = dict()
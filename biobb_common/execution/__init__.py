@@ -0,0 +1,7 @@
+name = "execution"
+__all__ = [
+    "batch",
+    "containers",
+    "workflow",
+    "worker",
+]
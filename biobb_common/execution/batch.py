@@ -0,0 +1,186 @@
+"""Module containing the BatchRunner class to launch independent biobb steps concurrently."""
+import time
+import logging
+import concurrent.futures
+from typing import Any, Callable, Optional, Sequence, Union
+from biobb_common.tools import file_utils as fu
+
+EXECUTORS = ("process", "thread")
+
+
+class BatchJob:
+    """A single step of a batch.
+
+    Args:
+        block (class or function): BiobbObject subclass or block launcher function (i.e. `folder_test`).
+        paths (dict): ({}) Input/Output paths dictionary passed as keyword arguments to **block**.
+        properties (dict): ({}) Properties dictionary of the step.
+        name (str): (None) Name of the job, used as default step name to isolate the logs.
+    """
+
+    def __init__(self, block: Union[type, Callable[..., Any]], paths: Optional[dict[str, Any]] = None,
+                 properties: Optional[dict[str, Any]] = None, name: Optional[str] = None) -> None:
+        self.block = block
+        self.paths = paths or {}
+        self.properties = dict(properties or {})
+        self.name = name or getattr(block, "__name__", "job")
+
+
+class BatchResult:
+    """Result of the execution of a :class:`BatchJob`.
+
+    Args:
+        name (str): Name of the job.
+        return_code (int): (None) Return code of the step, None if it did not finish.
+        exception (Exception): (None) Exception raised by the step.
+        elapsed (float): (0.0) Wall time of the step in seconds.
+        skipped (bool): (False) The step was not executed (fail-fast policy).
+    """
+
+    def __init__(self, name: str, return_code: Optional[int] = None, exception: Optional[BaseException] = None,
+                 elapsed: float = 0.0, skipped: bool = False) -> None:
+        self.name = name
+        self.return_code = return_code
+        self.exception = exception
+        self.elapsed = elapsed
+        self.skipped = skipped
+
+    @property
+    def success(self) -> bool:
+        return not self.skipped and self.exception is None and self.return_code == 0
+
+    def __repr__(self) -> str:
+        return f"BatchResult(name={self.name!r}, return_code={self.return_code}, exception={self.exception!r}, elapsed={self.elapsed:.3f}, skipped={self.skipped})"
+
+
+def launch_block(block: Union[type, Callable[..., Any]], paths: dict[str, Any], properties: dict[str, Any]) -> int:
+    """Launch **block** with **paths** and **properties** and return its exit code.
+
+    **block** can be a BiobbObject subclass (instantiated and launched) or a
+    block launcher function.
+    """
+    if isinstance(block, type):
+        return_code = block(**paths, properties=properties).launch()
+    else:
+        return_code = block(**paths, properties=properties)
+    return return_code or 0
+
+
+def _timed_launch(block: Union[type, Callable[..., Any]], paths: dict[str, Any], properties: dict[str, Any]) -> tuple[int, float]:
+    start = time.perf_counter()
+    return_code = launch_block(block, paths, properties)
+    return return_code, time.perf_counter() - start
+
+
+def get_executor(executor: str = "process", max_workers: Optional[int] = None) -> concurrent.futures.Executor:
+    """Return a process or thread pool executor with at most **max_workers** workers."""
+    if executor == "process":
+        return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    if executor == "thread":
+        return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="biobb")
+    raise ValueError(f"Unknown executor: {executor}. Valid executors: {EXECUTORS}")
+
+
+class BatchRunner:
+    """Launch many independent biobb steps on a bounded pool of workers.
+
+    Each job receives a copy of its properties where the **step** property
+    defaults to the job name, so every step writes its own out/err log files.
+    Commands are run inside the sandbox using the `cwd` of the subprocess
+    instead of :func:`os.chdir`, so **chdir_sandbox** is safe with both
+    executors. Blocks that change the working directory of the Python process
+    themselves should be run with the process executor.
+
+    Args:
+        max_workers (int): (None) Global concurrency limit. None uses the number of CPUs.
+        executor (str): ("process") Pool type. Values: process (ProcessPoolExecutor), thread (ThreadPoolExecutor).
+        fail_fast (bool): (False) Cancel the pending jobs after the first failure. If False all the jobs are executed.
+        global_log (:obj:`logging.Logger`): (None) Log from the main workflow.
+
+    Examples:
+        This is a use example of how to launch several steps concurrently::
+
+            from biobb_common.execution.batch import BatchRunner
+            from biobb_common.generic.folder_test import FolderTest
+            runner = BatchRunner(max_workers=8)
+            for i in range(100):
+                runner.add(FolderTest, {'output_folder': f'replica_{i}'}, {'n': 2}, name=f'replica_{i}')
+            results = runner.run()
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, executor: str = "process", fail_fast: bool = False,
+                 global_log: Optional[logging.Logger] = None) -> None:
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor}. Valid executors: {EXECUTORS}")
+        self.max_workers = max_workers
+        self.executor = executor
+        self.fail_fast = fail_fast
+        self.global_log = global_log
+        self.jobs: list[BatchJob] = []
+
+    def add(self, block: Union[type, Callable[..., Any]], paths: Optional[dict[str, Any]] = None,
+            properties: Optional[dict[str, Any]] = None, name: Optional[str] = None) -> BatchJob:
+        """Add a new job to the batch and return it."""
+        job = BatchJob(block, paths, properties, name or f"job_{len(self.jobs)}")
+        self.jobs.append(job)
+        return job
+
+    def run(self, jobs: Optional[Sequence[Union[BatchJob, tuple]]] = None) -> list[BatchResult]:
+        """Execute the jobs and return one :class:`BatchResult` per job in the same order.
+
+        Args:
+            jobs (list): (None) :class:`BatchJob` objects or (block, paths, properties) tuples. If None the jobs added with :meth:`add` are executed.
+        """
+        job_list = [job if isinstance(job, BatchJob) else BatchJob(*job) for job in (self.jobs if jobs is None else jobs)]
+        results: list[Optional[BatchResult]] = [None] * len(job_list)
+        fu.log(f"Launching {len(job_list)} jobs using a {self.executor} pool of {self.max_workers or 'default'} workers", self.global_log)
+
+        with get_executor(self.executor, self.max_workers) as pool:
+            future_to_index = {}
+            for index, job in enumerate(job_list):
+                properties = dict(job.properties)
+                properties.setdefault("step", job.name)
+                future_to_index[pool.submit(_timed_launch, job.block, job.paths, properties)] = index
+
+            failed = False
+            for future in concurrent.futures.as_completed(future_to_index):
+                index = future_to_index[future]
+                name = job_list[index].name
+                if future.cancelled():
+                    continue
+                try:
+                    return_code, elapsed = future.result()
+                    results[index] = BatchResult(name, return_code=return_code, elapsed=elapsed)
+                except Exception as exception:
+                    results[index] = BatchResult(name, exception=exception)
+                result = results[index]
+                fu.log(f"Job {name} finished with exit code {result.return_code} in {result.elapsed:.2f} seconds" if result.exception is None
+                       else f"Job {name} failed: {result.exception!r}", self.global_log)
+                if not result.success and self.fail_fast and not failed:
+                    failed = True
+                    fu.log("Fail-fast enabled, cancelling pending jobs", self.global_log)
+                    for pending in future_to_index:
+                        pending.cancel()
+
+        for index, job in enumerate(job_list):
+            if results[index] is None:
+                results[index] = BatchResult(job.name, skipped=True)
+        return results  # type: ignore
+
+
+def run_batch(jobs: Sequence[Union[BatchJob, tuple]], max_workers: Optional[int] = None, executor: str = "process",
+              fail_fast: bool = False, global_log: Optional[logging.Logger] = None) -> list[BatchResult]:
+    """Create a :class:`BatchRunner` and execute **jobs**.
+
+    Args:
+        jobs (list): :class:`BatchJob` objects or (block, paths, properties) tuples.
+        max_workers (int): (None) Global concurrency limit.
+        executor (str): ("process") Pool type. Values: process, thread.
+        fail_fast (bool): (False) Cancel the pending jobs after the first failure.
+        global_log (:obj:`logging.Logger`): (None) Log from the main workflow.
+
+    Returns:
+        :obj:`list` of :obj:`BatchResult`: Results in the same order as **jobs**.
+    """
+    return BatchRunner(max_workers=max_workers, executor=executor, fail_fast=fail_fast, global_log=global_log).run(jobs)
+
@@ -0,0 +1,214 @@
+"""Module containing the PersistentContainer class to run the steps of a workflow in long-lived containers.
+
+With the **container_persistent** property a step does not create its own
+container. One container per (engine, image, volume) is started on first
+use and kept running, and every step is executed inside it with
+``docker exec`` or ``singularity exec instance://``, saving the container
+start up of each step. The steps create their sandboxes in a dedicated
+**.biobb_container_sandboxes** directory of their sandbox_path, and only
+this directory is mounted in **container_volume_path**, so every step
+works in its own sandbox inside the container without exposing the rest
+of the host files.
+
+Containers are owned by the process that started them and stopped by
+:func:`stop_persistent_containers` when the process exits.
+:meth:`Workflow.run <execution.workflow.Workflow.run>` stops the ones
+used by its steps when it finishes.
+"""
+import os
+import sys
+import hashlib
+import logging
+import threading
+from sys import platform
+from typing import Iterable, Optional, Union
+from biobb_common.tools import file_utils as fu
+
+ENGINES = ("docker", "singularity")
+# Directory of sandbox_path containing the sandboxes mounted in the persistent containers
+SANDBOXES_DIR_NAME = ".biobb_container_sandboxes"
+
+_containers: dict[tuple[str, str, str, str], "PersistentContainer"] = {}
+_containers_lock = threading.Lock()
+_exit_handler_registered = False
+
+
+class PersistentContainer:
+    """Long-lived Docker container or Singularity instance executing the commands of many steps.
+
+    Args:
+        container_path (str): Path to the docker or singularity binary.
+        container_image (str): Container Image identifier.
+        host_volume (str): Host directory mounted in the container.
+        container_volume_path (str): ("/data") Path of **host_volume** inside the container.
+        out_log (:obj:`logging.Logger`): (None) Python logger object.
+        global_log (:obj:`logging.Logger`): (None) Python logger object.
+    """
+
+    def __init__(self, container_path: str, container_image: str, host_volume: str, container_volume_path: str = "/data",
+                 out_log: Optional[logging.Logger] = None, global_log: Optional[logging.Logger] = None) -> None:
+        self.container_path = container_path
+        self.container_image = container_image
+        self.host_volume = host_volume
+        self.container_volume_path = container_volume_path
+        self.out_log = out_log
+        self.global_log = global_log
+        self.engine = next((engine for engine in ENGINES if container_path.endswith(engine)), "")
+        if not self.engine:
+            raise ValueError(f"Persistent containers are not supported by {container_path}. Valid engines: {ENGINES}")
+        key = "\0".join((container_path, container_image, host_volume, container_volume_path))
+        self.name = f"biobb_{os.getpid()}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
+        self.owner_pid = os.getpid()
+        self.running = False
+
+    def start_cmd(self) -> list[str]:
+        """Command line starting the container in background."""
+        volume = f"{self.host_volume}:{self.container_volume_path}"
+        if self.engine == "docker":
+            # A shell waiting on the open stdin keeps the container alive
+            return [self.container_path, "run", "-d", "-i", "--name", self.name, "-v", volume, "--entrypoint", "/bin/sh", self.container_image]
+        return [self.container_path, "instance", "start", "--bind", volume, self.container_image, self.name]
+
+    def stop_cmd(self) -> list[str]:
+        """Command line stopping and removing the container."""
+        if self.engine == "docker":
+            return [self.container_path, "rm", "-f", self.name]
+        return [self.container_path, "instance", "stop", self.name]
+
+    def exec_cmd(self, cmd: list[str], env_vars: Optional[dict[str, str]] = None, working_dir: Optional[str] = None,
+                 user_id: Optional[str] = None, shell_path: Optional[str] = "/bin/bash -c") -> list[str]:
+        """Command line executing **cmd** inside the container.
+
+        Args:
+            cmd (list): Command line list.
+            env_vars (dict): (None) Environment variables of the command.
+            working_dir (str): (None) Working directory inside the container.
+            user_id (str): (None) User number id of the command, only for Docker.
+            shell_path (str): ("/bin/bash -c") Path to the binary executable of the container shell.
+
+        Returns:
+            list: Command line list.
+        """
+        if self.engine == "docker":
+            exec_cmd = [self.container_path, "exec"]
+            for env_var_name, env_var_value in (env_vars or {}).items():
+                exec_cmd.extend(["-e", f"{env_var_name}='{env_var_value}'"])
+            if working_dir:
+                exec_cmd.extend(["-w", working_dir])
+            if user_id:
+                exec_cmd.extend(["--user", user_id])
+            exec_cmd.append(self.name)
+        else:
+            exec_cmd = [self.container_path, "exec"]
+            # Not available on mac
+            if platform != "darwin":
+                exec_cmd.append("-e")
+            if env_vars:
+                exec_cmd.extend(["--env", ",".join(f"{env_var_name}='{env_var_value}'" for env_var_name, env_var_value in env_vars.items())])
+            if working_dir:
+                exec_cmd.extend(["--pwd", working_dir])
+            exec_cmd.append(f"instance://{self.name}")
+        if cmd and shell_path:
+            exec_cmd.extend([shell_path, '"' + " ".join(cmd) + '"'])
+        else:
+            exec_cmd.extend(cmd)
+        return exec_cmd
+
+    def start(self) -> int:
+        """Start the container, return the exit code of the start command.
+
+        A stale container with the same name (left by a crashed process with
+        the same pid) is removed first.
+        """
+        from biobb_common.command_wrapper import cmd_wrapper
+
+        cmd_wrapper.CmdWrapper(self.stop_cmd(), disable_logs=True, use_shell=False).launch()
+        fu.log(f"Starting persistent {self.engine} container {self.name} of {self.container_image}", self.out_log, self.global_log)
+        return_code = cmd_wrapper.CmdWrapper(self.start_cmd(), out_log=self.out_log, global_log=self.global_log, use_shell=False).launch()
+        self.running = return_code == 0
+        return return_code
+
+    def stop(self) -> int:
+        """Stop and remove the container, return the exit code of the stop command."""
+        from biobb_common.command_wrapper import cmd_wrapper
+
+        fu.log(f"Stopping persistent {self.engine} container {self.name}", self.global_log)
+        return_code = cmd_wrapper.CmdWrapper(self.stop_cmd(), global_log=self.global_log, disable_logs=True, use_shell=False).launch()
+        self.running = False
+        return return_code
+
+
+def _register_exit_handler() -> None:
+    global _exit_handler_registered
+    if _exit_handler_registered:
+        return
+    import atexit
+    atexit.register(stop_persistent_containers)
+    if "multiprocessing" in sys.modules:
+        # Process pool workers exit without running atexit handlers
+        from multiprocessing import util
+        util.Finalize(None, stop_persistent_containers, exitpriority=0)
+    _exit_handler_registered = True
+
+
+def get_persistent_container(container_path: str, container_image: str, host_volume: Union[str, os.PathLike], container_volume_path: str = "/data",
+                             out_log: Optional[logging.Logger] = None, global_log: Optional[logging.Logger] = None) -> PersistentContainer:
+    """Return the running container of the current process for the (engine, image, volume), starting it if needed.
+
+    Args:
+        container_path (str): Path to the docker or singularity binary.
+        container_image (str): Container Image identifier.
+        host_volume (str): Host directory mounted in the container.
+        container_volume_path (str): ("/data") Path of **host_volume** inside the container.
+        out_log (:obj:`logging.Logger`): (None) Python logger object.
+        global_log (:obj:`logging.Logger`): (None) Python logger object.
+
+    Returns:
+        :obj:`PersistentContainer`: The running container.
+
+    Raises:
+        RuntimeError: If the container can not be started.
+    """
+    key = (container_path, container_image, str(host_volume), container_volume_path)
+    with _containers_lock:
+        container = _containers.get(key)
+        # Containers inherited from the parent of a forked process belong to it
+        if container is None or not container.running or container.owner_pid != os.getpid():
+            container = PersistentContainer(container_path, container_image, str(host_volume), container_volume_path, out_log, global_log)
+            _register_exit_handler()
+            if container.start():
+                raise RuntimeError(f"Persistent container of {container_image} could not be started: {' '.join(container.start_cmd())}")
+            _containers[key] = container
+    resources = fu.get_run_resources()
+    if resources is not None:
+        resources.add_container(container.name)
+    return container
+
+
+def stop_persistent_containers(names: Optional[Iterable[str]] = None) -> list[str]:
+    """Stop the persistent containers started by the current process.
+
+    Args:
+        names (list): (None) Names of the containers to stop. None to stop all of them.
+
+    Returns:
+        list: Names of the stopped containers.
+    """
+    names = None if names is None else set(names)
+    with _containers_lock:
+        owned = {key: container for key, container in _containers.items()
+                 if container.owner_pid == os.getpid() and (names is None or container.name in names)}
+        for key in owned:
+            del _containers[key]
+    stopped = []
+    for container in owned.values():
+        if container.running:
+            container.stop()
+            stopped.append(container.name)
+        if os.path.basename(container.host_volume) == SANDBOXES_DIR_NAME:
+            try:
+                # Only succeeds if no other sandbox is using it
+                os.rmdir(container.host_volume)
+            except OSError:
+                pass
+    return stopped
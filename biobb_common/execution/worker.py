@@ -0,0 +1,260 @@
+"""Module containing the WorkerServer class to launch building blocks from a warm, long-lived process.
+
+The server keeps the block modules imported and forks a child for every
+launch request received on a Unix socket, so the request is executed
+without any interpreter start up or import time. The client forwards its
+command line arguments, working directory, environment and standard
+streams, so the block behaves as if it was launched from the client
+process. The CLI produced by :meth:`BiobbObject.get_main
+<generic.biobb_object.BiobbObject.get_main>` forwards the launch to the
+server when the **BIOBB_WORKER_SOCKET** environment variable is set.
+
+Usage::
+
+    biobb_worker serve --socket /tmp/biobb.sock --modules biobb_common.generic.folder_test &
+    export BIOBB_WORKER_SOCKET=/tmp/biobb.sock
+    folder_test -o output_folder
+"""
+import os
+import sys
+import json
+import stat
+import errno
+import signal
+import socket
+import logging
+import argparse
+import importlib
+import traceback
+from pathlib import Path
+from typing import Optional, Sequence, Union
+from biobb_common.tools import file_utils as fu
+
+SOCKET_ENV_VAR = "BIOBB_WORKER_SOCKET"
+# Modules imported by the CLI of every block
+DEFAULT_MODULES = ("argparse", "biobb_common.configuration.settings", "biobb_common.generic.biobb_object")
+RECV_CHUNK_SIZE = 65536
+
+
+def _recv_all(conn: socket.socket) -> bytes:
+    """Read from **conn** until the peer shuts down its writing side."""
+    chunks = []
+    for chunk in iter(lambda: conn.recv(RECV_CHUNK_SIZE), b""):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _run_entry(entry: str, argv: list[str]) -> int:
+    """Import and execute the **entry** ("module:function") CLI with **argv** and return its exit code."""
+    module_name, _, function_name = entry.partition(":")
+    sys.argv = [module_name] + list(argv)
+    try:
+        getattr(importlib.import_module(module_name), function_name or "main")()
+        return_code = 0
+    except SystemExit as exit_error:
+        if exit_error.code is None or isinstance(exit_error.code, int):
+            return_code = exit_error.code or 0
+        else:
+            print(exit_error.code, file=sys.stderr)
+            return_code = 1
+    except BaseException:
+        traceback.print_exc()
+        return_code = 1
+    return return_code
+
+
+class WorkerServer:
+    """Unix socket server launching building blocks in forked children of a warm process.
+
+    Each request is executed in its own child, so the state of a launch
+    (working directory, environment, loggers, global properties) never
+    leaks into the following ones, while all the modules imported by the
+    server are already available.
+
+    Args:
+        socket_path (str): Path to the Unix socket file.
+        modules (list): (None) Block modules imported before serving, i.e. ["biobb_gromacs.gromacs.grompp"].
+        global_log (:obj:`logging.Logger`): (None) Python logger object.
+    """
+
+    def __init__(self, socket_path: Union[str, Path], modules: Optional[Sequence[str]] = None,
+                 global_log: Optional[logging.Logger] = None) -> None:
+        self.socket_path = str(Path(socket_path).resolve())
+        self.modules = list(modules or [])
+        self.global_log = global_log
+        self.children: set[int] = set()
+        self.served = 0
+        self._running = False
+        self._socket: Optional[socket.socket] = None
+
+    def preload(self) -> None:
+        """Import the default and block modules."""
+        for module_name in list(DEFAULT_MODULES) + self.modules:
+            importlib.import_module(module_name)
+            fu.log(f"Worker imported: {module_name}", self.global_log)
+
+    def bind(self) -> None:
+        """Create the Unix socket, only accessible by the current user."""
+        if os.path.lexists(self.socket_path):
+            # Never remove anything that is not a socket
+            if not stat.S_ISSOCK(os.lstat(self.socket_path).st_mode):
+                raise OSError(errno.EEXIST, f"Worker socket path exists and is not a socket: {self.socket_path}")
+            # Remove the socket of a dead server, refuse to replace a live one
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise OSError(errno.EADDRINUSE, f"Worker already listening on {self.socket_path}")
+            except ConnectionRefusedError:
+                os.unlink(self.socket_path)
+            finally:
+                probe.close()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(self.socket_path)
+        # Connections are refused until listen(), so restricting the permissions before it is not racy
+        os.chmod(self.socket_path, 0o600)
+        self._socket.listen()
+        self._socket.settimeout(1)
+
+    def serve_forever(self, max_requests: Optional[int] = None) -> None:
+        """Accept and launch requests until :meth:`shutdown` is called or **max_requests** are served."""
+        if self._socket is None:
+            self.preload()
+            self.bind()
+        assert self._socket is not None
+        fu.log(f"Worker listening on: {self.socket_path}", self.global_log)
+        self._running = True
+        try:
+            while self._running and (max_requests is None or self.served < max_requests):
+                self.reap()
+                try:
+                    conn, _ = self._socket.accept()
+                except socket.timeout:
+                    continue
+                self._fork_request(conn)
+        finally:
+            self.close()
+
+    def shutdown(self) -> None:
+        """Stop serving after the current request."""
+        self._running = False
+
+    def close(self) -> None:
+        """Close and remove the socket and wait for the running children."""
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        for pid in list(self.children):
+            os.waitpid(pid, 0)
+            self.children.discard(pid)
+
+    def reap(self) -> None:
+        """Collect the finished children."""
+        for pid in list(self.children):
+            finished_pid, _ = os.waitpid(pid, os.WNOHANG)
+            if finished_pid:
+                self.children.discard(pid)
+
+    def _fork_request(self, conn: socket.socket) -> None:
+        pid = os.fork()
+        if pid == 0:
+            return_code = 1
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                if self._socket is not None:
+                    self._socket.close()
+                return_code = self._handle_request(conn)
+            finally:
+                os._exit(return_code)
+        conn.close()
+        self.children.add(pid)
+        self.served += 1
+
+    def _handle_request(self, conn: socket.socket) -> int:
+        """Execute a request in the forked child, sending back the exit code."""
+        conn.settimeout(None)
+        _, fds, _, _ = socket.recv_fds(conn, 1, 3)
+        request = json.loads(_recv_all(conn))
+        # Take over the standard streams of the client
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for target_fd, client_fd in enumerate(fds):
+            os.dup2(client_fd, target_fd)
+            os.close(client_fd)
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        os.environ.pop(SOCKET_ENV_VAR, None)
+        return_code = _run_entry(request["entry"], request["argv"])
+        if "biobb_common.execution.containers" in sys.modules:
+            # The child exits without running the atexit handlers
+            sys.modules["biobb_common.execution.containers"].stop_persistent_containers()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        conn.sendall(json.dumps({"return_code": return_code}).encode("utf-8"))
+        conn.close()
+        return return_code
+
+
+def forward(entry: str, argv: Sequence[str], socket_path: Union[str, Path]) -> int:
+    """Launch the **entry** CLI with **argv** in the worker listening on **socket_path**.
+
+    The standard streams, working directory and environment of the current
+    process are forwarded to the worker.
+
+    Args:
+        entry (str): CLI entry as "module:function", i.e. "biobb_common.generic.folder_test:main".
+        argv (list): Command line arguments without the program name.
+        socket_path (str): Path to the Unix socket of the worker.
+
+    Returns:
+        int: Exit code of the CLI.
+
+    Raises:
+        OSError: If the worker is not reachable.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    request = {"entry": entry, "argv": list(argv), "cwd": os.getcwd(), "env": dict(os.environ)}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(str(socket_path))
+        socket.send_fds(conn, [b"\0"], [0, 1, 2])
+        conn.sendall(json.dumps(request).encode("utf-8"))
+        conn.shutdown(socket.SHUT_WR)
+        response = _recv_all(conn)
+    if not response:
+        # The child died before answering
+        return 1
+    return json.loads(response)["return_code"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Launch building blocks from a warm worker process.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Start a worker server.")
+    serve_parser.add_argument("--socket", default=os.getenv(SOCKET_ENV_VAR), required=not os.getenv(SOCKET_ENV_VAR), help="Path to the Unix socket file.")
+    serve_parser.add_argument("--modules", nargs="*", default=[], help="Block modules imported by the worker.")
+    run_parser = subparsers.add_parser("run", help="Launch a block CLI in a worker server.")
+    run_parser.add_argument("--socket", default=os.getenv(SOCKET_ENV_VAR), required=not os.getenv(SOCKET_ENV_VAR), help="Path to the Unix socket file.")
+    run_parser.add_argument("entry", help="Block CLI as module:function, i.e. biobb_common.generic.folder_test:main")
+    run_parser.add_argument("argv", nargs=argparse.REMAINDER, help="Arguments of the block CLI.")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        server = WorkerServer(args.socket, args.modules, global_log=logging.getLogger("biobb_worker"))
+        signal.signal(signal.SIGTERM, lambda signum, frame: server.shutdown())
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    else:
+        sys.exit(forward(args.entry, args.argv, args.socket))
+
+
+if __name__ == "__main__":
+    main()
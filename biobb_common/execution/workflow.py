@@ -0,0 +1,169 @@
+"""Module containing the Workflow class to launch the steps of a configuration file as a dependency graph."""
+import logging
+import concurrent.futures
+from typing import Any, Callable, Optional, Union
+from biobb_common.configuration import settings
+from biobb_common.tools import file_utils as fu
+from biobb_common.execution import containers
+from biobb_common.generic.biobb_object import BiobbObject
+from biobb_common.execution.batch import BatchResult, get_executor, _timed_launch
+
+
+class Workflow:
+    """Launch the steps of a biobb configuration file following their dependencies.
+
+    The dependency graph is derived from the `dependency/<step>/<path_key>`
+    references in the paths section of each step (see
+    :meth:`ConfReader.get_step_dependencies <configuration.settings.ConfReader.get_step_dependencies>`).
+    A step is launched as soon as all the steps it depends on have finished
+    successfully, so independent branches run in parallel. Steps depending
+    on a failed step are not executed.
+
+    If the **restart** property of a step is True and all its output files
+    already exist the step is not launched at all.
+
+    Args:
+        config (str or ConfReader): Path to the configuration [YAML|JSON] file, JSON string or ConfReader object.
+        blocks (dict): Mapping of step names (or tool names) to BiobbObject subclasses or block launcher functions.
+        max_workers (int): (None) Maximum number of steps running at the same time.
+        executor (str): ("thread") Pool type. Values: thread (ThreadPoolExecutor), process (ProcessPoolExecutor).
+        fail_fast (bool): (False) Do not launch new steps after the first failure.
+        prefix (str): ("") Prefix passed to the ConfReader properties and paths.
+        global_log (:obj:`logging.Logger`): (None) Log from the main workflow.
+
+    Examples:
+        This is a use example of how to launch a workflow::
+
+            from biobb_common.execution.workflow import Workflow
+            from biobb_model.model.fix_side_chain import fix_side_chain
+            from biobb_gromacs.gromacs.pdb2gmx import pdb2gmx
+            workflow = Workflow('workflow.yml', {'step1_fixsidechain': fix_side_chain, 'step2_pdb2gmx': pdb2gmx}, max_workers=4)
+            results = workflow.run()
+    """
+
+    def __init__(self, config: Union[str, settings.ConfReader], blocks: dict[str, Union[type, Callable[..., Any]]],
+                 max_workers: Optional[int] = None, executor: str = "thread", fail_fast: bool = False,
+                 prefix: str = "", global_log: Optional[logging.Logger] = None) -> None:
+        self.conf = config if isinstance(config, settings.ConfReader) else settings.ConfReader(config)
+        self.max_workers = max_workers
+        self.executor = executor
+        self.fail_fast = fail_fast
+        self.global_log = global_log
+        self.graph = self.conf.get_step_dependencies()
+        self.properties = self.conf.get_prop_dic(prefix=prefix, global_log=global_log)
+        self.paths = self.conf.get_paths_dic(prefix=prefix)
+
+        self.blocks: dict[str, Union[type, Callable[..., Any]]] = {}
+        for step in self.graph:
+            block = blocks.get(step) or blocks.get(self.properties[step].get("tool") or "")
+            if block is None:
+                raise ValueError(f"No block defined for step {step}")
+            self.blocks[step] = block
+        self.order = self.get_order()
+        # Output arguments of each block, parsed once
+        self._output_keys: dict[Union[type, Callable[..., Any]], Optional[list[str]]] = {}
+
+    def get_order(self) -> list[str]:
+        """Return the steps in topological order, keeping the configuration file order between independent steps.
+
+        Raises:
+            ValueError: If the dependencies contain a cycle.
+        """
+        order: list[str] = []
+        done: set[str] = set()
+        pending = list(self.graph)
+        while pending:
+            ready = [step for step in pending if all(dependency in done for dependency in self.graph[step])]
+            if not ready:
+                raise ValueError(f"Circular dependency between steps: {pending}")
+            order.extend(ready)
+            done.update(ready)
+            pending = [step for step in pending if step not in done]
+        return order
+
+    def _get_output_keys(self, block: Union[type, Callable[..., Any]]) -> Optional[list[str]]:
+        """Return the output arguments of **block** from its docstring, None if it can not be parsed."""
+        if block not in self._output_keys:
+            try:
+                if isinstance(block, type) and issubclass(block, BiobbObject):
+                    # Parsed once per class and shared with the block objects
+                    doc_arguments_dict = block.get_doc_dicts()[0]
+                else:
+                    doc_arguments_dict = fu.get_doc_dicts(block.__doc__)[0]
+                self._output_keys[block] = [key for key, value in doc_arguments_dict.items() if (value.get("input_output") or "").lower().startswith("out")]
+            except Exception:
+                self._output_keys[block] = None
+        return self._output_keys[block]
+
+    def _get_output_paths(self, step: str) -> list[str]:
+        output_keys = self._get_output_keys(self.blocks[step])
+        if output_keys is None:
+            output_keys = [key for key in self.paths[step] if key.startswith("output")]
+        return [self.paths[step][key] for key in output_keys if key in self.paths[step]]
+
+    def _is_restart(self, step: str) -> bool:
+        return bool(self.properties[step].get("restart")) and fu.check_complete_files(self._get_output_paths(step))  # type: ignore
+
+    def run(self) -> dict[str, BatchResult]:
+        """Execute the workflow and return a dictionary of :class:`BatchResult <execution.batch.BatchResult>` objects by step name.
+
+        The deferred removals, sandbox pools and persistent containers created
+        by the steps (see :class:`RunResources <tools.file_utils.RunResources>`)
+        are released when the workflow finishes, the ones of other runs of the
+        process are left untouched.
+        """
+        results: dict[str, BatchResult] = {}
+        resources = fu.RunResources()
+        running: dict[concurrent.futures.Future, str] = {}
+        stop = False
+
+        def _submit_ready(pool: concurrent.futures.Executor) -> None:
+            for step in self.order:
+                if step in results or step in running.values():
+                    continue
+                dependencies = [results.get(dependency) for dependency in self.graph[step]]
+                if any(result is not None and not result.success for result in dependencies) or (stop and not running):
+                    results[step] = BatchResult(step, skipped=True)
+                    fu.log(f"Step {step} skipped", self.global_log)
+                elif stop or any(result is None for result in dependencies):
+                    continue
+                elif self._is_restart(step):
+                    results[step] = BatchResult(step, return_code=0)
+                    fu.log(f"Restart is enabled, this step: {step} will the skipped", self.global_log)
+                else:
+                    fu.log(f"Launching step {step}", self.global_log)
+                    if self.executor == "thread":
+                        # Each step in its own context recording the resources it creates
+                        running[pool.submit(resources.context().run, _timed_launch, self.blocks[step], self.paths[step], self.properties[step])] = step
+                    else:
+                        running[pool.submit(_timed_launch, self.blocks[step], self.paths[step], self.properties[step])] = step
+
+        with get_executor(self.executor, self.max_workers) as pool:
+            # Restarted or skipped steps may unlock new steps without launching anything
+            while len(results) < len(self.order):
+                before = len(results)
+                _submit_ready(pool)
+                if not running:
+                    if len(results) == before:
+                        break
+                    continue
+                finished, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    try:
+                        return_code, elapsed = future.result()
+                        results[step] = BatchResult(step, return_code=return_code, elapsed=elapsed)
+                    except Exception as exception:
+                        results[step] = BatchResult(step, exception=exception)
+                    fu.log(f"Step {step} finished with exit code {results[step].return_code} in {results[step].elapsed:.2f} seconds" if results[step].exception is None
+                           else f"Step {step} failed: {results[step].exception!r}", self.global_log)
+                    if not results[step].success and self.fail_fast:
+                        stop = True
+
+        # Resources left by the steps running in threads, the ones of the process
+        # pool workers are released when they exit at the shutdown of the pool
+        fu.flush_deferred_removals(paths=resources.removals)
+        fu.drain_sandbox_pools(self.global_log, resources.sandbox_paths)
+        # Containers shared by the steps of the workflow
+        containers.stop_persistent_containers(resources.containers)
+        return {step: results[step] for step in self.order}
@@ -1,21 +1,29 @@
 """Module containing the BiobbObject generic parent class."""
-import difflib
+import builtins
 import importlib
 import os
 import shutil
 import warnings
-import argparse
 from logging import Logger
 from pathlib import Path
-from pydoc import locate
+import sys
 from sys import platform
 from typing import Optional, Union
-from biobb_common.configuration import settings
 from biobb_common.command_wrapper import cmd_wrapper
 from biobb_common.tools import file_utils as fu
+from biobb_common.tools import step_cache
+from biobb_common.tools.step_metrics import timed_phase
 from biobb_common import biobb_global_properties
 
 
+def _locate(path: str) -> object:
+    """:func:`pydoc.locate` avoiding the import of pydoc for builtin names."""
+    if path in vars(builtins):
+        return getattr(builtins, path)
+    from pydoc import locate
+    return locate(path)
+
+
 class BiobbObject:
     """
     | biobb_common BiobbObject
@@ -33,9 +41,16 @@ class BiobbObject:
             * **container_user_id** (*str*) - (None) User number id to be mapped inside the container.
             * **container_shell_path** (*str*) - ("/bin/bash -c") Path to the binary executable of the container shell.
             * **container_generic_command** (*str*) - ("run") Which command typically run or exec will be used to execute your image.
+            * **container_cache_path** (*str*) - (None) [WF property] Directory where the Singularity images are pulled and shared by all the steps and workers. If None the BIOBB_SINGULARITY_CACHE environment variable or the current working directory.
+            * **container_cache_max_age** (*float*) - (None) [WF property] Maximum age in seconds of a cached Singularity image before it is pulled again, so mutable tags like "latest" are refreshed. None to never pull a cached image again. Images referenced by digest never expire.
+            * **container_persistent** (*bool*) - (False) [WF property] Execute the step in a long-lived Docker container or Singularity instance shared by the steps with the same image and sandbox_path, instead of starting a container per step. Only the dedicated directory of the step sandboxes (sandbox_path/.biobb_container_sandboxes) is mounted in the container. Not compatible with disable_sandbox. See :mod:`execution.containers`.
             * **stage_io_dict** (*dict*) - ({}) Stage Input/Output files dictionary.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
+            * **sandbox_pool_size** (*int*) - (0) [WF property] Maximum number of empty sandboxes kept in sandbox_path to be reused by the following steps instead of creating and removing a directory per step. 0 to disable the pool. The idle sandboxes are removed at the end of a workflow and when the process exits (see `file_utils.drain_sandbox_pools()`).
             * **disable_sandbox** (*bool*) - (False) Disable the use of temporal unique directories aka sandbox. Only for local execution.
+            * **copy_workers** (*int*) - (1) [WF property] Number of threads copying the files of output directories to the host.
+            * **move_to_host** (*bool*) - (False) [WF property] Rename the output files into place instead of copying them when the sandbox and the destination share the filesystem.
+            * **stage_mode** (*str*) - ("copy") [WF property] How input files are staged in the sandbox. Values: copy (Full copy), hardlink (Hard link falling back to copy. UNSAFE for tools writing their inputs, changes reach the original files), reflink (Copy-on-write clone falling back to copy), symlink (Symbolic link falling back to copy. Only for local execution. UNSAFE for tools writing their inputs, changes reach the original files), auto (reflink and finally copy).
             * **global_properties_list** (*list*) - ([]) list of global properties.
             * **chdir_sandbox** (*bool*) - (False) Change directory to the sandbox using just file names in the command line. Only for local execution.
             * **binary_path** (*str*) - ('') Path to the binary executable.
@@ -51,14 +66,24 @@ class BiobbObject:
             * **step** (*str*) - (None) Name of the step.
             * **path** (*str*) - ('') Absolute path to the step working dir.
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
+            * **deferred_remove_tmp** (*bool*) - (False) [WF property] Move the temporal directories to a trash directory and remove them in background, so the next step does not wait for the removal. Call `file_utils.flush_deferred_removals()` to wait for them.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
+            * **cache_dir** (*str*) - (None) [WF property] Path to the step results cache. If set, steps with the same module, version, properties and inputs reuse the cached outputs instead of being executed.
+            * **cache_max_size** (*int*) - (None) [WF property] Maximum size of the step results cache in bytes, least recently used results are evicted first. None for unlimited.
+            * **cache_fingerprint** (*str*) - ("content") [WF property] How input files are identified in the step results cache. Values: content (Hash of the file contents), stat (File size and modification time).
+            * **cache_key** (*str*) - (None) Step results cache key, NOT read from the dictionary.
             * **cmd** (*list*) - ([]) Command line list, NOT read from the dictionary.
             * **return_code** (*int*) - (0) Return code of the command execution, NOT read from the dictionary.
             * **timeout** (*int*) - (None) Timeout for the execution of the command.
+            * **stream_output** (*bool*) - (False) Forward the command output to the logs while it runs, keeping only the last lines in memory.
+            * **stream_tail_lines** (*int*) - (100) Number of output lines kept in memory when stream_output is enabled.
             * **tmp_files** (*list*) - ([]) list of temporal files, NOT read from the dictionary.
             * **env_vars_dict** (*dict*) - ({}) Environment Variables dictionary.
             * **shell_path** (*str*) - ("/bin/bash") Path to the binary executable of the shell.
+            * **use_shell** (*bool*) - (None) Execute the command line through shell_path. If None the shell is only used when the command line contains pipes, redirects, globbing or other shell features.
             * **dev** (*str*) - (None) Development options.
+            * **metrics_path** (*str*) - (None) [WF property] Path to a JSON lines file where the timing of every phase and the resource usage of the step are appended.
+            * **step_metrics** (*StepMetrics object*) - (None) Metrics of the running step, NOT read from the dictionary.
             * **check_extensions** (*bool*) - (True) Check extensions of the input/output files.
             * **check_var_typing** (*bool*) - (True) Check typing of the input/output files.
             * **locals_var_dict** (*dict*) - ({}) Local variables dictionary.
@@ -68,6 +93,9 @@ class BiobbObject:
 
     """
 
+    # Parsed docstrings by class, see get_doc_dicts
+    _doc_dicts_cache: dict[type, tuple[fu.ReadOnlyDict, fu.ReadOnlyDict]] = {}
+
     def __init__(self, properties=None, **kwargs) -> None:  # type: ignore
         # Merge global properties, priorizating local ones
         properties = biobb_global_properties.dict() | properties or {}
@@ -83,11 +111,18 @@ class BiobbObject:
         self.container_user_id: Optional[str] = properties.get("container_user_id")
         self.container_shell_path: str = properties.get("container_shell_path", "/bin/bash -c")
         self.container_generic_command: str = properties.get("container_generic_command", "run")
+        self.container_cache_path: Optional[str] = properties.get("container_cache_path")
+        self.container_cache_max_age: Optional[float] = properties.get("container_cache_max_age")
+        self.container_persistent: bool = properties.get("container_persistent", False)
 
         # stage
         self.stage_io_dict: dict[str, dict[str, str]] = {"in": {}, "out": {}}
         self.sandbox_path: Union[str, Path] = properties.get("sandbox_path", Path().cwd())
+        self.sandbox_pool_size: int = properties.get("sandbox_pool_size", 0)
         self.disable_sandbox: bool = properties.get("disable_sandbox", False)
+        self.stage_mode: str = properties.get("stage_mode", "copy")
+        self.copy_workers: int = properties.get("copy_workers", 1)
+        self.move_to_host: bool = properties.get("move_to_host", False)
 
         # Properties common in all BB
         self.global_properties_list: list[str] = properties.get("global_properties_list", [])
@@ -105,18 +140,29 @@ class BiobbObject:
         self.step: Optional[str] = properties.get("step", None)
         self.path: str = properties.get("path", "")
         self.remove_tmp: bool = properties.get("remove_tmp", True)
+        self.deferred_remove_tmp: bool = properties.get("deferred_remove_tmp", False)
         self.restart: bool = properties.get("restart", False)
+        self.cache_dir: Optional[str] = properties.get("cache_dir", None)
+        self.cache_max_size: Optional[int] = properties.get("cache_max_size", None)
+        self.cache_fingerprint: str = properties.get("cache_fingerprint", "content")
+        self.cache_key: Optional[str] = None
+        self._cache_properties_hash: Optional[str] = step_cache.hash_properties(properties) if self.cache_dir else None
         self.cmd: list[str] = []
         self.return_code: int = 0
         self.timeout: Optional[int] = properties.get("timeout", None)
+        self.stream_output: bool = properties.get("stream_output", False)
+        self.stream_tail_lines: int = properties.get("stream_tail_lines", 100)
         self.tmp_files: list[Union[str, Path]] = []
         self.env_vars_dict: dict = properties.get("env_vars_dict", {})
         self.shell_path: Union[str, Path] = properties.get("shell_path", os.getenv("SHELL", "/bin/bash"))
+        self.use_shell: Optional[bool] = properties.get("use_shell", None)
         self.dev: Optional[str] = properties.get("dev", None)
+        self.metrics_path: Optional[str] = properties.get("metrics_path", None)
+        self.step_metrics = None
         self.check_extensions: bool = properties.get("check_extensions", True)
         self.check_var_typing: bool = properties.get("check_var_typing", True)
         self.locals_var_dict: dict[str, str] = dict()
-        self.doc_arguments_dict, self.doc_properties_dict = fu.get_doc_dicts(self.__doc__)
+        self.doc_arguments_dict, self.doc_properties_dict = self.get_doc_dicts()
 
         try:
             self.version = importlib.import_module(
@@ -125,6 +171,20 @@ class BiobbObject:
         except Exception:
             self.version = None
 
+    @classmethod
+    def get_doc_dicts(cls) -> tuple[fu.ReadOnlyDict, fu.ReadOnlyDict]:
+        """Return the arguments and properties dictionaries parsed from the class docstring.
+
+        The docstring is parsed once per class and the result is shared by all
+        its instances as read-only dictionaries.
+        """
+        doc_dicts = BiobbObject._doc_dicts_cache.get(cls)
+        if doc_dicts is None:
+            doc_arguments_dict, doc_properties_dict = fu.get_doc_dicts(cls.__doc__)
+            doc_dicts = fu.freeze_dict(doc_arguments_dict), fu.freeze_dict(doc_properties_dict)
+            BiobbObject._doc_dicts_cache[cls] = doc_dicts
+        return doc_dicts
+
     def check_arguments(
             self,
             output_files_created: bool = False,
@@ -167,18 +227,20 @@ class BiobbObject:
             for prop, value in properties.items():
                 if self.doc_properties_dict.get(prop):
                     property_type = self.doc_properties_dict[prop].get("type")
-                    classinfo: object = locate(property_type).__class__
+                    classinfo: object = _locate(property_type).__class__
                     if classinfo == type:
-                        classinfo = locate(property_type)
+                        classinfo = _locate(property_type)
                     if not isinstance(value, classinfo):  # type: ignore
                         warnings.warn(
-                            f"Warning: {prop} property type not recognized. Got {type(value)} Expected {locate(property_type)}"
+                            f"Warning: {prop} property type not recognized. Got {type(value)} Expected {_locate(property_type)}"
                         )
 
         error_properties = set(
             [prop for prop in properties.keys() if prop not in self.__dict__.keys()]
         )
         error_properties -= reserved_properties
+        if error_properties:
+            import difflib
         for error_property in error_properties:
             close_property = difflib.get_close_matches(
                 error_property, self.__dict__.keys(), n=1, cutoff=0.01
@@ -205,8 +267,37 @@ class BiobbObject:
             if fu.check_complete_files(self.io_dict["out"].values()):  # type: ignore
                 fu.log("Restart is enabled, this step: %s will the skipped" % self.step, self.out_log, self.global_log)
                 return True
+
+        if self.cache_dir:
+            cache = self.get_step_cache()
+            self.cache_key = cache.get_key(self.__module__, self.version, str(self._cache_properties_hash), self.io_dict)
+            if cache.fetch(self.cache_key, self.io_dict["out"]):
+                fu.log("Step cache is enabled, this step: %s results have been restored from the cache" % self.step, self.out_log, self.global_log)
+                return True
         return False
 
+    def get_step_cache(self) -> step_cache.StepCache:
+        """Return the :class:`StepCache <tools.step_cache.StepCache>` object of the cache_dir property."""
+        return step_cache.StepCache(str(self.cache_dir), max_size=self.cache_max_size, fingerprint=self.cache_fingerprint, out_log=self.out_log)
+
+    def get_sandbox_parent_path(self) -> str:
+        """Return the directory where the sandboxes of the step are created.
+
+        Persistent containers mount the parent of the sandboxes, so their
+        sandboxes are created in a dedicated directory inside sandbox_path
+        and the rest of sandbox_path (i.e. the working directory) is not
+        exposed to the container.
+        """
+        if self.uses_persistent_container():
+            from biobb_common.execution import containers
+            return str(Path(self.sandbox_path).joinpath(containers.SANDBOXES_DIR_NAME))
+        return str(self.sandbox_path)
+
+    def get_sandbox_pool(self) -> fu.SandboxPool:
+        """Return the :class:`SandboxPool <tools.file_utils.SandboxPool>` object of the sandbox parent directory."""
+        return fu.SandboxPool(self.get_sandbox_parent_path(), max_size=self.sandbox_pool_size)
+
+    @timed_phase("stage_files")
     def stage_files(self):
         """Stage the input/output files in a temporal unique directory aka sandbox."""
         if self.disable_sandbox:
@@ -215,12 +306,22 @@ class BiobbObject:
             self.stage_io_dict["unique_dir"] = os.getcwd()
             return
         # Create a unique directory for the sandbox
-        unique_dir = str(Path(fu.create_unique_dir(path=str(self.sandbox_path), prefix="sandbox_", out_log=self.out_log)).resolve())
+        if self.sandbox_pool_size:
+            unique_dir = self.get_sandbox_pool().acquire(self.out_log)
+        else:
+            unique_dir = str(Path(fu.create_unique_dir(path=self.get_sandbox_parent_path(), prefix="sandbox_", out_log=self.out_log)).resolve())
         self.stage_io_dict = {"in": {}, "out": {}, "unique_dir": unique_dir}
 
         # Only remove unique_dir if using sandbox
         self.tmp_files.append(unique_dir)
 
+        # Symbolic links to host paths are not reachable from inside the container
+        stage_mode = self.stage_mode
+        if self.container_path and stage_mode == "symlink":
+            stage_mode = "hardlink"
+        # Inputs sharing their name with an output would be overwritten through the link
+        out_names = {Path(out_path).name for out_path in self.io_dict.get("out", {}).values() if out_path}
+
         for io in ["in", "out"]:
             for file_ref, file_path in self.io_dict.get(io, {}).items():
                 if not file_path:
@@ -230,15 +331,14 @@ class BiobbObject:
                 # Assign INTERNAL PATH to IN/OUT files
                 if file_path.exists() or io == "out":
                     if io == "in":
-                        fu.log(f"Copy to stage: {file_path} --> {unique_dir.split('/')[-1]}", self.out_log)
+                        file_stage_mode = "copy" if file_path.name in out_names else stage_mode
                         doc = self.doc_arguments_dict.get(file_ref)
-                        if doc and doc['type'] == 'dir' and file_path.suffix != '.zip':
-                            shutil.copytree(file_path, os.path.join(unique_dir, file_path.name))
-                        else:
-                            shutil.copy2(file_path, unique_dir)
+                        is_dir = bool(doc and doc['type'] == 'dir' and file_path.suffix != '.zip')
+                        method = fu.stage_path(file_path, unique_dir, stage_mode=file_stage_mode, is_dir=is_dir, out_log=self.out_log)
+                        fu.log(f"Stage ({method}): {file_path} --> {unique_dir.split('/')[-1]}", self.out_log)
                     # Container
                     if self.container_path:
-                        self.stage_io_dict[io][file_ref] = os.path.join(self.container_volume_path, file_path.name)
+                        self.stage_io_dict[io][file_ref] = os.path.join(self.get_container_sandbox_path(unique_dir), file_path.name)
                     # Local
                     else:
                         self.stage_io_dict[io][file_ref] = os.path.join(unique_dir, file_path.name)
@@ -248,6 +348,32 @@ class BiobbObject:
                     # Default IN files in GMXLIB path like gmx_solvate -> input_solvent_gro_path (spc216.gro)
                     self.stage_io_dict[io][file_ref] = file_path.name
 
+    def uses_persistent_container(self) -> bool:
+        """Check if the step is executed in a persistent container, only available for Docker and Singularity."""
+        return bool(self.container_persistent and not self.disable_sandbox and self.container_path and self.container_path.endswith(("docker", "singularity")))
+
+    def get_container_sandbox_path(self, unique_dir: str) -> str:
+        """Return the path of the sandbox **unique_dir** inside the container."""
+        if self.uses_persistent_container():
+            # Persistent containers mount the parent directory of all the sandboxes
+            return os.path.join(self.container_volume_path, Path(unique_dir).name)
+        return self.container_volume_path
+
+    def create_persistent_container_cmd_line(self, host_volume: str) -> list[str]:
+        """Return the command line executing `self.cmd` in the persistent container of the step, starting it if needed."""
+        from biobb_common.execution import containers
+
+        container = containers.get_persistent_container(self.container_path or "", self.container_image, str(Path(host_volume).parent),
+                                                        self.container_volume_path, self.out_log, self.global_log)
+        fu.log(f"Using persistent container {container.name}", self.out_log, self.global_log)
+        if not self.cmd:
+            fu.log("WARNING: The command-line is empty, persistent containers do not run the default command of the image.",
+                   self.out_log, self.global_log)
+        return container.exec_cmd(self.cmd, env_vars=self.env_vars_dict,
+                                  working_dir=self.container_working_dir or self.get_container_sandbox_path(host_volume),
+                                  user_id=self.container_user_id, shell_path=self.container_shell_path)
+
+    @timed_phase("create_cmd_line")
     def create_cmd_line(self) -> None:
         """ The method modifies the `self.cmd` attribute in-place to contain the final
         command line that will be executed based on the container type. """
@@ -267,39 +393,11 @@ class BiobbObject:
                 self.out_log,
                 self.global_log,
             )
-            if not Path(self.container_image).exists():
-                fu.log(
-                    f"{self.container_image} does not exist trying to pull it",
-                    self.out_log,
-                    self.global_log,
-                )
-                container_image_name = str(
-                    Path(self.container_image).with_suffix(".sif").name
-                )
-                singularity_pull_cmd = [
-                    self.container_path,
-                    "pull",
-                    "--name",
-                    container_image_name,
-                    self.container_image,
-                ]
-                try:
-                    from biobb_common.command_wrapper import cmd_wrapper
-
-                    cmd_wrapper.CmdWrapper(
-                        singularity_pull_cmd, self.shell_path, self.out_log
-                    ).launch()
-                    if Path(container_image_name).exists():
-                        self.container_image = container_image_name
-                    else:
-                        raise FileNotFoundError
-                except FileNotFoundError:
-                    fu.log(
-                        f"{' '.join(singularity_pull_cmd)} not found",
-                        self.out_log,
-                        self.global_log,
-                    )
-                    raise FileNotFoundError
+            self.container_image = fu.pull_singularity_image(self.container_path, self.container_image, self.container_cache_path,
+                                                             self.out_log, self.global_log, self.container_cache_max_age)
+            if self.uses_persistent_container():
+                self.cmd = self.create_persistent_container_cmd_line(host_volume)
+                return
             singularity_cmd = [
                 self.container_path,
                 self.container_generic_command,
@@ -343,6 +441,9 @@ class BiobbObject:
         elif self.container_path.endswith("docker"):
             fu.log("Using Docker image %s" % self.container_image,
                    self.out_log, self.global_log)
+            if self.uses_persistent_container():
+                self.cmd = self.create_persistent_container_cmd_line(host_volume)
+                return
             docker_cmd = [self.container_path, self.container_generic_command]
             if self.env_vars_dict:
                 for env_var_name, env_var_value in self.env_vars_dict.items():
@@ -410,13 +511,12 @@ class BiobbObject:
             pass
             # fu.log('Not using any container', self.out_log, self.global_log)
 
-    def execute_command(self):
+    def get_cmd_wrapper(self) -> cmd_wrapper.CmdWrapper:
+        """Return the :class:`CmdWrapper <command_wrapper.cmd_wrapper.CmdWrapper>` executing `self.cmd`."""
+        # Run the command inside the sandbox without changing the process-wide cwd
+        cwd = self.stage_io_dict["unique_dir"] if self.chdir_sandbox else None
 
-        cwd = os.getcwd()
-        if self.chdir_sandbox:
-            os.chdir(self.stage_io_dict["unique_dir"])
-
-        self.return_code = cmd_wrapper.CmdWrapper(
+        return cmd_wrapper.CmdWrapper(
             cmd=self.cmd,
             shell_path=self.shell_path,
             out_log=self.out_log,
@@ -424,16 +524,40 @@ class BiobbObject:
             global_log=self.global_log,
             env=self.env_vars_dict,
             timeout=self.timeout,
-            disable_logs=self.disable_logs
-        ).launch()
+            disable_logs=self.disable_logs,
+            stream=self.stream_output,
+            tail_lines=self.stream_tail_lines,
+            use_shell=cmd_wrapper.requires_shell(self.cmd) if self.use_shell is None else self.use_shell,
+            cwd=cwd
+        )
 
-        if self.chdir_sandbox:
-            os.chdir(cwd)
+    @timed_phase("execute_command")
+    def execute_command(self):
+        self.return_code = self.get_cmd_wrapper().launch()
+
+    @timed_phase("execute_command")
+    async def aexecute_command(self):
+        """Asyncio version of :meth:`execute_command`."""
+        self.return_code = await self.get_cmd_wrapper().alaunch()
 
     def run_biobb(self):
         self.create_cmd_line()
         self.execute_command()
 
+    async def arun_biobb(self):
+        """Asyncio version of :meth:`run_biobb`. Cancelling the awaiting task
+        kills the command and its children.
+
+        The command line is created in a worker thread, as it may pull a
+        Singularity image or start a persistent container, so the event loop
+        is never blocked.
+        """
+        import asyncio
+
+        await asyncio.to_thread(self.create_cmd_line)
+        await self.aexecute_command()
+
+    @timed_phase("copy_to_host")
     def copy_to_host(self):
         """Copy output files from the sandbox to the host system."""
         for file_ref, file_path in self.stage_io_dict["out"].items():
@@ -444,7 +568,7 @@ class BiobbObject:
                 # If the output is a directory, ensure it exists in the sandbox
                 sandbox_dir_path = Path(self.stage_io_dict["unique_dir"]).joinpath(file_path)
                 fu.log(f"Copy directory to host: {sandbox_dir_path} --> {dest_path}", self.out_log, self.global_log)
-                fu.copytree_new_files_only(sandbox_dir_path, dest_path)
+                fu.sync_tree(sandbox_dir_path, dest_path, max_workers=self.copy_workers, move=self.move_to_host, out_log=self.out_log)
             else:
                 if not file_path:
                     continue
@@ -454,7 +578,13 @@ class BiobbObject:
                     continue
                 # Only copy if destination doesn't exist or is different from source
                 if not dest_path.exists() or not sandbox_file_path.samefile(dest_path):
-                    shutil.copy2(sandbox_file_path, dest_path)
+                    if self.move_to_host and sandbox_file_path.stat().st_dev == dest_path.parent.stat().st_dev:
+                        os.replace(sandbox_file_path, dest_path)
+                    else:
+                        shutil.copy2(sandbox_file_path, dest_path)
+
+        if self.cache_key and self.return_code == 0 and fu.check_complete_files(self.io_dict["out"].values()):  # type: ignore
+            self.get_step_cache().store(self.cache_key, self.io_dict["out"])
 
     def create_tmp_file(self, extension: str) -> None:
         """Create a temporary file in the unique directory. These files are
@@ -470,20 +600,39 @@ class BiobbObject:
         self.tmp_files.append(tmp_dir)
         return tmp_dir
 
+    @timed_phase("remove_tmp_files")
     def remove_tmp_files(self):
         # Make sure current directory is not in the tmp_files list
         if str(os.getcwd()) in self.tmp_files:
             self.tmp_files.remove(str(os.getcwd()))
 
         if self.remove_tmp:
-            fu.rm_file_list(self.tmp_files, self.out_log)
+            # Pooled sandboxes are scrubbed and recycled instead of removed
+            pooled_dir = self.stage_io_dict.get("unique_dir") if self.sandbox_pool_size and not self.disable_sandbox else None
+            fu.rm_file_list([f for f in self.tmp_files if not pooled_dir or str(f) != pooled_dir], self.out_log, deferred=self.deferred_remove_tmp)
+            if pooled_dir:
+                self.get_sandbox_pool().release(pooled_dir, self.out_log)
 
     @classmethod
     def get_main(cls, launcher, description, custom_flags=None):
         """Get command line execution of this building block. Please check the command line documentation."""
         def main():
+            # Launch in a warm worker process if available (see execution.worker)
+            worker_socket = os.getenv("BIOBB_WORKER_SOCKET")
+            if worker_socket and launcher.__module__ != "__main__":
+                from biobb_common.execution import worker
+                try:
+                    return_code = worker.forward(f"{launcher.__module__}:main", sys.argv[1:], worker_socket)
+                except OSError as error:
+                    warnings.warn(f"Warning: biobb worker not reachable at {worker_socket}, launching locally: {error}")
+                else:
+                    if return_code:
+                        sys.exit(return_code)
+                    return
+            import argparse
+            from biobb_common.configuration import settings
             # Get the arguments and properties from the class docstring
-            doc_arguments_dict, _ = fu.get_doc_dicts(cls.__doc__)
+            doc_arguments_dict, _ = cls.get_doc_dicts()
             # Create the argument parser
             parser = argparse.ArgumentParser(description=description,
                                              formatter_class=lambda prog: argparse.RawTextHelpFormatter(prog, width=99999))
@@ -0,0 +1,106 @@
+# type: ignore
+import time
+import asyncio
+import logging
+from pathlib import Path
+import pytest
+from biobb_common.tools import test_fixtures as fx
+from biobb_common.command_wrapper.cmd_wrapper import CmdWrapper, requires_shell
+
+
+class TestCmdWrapper():
+    def setup_class(self):
+        fx.test_setup(self, 'cmd_wrapper')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+
+    def test_launch(self):
+        assert fx.exe_success(CmdWrapper(['echo', 'hello'], disable_logs=True).launch())
+        assert not fx.exe_success(CmdWrapper(['exit', '3'], disable_logs=True).launch())
+
+    def test_launch_stream(self, caplog):
+        out_log = logging.getLogger('test_cmd_wrapper_stream')
+        cmd = ['for i in $(seq 1 500); do echo line_$i; echo err_$i 1>&2; done']
+        with caplog.at_level(logging.INFO, logger=out_log.name):
+            cmd_wrapper = CmdWrapper(cmd, out_log=out_log, stream=True, tail_lines=10)
+            assert fx.exe_success(cmd_wrapper.launch())
+        assert list(cmd_wrapper.stdout_tail) == [f'line_{i}' for i in range(491, 501)]
+        assert list(cmd_wrapper.stderr_tail)[-1] == 'err_500'
+        assert 'line_1' in caplog.messages
+
+    def test_launch_stream_timeout(self):
+        cmd_wrapper = CmdWrapper(['sleep', '10'], timeout=1, stream=True, disable_logs=True)
+        assert cmd_wrapper.launch() == 1
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_launch_timeout_kills_children(self, stream):
+        pid_file = Path(self.properties['path']).joinpath(f'child_{stream}.pid')
+        cmd_wrapper = CmdWrapper([f'sleep 30 & echo $! > {pid_file}; wait'], timeout=1, stream=stream, disable_logs=True)
+        start = time.perf_counter()
+        assert cmd_wrapper.launch() == 1
+        # The pipes are not kept open by the children of the killed shell
+        assert time.perf_counter() - start < 4
+        time.sleep(0.2)
+        # Killed, maybe a zombie if nobody reaps the orphans
+        status_path = Path('/proc', pid_file.read_text().strip(), 'status')
+        assert not status_path.exists() or 'zombie' in status_path.read_text()
+
+    def test_requires_shell(self):
+        assert not requires_shell(['gmx', 'grompp', '-f', 'minim.mdp', '-maxwarn=1'])
+        assert requires_shell(['echo', '0', '|', 'gmx', 'trjconv'])
+        assert requires_shell(['gmx', 'energy', '>', 'out.txt'])
+        assert requires_shell(['ls', '*.pdb'])
+        assert requires_shell(['OMP_NUM_THREADS=4', 'gmx', 'mdrun'])
+        assert requires_shell(['gmx mdrun -v'])
+        # Shell builtins and reserved words are not found in the PATH
+        assert requires_shell(['cd', 'sandbox'])
+        assert requires_shell(['ulimit', '-s', 'unlimited'])
+        assert requires_shell(['source', 'env.sh'])
+
+    def test_launch_builtin(self):
+        cmd = ['export', 'GMX_MAXBACKUP=-1']
+        assert fx.exe_success(CmdWrapper(cmd, use_shell=requires_shell(cmd), disable_logs=True).launch())
+
+    def test_launch_no_shell(self):
+        cmd_wrapper = CmdWrapper(['printf', '%s', 'a b'], stream=True, use_shell=False, disable_logs=True)
+        assert fx.exe_success(cmd_wrapper.launch())
+        assert list(cmd_wrapper.stdout_tail) == ['a b']
+        assert CmdWrapper(['this_binary_does_not_exist'], use_shell=False, disable_logs=True).launch() == 127
+
+    def test_alaunch(self):
+        assert fx.exe_success(asyncio.run(CmdWrapper(['echo', 'hello'], disable_logs=True).alaunch()))
+        assert asyncio.run(CmdWrapper(['exit', '3'], disable_logs=True).alaunch()) == 3
+        assert asyncio.run(CmdWrapper(['this_binary_does_not_exist'], use_shell=False, disable_logs=True).alaunch()) == 127
+
+    def test_alaunch_stream_concurrent(self):
+        async def run_all():
+            cmd_wrappers = [CmdWrapper([f'sleep 0.5; seq 1 {n}'], stream=True, tail_lines=2, disable_logs=True) for n in range(3, 23)]
+            return_codes = await asyncio.gather(*(cmd_wrapper.alaunch() for cmd_wrapper in cmd_wrappers))
+            return cmd_wrappers, return_codes
+
+        start = time.perf_counter()
+        cmd_wrappers, return_codes = asyncio.run(run_all())
+        assert time.perf_counter() - start < 5
+        assert return_codes == [0] * 20
+        assert list(cmd_wrappers[-1].stdout_tail) == ['21', '22']
+
+    def test_alaunch_timeout(self):
+        cmd_wrapper = CmdWrapper(['sleep', '10'], timeout=1, use_shell=False, disable_logs=True)
+        assert asyncio.run(cmd_wrapper.alaunch()) == 1
+
+    def test_alaunch_cancel(self):
+        cmd_wrapper = CmdWrapper(['sleep 30 & echo $!; wait'], stream=True, disable_logs=True)
+
+        async def cancel():
+            task = asyncio.ensure_future(cmd_wrapper.alaunch())
+            while not cmd_wrapper.stdout_tail:
+                await asyncio.sleep(0.05)
+            task.cancel()
+            await task
+
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(cancel())
+        # The background child of the shell is killed too (it may remain as a zombie)
+        stat_path = Path(f'/proc/{cmd_wrapper.stdout_tail[0]}/stat')
+        assert not stat_path.exists() or stat_path.read_text().rsplit(')', 1)[1].split()[0] == 'Z'
@@ -1,4 +1,6 @@
 # type: ignore
+import pickle
+from pathlib import Path
 from biobb_common.tools import test_fixtures as fx
 from biobb_common.configuration.settings import ConfReader
 
@@ -22,3 +24,54 @@ class TestConfReader():
         for file_name in ['config_complete', 'config_empty', 'config_nostep', 'config_nostep_globals']:
             conf = ConfReader(self.paths[file_name])
             assert fx.compare_object_pickle(conf.get_paths_dic(), self.paths[f'ref_{file_name}_paths_pkl'], ignore_keys=['working_dir_path', 'sandbox_path', 'global_properties_list'], ignore_substring='/Users/pau/projects/biobb_common/')
+
+    def test_confreader_cache(self):
+        conf = ConfReader(self.paths['config_complete'])
+        prop_dic = conf.get_prop_dic()
+        # Modifying the returned properties never modifies the cached configuration
+        for step_properties in prop_dic.values():
+            step_properties.clear()
+        conf.properties.clear()
+        assert fx.compare_object_pickle(ConfReader(self.paths['config_complete']).get_prop_dic(), self.paths['ref_config_complete_pkl'], ignore_keys=['path', 'working_dir_path', 'sandbox_path', 'global_properties_list'])
+
+    def test_confreader_cache_modified_file(self):
+        config_path = Path(self.properties['path']).joinpath('config_modified.yml')
+        config_path.write_text('step1:\n  properties:\n    value: 1\n')
+        assert ConfReader(str(config_path)).get_prop_dic()['step1']['value'] == 1
+        config_path.write_text('step1:\n  properties:\n    value: 22\n')
+        assert ConfReader(str(config_path)).get_prop_dic()['step1']['value'] == 22
+
+    def test_confreader_nested_copies(self):
+        conf = ConfReader('{"global_properties": {"env_vars_dict": {"A": "1"}}, "step1": {}, "step2": {}}')
+        prop_dic = conf.get_prop_dic()
+        prop_dic['step1']['env_vars_dict']['A'] = '2'
+        assert prop_dic['step2']['env_vars_dict']['A'] == '1'
+        assert conf.global_properties['env_vars_dict']['A'] == '1'
+
+    def test_confreader_serializable(self):
+        import json
+        import yaml
+        conf = ConfReader(self.paths['config_complete'])
+        prop_dic = conf.get_prop_dic()
+        paths_dic = conf.get_paths_dic()
+        assert type(prop_dic) is dict and type(paths_dic) is dict and list(prop_dic) == list(paths_dic)
+        assert json.loads(json.dumps(paths_dic)) == paths_dic
+        assert yaml.safe_load(yaml.safe_dump(paths_dic)) == paths_dic
+        assert json.loads(json.dumps(prop_dic)) == prop_dic
+        assert yaml.safe_load(yaml.safe_dump(prop_dic)) == prop_dic
+        assert list(pickle.loads(pickle.dumps(prop_dic))) == list(prop_dic)
+
+    def test_confreader_step_access(self):
+        conf = ConfReader('{"step1": {"paths": {"output": "out.txt"}}, "step2": {"paths": {"output": "out.txt"}}, "step3": {}}')
+        built = []
+        get_step_properties, get_step_paths = conf._get_step_properties, conf._get_step_paths
+        conf._get_step_properties = lambda key='', **kwargs: built.append(('properties', key)) or get_step_properties(key=key, **kwargs)
+        conf._get_step_paths = lambda key='', **kwargs: built.append(('paths', key)) or get_step_paths(key=key, **kwargs)
+        properties = conf.get_step_properties('step2')
+        properties['step'] = 'modified'
+        assert conf.get_step_properties('step2')['step'] == 'step2'
+        assert conf.get_step_paths('step2')['output'].endswith('step2/out.txt')
+        assert conf.get_step_paths('step2') == conf.get_paths_dic()['step2']
+        # Only the requested step is built, and only once
+        assert built[:2] == [('properties', 'step2'), ('paths', 'step2')]
+        assert built.count(('properties', 'step2')) == 1 and built.count(('paths', 'step2')) == 1
@@ -0,0 +1,38 @@
+# type: ignore
+import os
+from pathlib import Path
+import pytest
+from biobb_common.tools import test_fixtures as fx
+from biobb_common.execution.batch import BatchRunner, run_batch
+from biobb_common.generic.folder_test import FolderTest, folder_test
+
+
+class TestBatch():
+    def setup_class(self):
+        fx.test_setup(self, 'batch')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_batch_runner(self, executor):
+        runner = BatchRunner(max_workers=4, executor=executor)
+        for i in range(6):
+            output_folder = str(Path(self.properties['path']).joinpath(f'{executor}_{i}'))
+            runner.add(FolderTest, {'input_folder': self.paths['input_folder'], 'output_folder': output_folder},
+                       self.properties, name=f'{executor}_{i}')
+        results = runner.run()
+        assert [result.name for result in results] == [f'{executor}_{i}' for i in range(6)]
+        assert all(result.success for result in results)
+        for i in range(6):
+            assert len(os.listdir(Path(self.properties['path']).joinpath(f'{executor}_{i}'))) == 4
+
+    def test_batch_fail_fast(self):
+        jobs = [(folder_test, {'output_folder': str(Path(self.properties['path']).joinpath('ok'))}, self.properties),
+                (folder_test, {}, self.properties)]
+        results = run_batch(jobs, max_workers=1, executor="thread")
+        assert results[0].success
+        assert isinstance(results[1].exception, TypeError)
+        results = run_batch(list(reversed(jobs)) + jobs, max_workers=1, executor="thread", fail_fast=True)
+        assert not results[0].success
+        assert results[-1].skipped
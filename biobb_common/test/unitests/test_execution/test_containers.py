@@ -0,0 +1,83 @@
+# type: ignore
+import os
+import shlex
+from pathlib import Path
+from biobb_common.tools import test_fixtures as fx
+from biobb_common.tools import file_utils as fu
+from biobb_common.execution import containers
+from biobb_common.generic.folder_test import FolderTest
+
+
+class TestContainers():
+    def setup_class(self):
+        fx.test_setup(self, 'containers')
+        # Fake container engines recording their arguments
+        self.calls_path = Path(self.properties['path']).joinpath('calls.txt')
+        for engine in containers.ENGINES:
+            engine_path = Path(self.properties['path']).joinpath('bin', engine)
+            engine_path.parent.mkdir(exist_ok=True)
+            engine_path.write_text(f'#!/bin/sh\necho "$*" >> {shlex.quote(str(self.calls_path))}\n')
+            engine_path.chmod(0o755)
+
+    def teardown_class(self):
+        containers.stop_persistent_containers()
+        fx.test_teardown(self)
+
+    def engine(self, name):
+        return str(Path(self.properties['path']).joinpath('bin', name))
+
+    def calls(self):
+        calls = self.calls_path.read_text().splitlines() if self.calls_path.exists() else []
+        self.calls_path.unlink(missing_ok=True)
+        return calls
+
+    def test_docker_persistent_container(self):
+        container = containers.get_persistent_container(self.engine('docker'), 'biobb/image:1.0', '/host/sandboxes')
+        assert containers.get_persistent_container(self.engine('docker'), 'biobb/image:1.0', '/host/sandboxes') is container
+        # Stale containers with the same name are removed before starting
+        assert self.calls() == [f'rm -f {container.name}', f'run -d -i --name {container.name} -v /host/sandboxes:/data --entrypoint /bin/sh biobb/image:1.0']
+        exec_cmd = container.exec_cmd(['gmx', 'grompp'], env_vars={'OMP_NUM_THREADS': '2'}, working_dir='/data/sandbox_1', user_id='1000')
+        assert exec_cmd == [self.engine('docker'), 'exec', '-e', "OMP_NUM_THREADS='2'", '-w', '/data/sandbox_1', '--user', '1000',
+                            container.name, '/bin/bash -c', '"gmx grompp"']
+        assert containers.stop_persistent_containers() == [container.name]
+        assert self.calls() == [f'rm -f {container.name}']
+        assert containers.stop_persistent_containers() == []
+
+    def test_singularity_persistent_container(self):
+        container = containers.get_persistent_container(self.engine('singularity'), 'image.sif', '/host/sandboxes', '/mnt')
+        assert self.calls() == [f'instance stop {container.name}', f'instance start --bind /host/sandboxes:/mnt image.sif {container.name}']
+        exec_cmd = container.exec_cmd(['gmx', 'grompp'], working_dir='/mnt/sandbox_1')
+        assert exec_cmd[exec_cmd.index('--pwd'):] == ['--pwd', '/mnt/sandbox_1', f'instance://{container.name}', '/bin/bash -c', '"gmx grompp"']
+        containers.stop_persistent_containers()
+        assert self.calls() == [f'instance stop {container.name}']
+
+    def test_stop_run_containers(self):
+        other = containers.get_persistent_container(self.engine('docker'), 'biobb/image:other', '/host/other')
+        resources = fu.RunResources()
+        container = resources.context().run(containers.get_persistent_container, self.engine('docker'), 'biobb/image:1.0', '/host/sandboxes')
+        assert resources.containers == [container.name]
+        # Only the containers used by the run are stopped
+        assert containers.stop_persistent_containers(resources.containers) == [container.name]
+        assert containers.stop_persistent_containers() == [other.name]
+        self.calls()
+
+    def test_biobb_object_persistent_container(self):
+        sandbox_path = Path(self.properties['path']).joinpath('sandboxes')
+        properties = {**self.properties, 'container_path': self.engine('docker'), 'container_image': 'biobb/image:1.0',
+                      'container_persistent': True, 'sandbox_path': str(sandbox_path)}
+        steps = [FolderTest(output_folder=str(Path(self.properties['path']).joinpath(f'output_{i}')), properties=properties) for i in range(2)]
+        for step in steps:
+            step.stage_files()
+            step.cmd = ['ls', step.stage_io_dict['out']['output_folder']]
+            step.create_cmd_line()
+            sandbox_name = Path(step.stage_io_dict['unique_dir']).name
+            assert Path(step.stage_io_dict['unique_dir']).parent.name == containers.SANDBOXES_DIR_NAME
+            assert step.stage_io_dict['out']['output_folder'] == f'/data/{sandbox_name}/output_{steps.index(step)}'
+            assert step.cmd[:4] == [self.engine('docker'), 'exec', '-w', f'/data/{sandbox_name}']
+            step.remove_tmp_files()
+        # A single container for both steps mounting only the dedicated directory of the sandboxes
+        sandboxes_dir = sandbox_path.resolve().joinpath(containers.SANDBOXES_DIR_NAME)
+        assert [call.split(' -v ')[1].split()[0] for call in self.calls() if ' -v ' in call] == [f'{sandboxes_dir}:/data']
+        assert len(containers.stop_persistent_containers()) == 1
+        self.calls()
+        assert not os.listdir(sandbox_path)
@@ -0,0 +1,65 @@
+# type: ignore
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import tempfile
+import subprocess
+import pytest
+from pathlib import Path
+import biobb_common
+from biobb_common.tools import test_fixtures as fx
+from biobb_common.execution.worker import WorkerServer, forward
+
+ENTRY = 'biobb_common.generic.folder_test:main'
+
+
+class TestWorker():
+    def setup_class(self):
+        fx.test_setup(self, 'worker')
+        # Unix socket paths are limited to ~100 characters
+        self.socket_dir = tempfile.mkdtemp(prefix='biobb_worker_')
+        self.socket_path = str(Path(self.socket_dir).joinpath('worker.sock'))
+        self.env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [str(Path(biobb_common.__file__).parent.parent), os.getenv('PYTHONPATH')]))}
+        self.server = subprocess.Popen([sys.executable, '-m', 'biobb_common.execution.worker', 'serve',
+                                        '--socket', self.socket_path, '--modules', 'biobb_common.generic.folder_test'], env=self.env)
+        for _ in range(100):
+            if Path(self.socket_path).exists():
+                break
+            time.sleep(0.1)
+
+    def teardown_class(self):
+        self.server.send_signal(signal.SIGTERM)
+        self.server.wait(timeout=10)
+        shutil.rmtree(self.socket_dir, ignore_errors=True)
+        fx.test_teardown(self)
+
+    def test_forward(self):
+        output_folder = str(Path(self.properties['path']).joinpath('forward'))
+        properties = {'n': self.properties['n'], 'can_write_console_log': False, 'path': self.properties['path'], 'step': 'forward'}
+        assert forward(ENTRY, ['-o', output_folder, '-c', json.dumps({'properties': properties})], self.socket_path) == 0
+        assert sorted(os.listdir(output_folder)) == ['file_1.txt', 'file_2.txt']
+
+    def test_forward_exit_code(self):
+        # Missing required argument, argparse exits with 2
+        assert forward(ENTRY, [], self.socket_path) == 2
+
+    def test_get_main_forward(self):
+        output_folder = str(Path(self.properties['path']).joinpath('get_main'))
+        process = subprocess.run([sys.executable, '-c', 'from biobb_common.generic.folder_test import main; main()', '-o', output_folder],
+                                 env={**self.env, 'BIOBB_WORKER_SOCKET': self.socket_path}, cwd=self.properties['path'], capture_output=True, text=True)
+        assert process.returncode == 0, process.stderr
+        assert len(os.listdir(output_folder)) == 4
+
+    def test_socket_permissions(self):
+        assert self.server.poll() is None
+        assert oct(os.stat(self.socket_path).st_mode & 0o777) == '0o600'
+
+    def test_bind_refuses_non_socket(self):
+        file_path = Path(self.socket_dir).joinpath('not_a_socket')
+        file_path.write_text('data')
+        with pytest.raises(OSError):
+            WorkerServer(file_path).bind()
+        assert file_path.read_text() == 'data'
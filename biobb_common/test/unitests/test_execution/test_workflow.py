@@ -0,0 +1,44 @@
+# type: ignore
+import os
+from pathlib import Path
+import pytest
+from biobb_common.tools import test_fixtures as fx
+from biobb_common.tools import file_utils as fu
+from biobb_common.configuration.settings import ConfReader
+from biobb_common.execution.workflow import Workflow
+from biobb_common.generic.folder_test import FolderTest
+
+
+class TestWorkflow():
+    def setup_class(self):
+        fx.test_setup(self, 'workflow')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+
+    def test_step_dependencies(self):
+        dependencies = ConfReader(self.paths['config']).get_step_dependencies()
+        assert dependencies == {'step1_folder_test': [], 'step2_folder_test': ['step1_folder_test'], 'step3_folder_test': []}
+
+    def test_workflow(self):
+        workflow = Workflow(self.paths['config'], {'folder_test': FolderTest}, max_workers=2)
+        assert workflow.order == ['step1_folder_test', 'step3_folder_test', 'step2_folder_test']
+        results = workflow.run()
+        assert all(result.success for result in results.values())
+        step2_output = Path(workflow.paths['step2_folder_test']['output_folder'])
+        assert sorted(os.listdir(step2_output)) == ['file_1.txt', 'file_2.txt', 'file_3.txt']
+
+        # Restarted steps are not launched again
+        results = Workflow(workflow.conf, {'folder_test': FolderTest}).run()
+        assert results['step3_folder_test'].elapsed == 0
+
+    def test_workflow_missing_block(self):
+        with pytest.raises(ValueError):
+            Workflow(self.paths['config'], {'step1_folder_test': FolderTest})
+
+    def test_workflow_shared_doc_dicts(self, monkeypatch):
+        workflow = Workflow(self.paths['config'], {'folder_test': FolderTest})
+        # The docstring parsed by the block class is reused, never parsed again
+        FolderTest.get_doc_dicts()
+        monkeypatch.setattr(fu, 'get_doc_dicts', lambda doc: pytest.fail('Docstring parsed again'))
+        assert workflow._get_output_paths('step1_folder_test') == [workflow.paths['step1_folder_test']['output_folder']]
@@ -1,6 +1,10 @@
 # type: ignore
+import os
+import json
+import pytest
+from pathlib import Path
 from biobb_common.tools import test_fixtures as fx
-from biobb_common.generic.folder_test import folder_test
+from biobb_common.generic.folder_test import FolderTest, folder_test
 
 
 class TestFolderTest():
@@ -13,3 +17,56 @@ class TestFolderTest():
     def test_folder_test(self):
         folder_test(properties=self.properties, **self.paths)
         assert fx.not_empty(self.paths['output_folder'])
+
+    def test_doc_dicts_cache(self):
+        doc_arguments_dict, doc_properties_dict = FolderTest.get_doc_dicts()
+        assert FolderTest.get_doc_dicts()[0] is doc_arguments_dict
+        assert doc_arguments_dict['input_folder']['optional']
+        assert doc_properties_dict['n']['default_value'] == '4'
+        with pytest.raises(TypeError):
+            doc_arguments_dict['output_folder']['formats']['zip'] = 'format_3987'
+
+    def test_folder_test_metrics(self):
+        metrics_path = str(Path(self.properties['path']).joinpath('metrics.jsonl'))
+        properties = {**self.properties, 'metrics_path': metrics_path}
+        folder_test(properties=properties, **self.paths)
+        folder_test(properties=properties, **self.paths)
+        with open(metrics_path) as metrics_file:
+            records = [json.loads(line) for line in metrics_file]
+        assert len(records) == 2
+        assert records[0]['module'] == 'biobb_common.generic.folder_test'
+        assert records[0]['return_code'] == 0
+        assert {'stage_files', 'copy_to_host'} <= set(records[0]['phases'])
+        assert records[0]['wall_time'] >= sum(records[0]['phases'].values())
+
+    def test_folder_test_sandbox_pool(self):
+        sandbox_path = Path(self.properties['path']).joinpath('sandbox_pool')
+        properties = {**self.properties, 'sandbox_path': str(sandbox_path), 'sandbox_pool_size': 1, 'remove_tmp': True}
+        for i in range(3):
+            folder_test(properties=properties, output_folder=str(Path(self.properties['path']).joinpath(f'pool_{i}')))
+            assert len(os.listdir(Path(self.properties['path']).joinpath(f'pool_{i}'))) == self.properties['n']
+        assert os.listdir(sandbox_path) == ['.biobb_sandbox_pool']
+        assert len(os.listdir(sandbox_path.joinpath('.biobb_sandbox_pool'))) == 1
+
+    def test_arun_biobb_does_not_block(self):
+        import time
+        import asyncio
+        step = FolderTest(output_folder=str(Path(self.properties['path']).joinpath('arun')), properties=self.properties)
+        step.stage_files()
+        step.cmd = ['true']
+        create_cmd_line = step.create_cmd_line
+        # Slow set up, i.e. a Singularity pull
+        step.create_cmd_line = lambda: time.sleep(0.5) or create_cmd_line()
+
+        async def run():
+            ticks = 0
+            task = asyncio.ensure_future(step.arun_biobb())
+            while not task.done():
+                await asyncio.sleep(0.05)
+                ticks += 1
+            await task
+            return ticks
+
+        assert asyncio.run(run()) >= 5
+        assert step.return_code == 0
+        step.remove_tmp_files()
@@ -0,0 +1,40 @@
+# type: ignore
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+import biobb_common
+
+# Maximum time in seconds to import biobb_object in a fresh interpreter, on top of the bare interpreter start up.
+# Tolerant by default to avoid failures on loaded machines, it can be tightened with BIOBB_IMPORT_TIME_BUDGET
+IMPORT_TIME_BUDGET = float(os.getenv('BIOBB_IMPORT_TIME_BUDGET', 1.0))
+# Modules only needed by some functions, they must not be imported at start up
+DEFERRED_MODULES = ['yaml', 'numpy', 'Bio', 'jsonschema', 'asyncio', 'argparse', 'difflib', 'pydoc',
+                    'biobb_common.configuration.settings', 'biobb_common.tools.test_fixtures']
+
+BENCHMARK = f"""
+import sys, json, time
+start = time.perf_counter()
+import biobb_common.generic.biobb_object
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {DEFERRED_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def run_benchmark():
+    # Import the same biobb_common under test even if it is not installed
+    python_path = os.pathsep.join(filter(None, [str(Path(biobb_common.__file__).parent.parent), os.getenv('PYTHONPATH')]))
+    process = subprocess.run([sys.executable, '-c', BENCHMARK], capture_output=True, text=True, check=True,
+                             env={**os.environ, 'PYTHONPATH': python_path})
+    return json.loads(process.stdout)
+
+
+class TestStartup():
+    def test_deferred_imports(self):
+        assert run_benchmark()['loaded'] == []
+
+    def test_import_time(self):
+        # Best of three to reduce the noise of the first (cold cache) run, the interpreter start up is not measured
+        elapsed = min(run_benchmark()['elapsed'] for _ in range(3))
+        assert elapsed < IMPORT_TIME_BUDGET, f"import biobb_common.generic.biobb_object took {elapsed:.3f} s, budget {IMPORT_TIME_BUDGET} s"
@@ -0,0 +1,244 @@
+# type: ignore
+import os
+import zipfile
+from pathlib import Path
+import pytest
+from biobb_common.tools import test_fixtures as fx
+from biobb_common.tools import file_utils as fu
+
+
+class TestFileUtils():
+    def setup_class(self):
+        fx.test_setup(self, 'file_utils')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+
+    @pytest.mark.parametrize("stage_mode", fu.STAGE_MODES)
+    def test_stage_path_file(self, stage_mode):
+        dest_dir = fu.create_unique_dir(prefix="stage_")
+        method = fu.stage_path(self.paths['input_file'], dest_dir, stage_mode=stage_mode)
+        staged_file = Path(dest_dir).joinpath(Path(self.paths['input_file']).name)
+        assert method in fu.STAGE_MODES
+        assert fx.compare_hash(str(staged_file), self.paths['input_file'])
+
+    def test_stage_path_dir(self):
+        dest_dir = fu.create_unique_dir(prefix="stage_")
+        fu.stage_path(self.paths['input_folder'], dest_dir, stage_mode="hardlink", is_dir=True)
+        staged_dir = Path(dest_dir).joinpath(Path(self.paths['input_folder']).name)
+        assert sorted(os.listdir(staged_dir)) == sorted(os.listdir(self.paths['input_folder']))
+
+    def test_stage_path_auto_is_independent(self):
+        src = Path(self.properties['path']).joinpath('auto_src.txt')
+        src.write_text('original')
+        dest_dir = fu.create_unique_dir(prefix="stage_")
+        assert fu.stage_path(src, dest_dir, stage_mode="auto") in ("reflink", "copy")
+        # Writing the staged input does not modify the original
+        Path(dest_dir).joinpath(src.name).write_text('truncated')
+        assert src.read_text() == 'original'
+
+    def test_stage_path_unknown_mode(self):
+        with pytest.raises(ValueError):
+            fu.stage_path(self.paths['input_file'], fu.create_unique_dir(), stage_mode="teleport")
+
+    @pytest.mark.parametrize("compression,max_workers", [("stored", 1), ("deflate", 1), ("deflate", 4), ("lzma", 1), ("lzma", 4)])
+    def test_zip_list(self, compression, max_workers):
+        file_list = []
+        for i in range(8):
+            file_path = Path(self.properties['path']).joinpath(f'{compression}_{max_workers}', f'member_{i}.txt')
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(1000 * f'line {i}\n')
+            file_list.append(str(file_path))
+        zip_file = str(Path(self.properties['path']).joinpath(f'{compression}_{max_workers}.zip'))
+        fu.zip_list(zip_file, file_list, compression=compression, compresslevel=None, max_workers=max_workers)
+        with zipfile.ZipFile(zip_file) as zip_f:
+            assert zip_f.testzip() is None
+            assert zip_f.namelist() == [Path(f).name for f in file_list]
+        with fu.open_zip_member(zip_file, 'member_3.txt') as member_f:
+            assert member_f.read() == Path(file_list[3]).read_bytes()
+        dest_dir = fu.create_unique_dir(prefix="unzip_")
+        assert fu.unzip_list(zip_file, dest_dir, members=['member_5.txt']) == [str(Path(dest_dir).joinpath('member_5.txt'))]
+        assert os.listdir(dest_dir) == ['member_5.txt']
+
+    def test_topology_include_graph(self):
+        top_dir = Path(self.properties['path']).joinpath('topology')
+        gmxlib_dir = Path(self.properties['path']).joinpath('gmxlib', 'amber.ff')
+        gmxlib_dir.mkdir(parents=True)
+        top_dir.mkdir()
+        gmxlib_dir.joinpath('forcefield.itp').write_text('[ defaults ]\n')
+        top_dir.joinpath('topol.top').write_text('#include "amber.ff/forcefield.itp"\n#include "chain_A.itp"\n#include "chain_B.itp"\n#include "missing.itp"\n')
+        top_dir.joinpath('chain_A.itp').write_text('#include "posre.itp"\n')
+        top_dir.joinpath('chain_B.itp').write_text('#include "posre.itp"\n#include "chain_A.itp"\n')
+        top_dir.joinpath('posre.itp').write_text('#include "chain_B.itp"\n')
+        top_file = str(top_dir.joinpath('topol.top'))
+
+        files = fu.search_topology_files(top_file)
+        assert [Path(f).name for f in files] == ['chain_B.itp', 'posre.itp', 'chain_A.itp', 'topol.top']
+
+        graph = fu.get_topology_include_graph(top_file, include_paths=[gmxlib_dir.parent])
+        assert [Path(f).name for f in graph[top_file]] == ['forcefield.itp', 'chain_A.itp', 'chain_B.itp']
+        assert len(graph) == 5
+
+    @pytest.mark.parametrize("compare,max_workers,move", [("mtime", 1, False), ("checksum", 4, False), ("mtime", 4, True)])
+    def test_sync_tree(self, compare, max_workers, move):
+        source = Path(self.properties['path']).joinpath(f'sync_src_{compare}_{max_workers}_{move}')
+        destination = Path(self.properties['path']).joinpath(f'sync_dest_{compare}_{max_workers}_{move}')
+        for i in range(20):
+            file_path = source.joinpath(f'dir_{i % 3}', f'frame_{i}.txt')
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(f'frame {i}')
+        assert len(fu.sync_tree(source, destination, max_workers=max_workers, compare=compare, move=move)) == 20
+        assert sorted(p.name for p in destination.rglob('*.txt')) == sorted(f'frame_{i}.txt' for i in range(20))
+        if move:
+            assert not list(source.rglob('*.txt'))
+        else:
+            assert fu.sync_tree(source, destination, compare=compare) == []
+            source.joinpath('dir_0', 'frame_0.txt').write_text('changed frame 0')
+            assert fu.sync_tree(source, destination, compare=compare) == [os.path.join('dir_0', 'frame_0.txt')]
+            assert destination.joinpath('dir_0', 'frame_0.txt').read_text() == 'changed frame 0'
+
+    def test_sync_tree_symlinks(self):
+        source = Path(self.properties['path']).joinpath('sync_src_links')
+        destination = Path(self.properties['path']).joinpath('sync_dest_links')
+        source.joinpath('dir').mkdir(parents=True)
+        source.joinpath('dir', 'frame.txt').write_text('frame')
+        # Directory link cycle
+        source.joinpath('dir', 'loop').symlink_to('..')
+        assert sorted(fu.sync_tree(source, destination)) == [os.path.join('dir', 'frame.txt'), os.path.join('dir', 'loop')]
+        assert os.readlink(destination.joinpath('dir', 'loop')) == '..'
+        assert sorted(str(p.relative_to(destination)) for p in destination.rglob('*')) == ['dir', os.path.join('dir', 'frame.txt'), os.path.join('dir', 'loop')]
+        assert fu.sync_tree(source, destination) == []
+
+    def test_copytree_new_files_only_missing_source(self):
+        destination = Path(self.properties['path']).joinpath('sync_dest_missing_source')
+        fu.copytree_new_files_only(Path(self.properties['path']).joinpath('missing_source'), destination)
+        assert destination.is_dir() and not os.listdir(destination)
+
+    @staticmethod
+    def create_tree(root, n_dirs=3, n_files=300):
+        for i in range(n_dirs):
+            sub_dir = Path(root).joinpath(f'dir_{i}', 'nested')
+            sub_dir.mkdir(parents=True)
+            for j in range(n_files):
+                sub_dir.joinpath(f'file_{j}.txt').write_text(str(j))
+
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    def test_rmtree_parallel(self, max_workers):
+        root = fu.create_unique_dir(prefix="rmtree_")
+        self.create_tree(root)
+        # Symbolic links to directories are removed, never followed
+        Path(root).joinpath('link').symlink_to(self.paths['input_folder'], target_is_directory=True)
+        fu.rmtree_parallel(root, max_workers=max_workers)
+        assert not Path(root).exists()
+        assert os.listdir(self.paths['input_folder'])
+
+    def test_rm_file_list_deferred(self):
+        parent_dir = Path(fu.create_unique_dir(prefix="deferred_"))
+        sandbox = parent_dir.joinpath('sandbox')
+        self.create_tree(sandbox)
+        tmp_file = parent_dir.joinpath('tmp.txt')
+        tmp_file.write_text('tmp')
+        removed = fu.rm_file_list([str(sandbox), str(tmp_file), str(parent_dir.joinpath('missing'))], deferred=True)
+        assert removed == [str(sandbox), str(tmp_file)]
+        # The sandbox disappears from its path instantly
+        assert not sandbox.exists() and not tmp_file.exists()
+        assert fu.flush_deferred_removals() == []
+        assert fu.get_deferred_remover().pending() == []
+        assert os.listdir(parent_dir) == []
+
+    def test_run_resources(self):
+        parent_dir = Path(fu.create_unique_dir(prefix="run_resources_"))
+        sandboxes = [parent_dir.joinpath(f'sandbox_{i}') for i in range(2)]
+        for sandbox in sandboxes:
+            self.create_tree(sandbox, n_files=10)
+        resources = fu.RunResources()
+        resources.context().run(fu.rm_file_list, [str(sandboxes[0])], deferred=True)
+        fu.rm_file_list([str(sandboxes[1])], deferred=True)
+        resources.context().run(fu.SandboxPool, parent_dir)
+        # Only the resources created in the context of the run are recorded
+        assert resources.removals == [str(sandboxes[0])]
+        assert resources.sandbox_paths == [str(parent_dir.resolve())]
+        assert fu.flush_deferred_removals(paths=resources.removals) == []
+        assert fu.flush_deferred_removals() == []
+
+    def test_create_unique_dir_umask(self):
+        old_umask = os.umask(0o022)
+        try:
+            new_dir = fu.create_unique_dir(prefix="umask_")
+            assert os.umask(0o022) == 0o022
+        finally:
+            os.umask(old_umask)
+        assert os.stat(new_dir).st_mode & 0o777 == 0o777
+
+    def test_sandbox_pool(self):
+        sandbox_path = fu.create_unique_dir(prefix="pool_")
+        pool = fu.SandboxPool(sandbox_path, max_size=2)
+        assert pool.prefill() == 2
+        sandboxes = [pool.acquire() for _ in range(3)]
+        assert len(set(sandboxes)) == 3 and pool.idle() == []
+        for sandbox in sandboxes:
+            Path(sandbox).joinpath('dir').mkdir()
+            Path(sandbox).joinpath('dir', 'file.txt').write_text('used')
+        assert [pool.release(sandbox) for sandbox in sandboxes] == [True, True, False]
+        assert len(pool.idle()) == 2
+        assert all(os.listdir(idle_dir) == [] for idle_dir in pool.idle())
+        assert os.listdir(sandbox_path) == [fu.SANDBOX_POOL_DIR_NAME]
+        assert pool.drain() == 2
+        assert os.listdir(sandbox_path) == []
+
+    def fake_singularity(self, name, fail=False):
+        # Records the pulls and writes the --name file in its working directory
+        calls_path = Path(self.properties['path']).joinpath(f'{name}_pulls.txt')
+        singularity_path = Path(self.properties['path']).joinpath(name, 'singularity')
+        singularity_path.parent.mkdir(parents=True, exist_ok=True)
+        pull = 'exit 1' if fail else 'sleep 0.2; echo image > "$3"'
+        singularity_path.write_text(f'#!/bin/sh\necho "$*" >> "{calls_path}"\n{pull}\n')
+        singularity_path.chmod(0o755)
+        return str(singularity_path), calls_path
+
+    def test_pull_singularity_image(self, monkeypatch):
+        from concurrent.futures import ThreadPoolExecutor
+        singularity_path, calls_path = self.fake_singularity('pull')
+        cache_path = Path(self.properties['path']).joinpath('image_cache')
+        image = 'docker://quay.io/biocontainers/gromacs:2022.2'
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            image_paths = set(pool.map(lambda _: fu.pull_singularity_image(singularity_path, image, cache_path), range(4)))
+        # A single pull shared by all the concurrent steps
+        assert len(image_paths) == 1 and len(calls_path.read_text().splitlines()) == 1
+        image_path = Path(image_paths.pop())
+        assert image_path.parent == cache_path and image_path.name.startswith('gromacs_') and image_path.read_text() == 'image\n'
+        assert sorted(os.listdir(cache_path)) == sorted([image_path.name, image_path.name + '.lock'])
+        # Different tags use different files, local images are not pulled
+        assert fu.get_singularity_image_path('docker://quay.io/biocontainers/gromacs:2023', cache_path) != str(image_path)
+        assert fu.pull_singularity_image(singularity_path, str(image_path)) == str(image_path)
+        monkeypatch.setenv(fu.SINGULARITY_CACHE_ENV_VAR, str(cache_path))
+        cmd = fu.create_cmd_line(['gmx', 'grompp'], container_path=singularity_path, host_volume='/host', container_volume='/data',
+                                 container_shell_path='/bin/bash', container_image=image)
+        assert str(image_path) in cmd and len(calls_path.read_text().splitlines()) == 1
+
+    def test_pull_singularity_image_max_age(self):
+        singularity_path, calls_path = self.fake_singularity('max_age')
+        cache_path = Path(self.properties['path']).joinpath('max_age_cache')
+        image = 'docker://biobb/image:latest'
+        image_path = fu.pull_singularity_image(singularity_path, image, cache_path, max_age=3600)
+        assert fu.pull_singularity_image(singularity_path, image, cache_path, max_age=3600) == image_path
+        assert len(calls_path.read_text().splitlines()) == 1
+        # Expired images are pulled again
+        assert fu.pull_singularity_image(singularity_path, image, cache_path, max_age=0) == image_path
+        assert len(calls_path.read_text().splitlines()) == 2
+        # Images referenced by digest never expire
+        digest_image = 'docker://biobb/image@sha256:' + 64 * '0'
+        fu.pull_singularity_image(singularity_path, digest_image, cache_path, max_age=0)
+        fu.pull_singularity_image(singularity_path, digest_image, cache_path, max_age=0)
+        assert len(calls_path.read_text().splitlines()) == 3
+        # Failed refreshes keep using the expired image
+        failed_singularity_path, _ = self.fake_singularity('max_age_failed', fail=True)
+        assert fu.pull_singularity_image(failed_singularity_path, image, cache_path, max_age=0) == image_path
+
+    def test_pull_singularity_image_failed(self):
+        singularity_path, calls_path = self.fake_singularity('failed_pull', fail=True)
+        cache_path = Path(self.properties['path']).joinpath('failed_cache')
+        with pytest.raises(FileNotFoundError):
+            fu.pull_singularity_image(singularity_path, 'docker://missing/image:1.0', cache_path)
+        # No partial image is left in the cache
+        assert [path.suffix for path in cache_path.iterdir()] == ['.lock']
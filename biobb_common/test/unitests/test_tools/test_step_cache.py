@@ -0,0 +1,61 @@
+# type: ignore
+import os
+import shutil
+from pathlib import Path
+from biobb_common.tools import test_fixtures as fx
+from biobb_common.tools.step_cache import StepCache
+from biobb_common.generic.folder_test import FolderTest
+
+
+class TestStepCache():
+    def setup_class(self):
+        fx.test_setup(self, 'step_cache')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+
+    def test_step_cache(self):
+        block = FolderTest(properties=self.properties, **self.paths)
+        assert fx.exe_success(block.launch())
+        assert block.cache_key
+        cache = StepCache(self.properties['cache_dir'])
+        assert [entry.name for _, _, entry in cache.entries()] == [block.cache_key]
+
+        # Same inputs and properties: outputs restored from the cache
+        shutil.rmtree(self.paths['output_folder'])
+        cached_block = FolderTest(properties=self.properties, **self.paths)
+        assert fx.exe_success(cached_block.launch())
+        assert cached_block.cache_key == block.cache_key
+        assert sorted(os.listdir(self.paths['output_folder'])) == ['file_1.txt', 'file_2.txt', 'prev']
+
+        # Different properties: new cache entry
+        new_block = FolderTest(properties={**self.properties, 'n': 3}, **self.paths)
+        assert fx.exe_success(new_block.launch())
+        assert new_block.cache_key != block.cache_key
+        assert len(cache.entries()) == 2
+
+    def test_step_cache_eviction(self):
+        cache = StepCache(Path(self.properties['path']).joinpath('small_cache'), max_size=30)
+        for i in range(3):
+            output_file = Path(self.properties['path']).joinpath(f'output_{i}.txt')
+            output_file.write_text(20 * str(i))
+            assert cache.store(f'key_{i}', {'output_file': str(output_file)})
+        assert [entry.name for _, _, entry in cache.entries()] == ['key_2']
+        assert not cache.fetch('key_0', {'output_file': 'restored.txt'})
+        assert cache.fetch('key_2', {'output_file': 'restored.txt'})
+        assert Path('restored.txt').read_text() == 20 * '2'
+
+    def test_step_cache_isolated_entries(self):
+        cache = StepCache(Path(self.properties['path']).joinpath('isolated_cache'))
+        output_file = Path(self.properties['path']).joinpath('isolated.txt')
+        output_file.write_text('original')
+        assert cache.store('key', {'output_file': str(output_file)})
+        # Editing the outputs in place does not modify the cache entry
+        with open(output_file, 'a') as output:
+            output.write(' edited')
+        restored = Path(self.properties['path']).joinpath('isolated_restored.txt')
+        assert cache.fetch('key', {'output_file': str(restored)})
+        with open(restored, 'a') as output:
+            output.write(' edited')
+        assert cache.fetch('key', {'output_file': str(output_file)})
+        assert output_file.read_text() == 'original'
@@ -0,0 +1,211 @@
+# type: ignore
+from pathlib import Path
+from biobb_common.tools import test_fixtures as fx
+
+
+class TestTestFixtures():
+    def setup_class(self):
+        fx.test_setup(self, 'test_fixtures')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+
+    def write_file(self, name, content):
+        file_path = Path(self.properties['path']).joinpath(name)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(content)
+        return str(file_path)
+
+    def test_compare_hash(self):
+        content = bytes(range(256)) * 20000
+        file_a = self.write_file('hash_a.bin', content)
+        file_b = self.write_file('hash_b.bin', content)
+        # Same size, different last byte (beyond the first chunk)
+        file_c = self.write_file('hash_c.bin', content[:-1] + b'\0')
+        file_d = self.write_file('hash_d.bin', content[:-1])
+        assert fx.compare_hash(file_a, file_b)
+        assert not fx.compare_hash(file_a, file_c)
+        assert not fx.compare_hash(file_a, file_d)
+        assert fx.equal(file_a, file_b, cache_reference=True)
+        assert not fx.equal(file_c, file_b, cache_reference=True)
+
+    def test_equal_txt(self):
+        file_a = self.write_file('txt_a.txt', b'line 1\nline 2\n')
+        file_b = self.write_file('txt_b.txt', b'line 1\nline 2\n')
+        file_c = self.write_file('txt_c.txt', b'line 1\nline 3\n')
+        assert fx.equal_txt(file_a, file_b)
+        assert fx.equal_txt(file_a, file_b, cache_reference=True)
+        assert not fx.equal_txt(file_c, file_b)
+
+    def test_compare_hash_cache_reference_modified(self):
+        file_a = self.write_file('cache_a.txt', b'version 1')
+        file_b = self.write_file('cache_b.txt', b'version 1')
+        assert fx.compare_hash(file_a, file_b, cache_reference=True)
+        self.write_file('cache_b.txt', b'version 22')
+        self.write_file('cache_a.txt', b'version 22')
+        assert fx.compare_hash(file_a, file_b, cache_reference=True)
+
+    def write_xvg(self, name, rows, legends=('Potential', 'Pressure')):
+        header = ['# GROMACS energy', '@    title "Energy"', '@    xaxis  label "Time (ps)"']
+        header += [f'@ s{i} legend "{legend}"' for i, legend in enumerate(legends)]
+        lines = [' '.join(f'{value:g}' for value in row) for row in rows]
+        return self.write_file(name, ('\n'.join(header + lines) + '\n').encode())
+
+    def test_read_xvg(self):
+        rows = [(t, 100.0 + t, 1.0 - t) for t in range(10)]
+        file_path = self.write_xvg('read.xvg', rows)
+        header = fx.read_xvg_header(file_path)
+        assert header['title'] == 'Energy' and header['xaxis'] == 'Time (ps)'
+        assert header['legends'] == ['Potential', 'Pressure']
+        chunks = list(fx.iter_xvg_chunks(file_path, chunk_size=64))
+        assert len(chunks) > 1 and sum(len(chunk) for chunk in chunks) == 10
+        assert chunks[-1][-1].tolist() == [9.0, 109.0, -8.0]
+
+    def test_compare_xvg(self):
+        rows = [(t, 100.0 + t, 1.0 - t) for t in range(1000)]
+        reference = self.write_xvg('reference.xvg', rows)
+        assert fx.compare_xvg(self.write_xvg('equal.xvg', rows), reference)
+        # Columns in a different order are matched by legend
+        swapped = self.write_xvg('swapped.xvg', [(t, p, e) for t, e, p in rows], legends=('Pressure', 'Potential'))
+        assert fx.compare_xvg_report(swapped, reference, chunk_size=1024)['equal']
+        # Rows 500 onwards of the Potential column are 2% off
+        shifted = self.write_xvg('shifted.xvg', [(t, e * 1.02 if t >= 500 else e, p) for t, e, p in rows])
+        report = fx.compare_xvg_report(shifted, reference, chunk_size=1024)
+        assert not report['equal'] and report['rows'] == 1000
+        potential = report['columns'][1]
+        assert potential['legend'] == 'Potential' and potential['first_failing_row'] == 500
+        assert abs(potential['max_rel_error'] - 0.02) < 1e-6
+        assert report['columns'][2]['first_failing_row'] is None
+        assert fx.compare_xvg(shifted, reference, percent_tolerance=3)
+        # Missing rows
+        report = fx.compare_xvg_report(self.write_xvg('short.xvg', rows[:-1]), reference)
+        assert not report['equal'] and 'rows' in report['error']
+
+    def test_compare_xvg_malformed(self):
+        rows = [(t, 100.0 + t, 1.0 - t) for t in range(10)]
+        reference = self.write_xvg('malformed_reference.xvg', rows)
+        malformed = self.write_file('malformed.xvg', b'0 100 1\n1 nan? 0\n' + b'2 102 -1\n' * 8)
+        irregular = self.write_file('irregular.xvg', b'0 100 1\n1 101\n' + b'2 102 -1\n' * 8)
+        for file_path in (malformed, irregular):
+            report = fx.compare_xvg_report(file_path, reference)
+            assert not report['equal'] and report['error']
+            assert not fx.compare_xvg(file_path, reference)
+
+    def write_pdb(self, name, atoms, rotation=None):
+        import numpy as np
+        lines = []
+        for serial, (record, atom_name, resname, chain, resnum, coords) in enumerate(atoms, 1):
+            x, y, z = np.dot(rotation, coords) + 10 if rotation is not None else coords
+            lines.append(f"{record:<6s}{serial:5d} {atom_name:<4s} {resname} {chain}{resnum:4d}    {x:8.3f}{y:8.3f}{z:8.3f}  1.00  0.00")
+        return self.write_file(name, ('\n'.join(lines + ['END']) + '\n').encode())
+
+    def pdb_atoms(self):
+        import numpy as np
+        coords = np.random.default_rng(0).random((40, 3)) * 20
+        atoms = []
+        for i, atom_coords in enumerate(coords[:30]):
+            atoms.append(('ATOM', ['N', 'CA', 'C', 'O', 'H'][i % 5], 'ALA', 'A', i // 5 + 1, atom_coords))
+        atoms += [('HETATM', 'O', 'HOH', 'A', 100 + i, atom_coords) for i, atom_coords in enumerate(coords[30:35])]
+        atoms += [('HETATM', f'C{i}', 'LIG', 'B', 200, atom_coords) for i, atom_coords in enumerate(coords[35:])]
+        return atoms
+
+    def test_read_pdb_atoms(self):
+        atoms = fx.read_pdb_atoms(self.write_pdb('read.pdb', self.pdb_atoms()))
+        assert len(atoms['name']) == 40 and atoms['coords'].shape == (40, 3)
+        assert atoms['hetatm'].sum() == 10 and atoms['water'].sum() == 5 and atoms['hydrogen'].sum() == 6
+        assert atoms['resnum'][0] == b'1' and atoms['chain'][-1] == b'B'
+
+    def test_compare_pdb(self):
+        import numpy as np
+        atoms = self.pdb_atoms()
+        reference = self.write_pdb('reference.pdb', atoms)
+        rotation = np.array([[0.0, -1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+        # Rigid motion and different atom order
+        moved = self.write_pdb('moved.pdb', atoms[::-1], rotation)
+        assert fx.compare_pdb(moved, reference, rmsd_cutoff=0.01)
+        assert fx.equal(moved, reference, rmsd_cutoff=0.01)
+        # Renumbered residues are matched by position
+        renumbered = self.write_pdb('renumbered.pdb', [atom[:4] + (atom[4] + 1,) + atom[5:] for atom in atoms])
+        assert fx.compare_pdb(renumbered, reference, rmsd_cutoff=0.01)
+        # Ligand atoms are ignored unless remove_hetatm is False
+        ligand_moved = self.write_pdb('ligand.pdb', atoms[:35] + [atom[:5] + (atom[5] + 5,) for atom in atoms[35:]])
+        assert fx.compare_pdb(ligand_moved, reference, rmsd_cutoff=0.01)
+        assert not fx.compare_pdb(ligand_moved, reference, rmsd_cutoff=0.01, remove_hetatm=False)
+
+    def write_zip(self, name, members):
+        import zipfile
+        file_path = Path(self.properties['path']).joinpath(name)
+        with zipfile.ZipFile(file_path, 'w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+            for arcname, member_path in members.items():
+                zip_file.write(member_path, arcname)
+        return str(file_path)
+
+    def test_compare_zip(self):
+        import numpy as np
+        atoms = self.pdb_atoms()
+        text = self.write_file('member.txt', b'same contents\n')
+        reference_pdb = self.write_pdb('zip_reference.pdb', atoms)
+        rotation = np.array([[0.0, 0.0, 1.0], [0.0, 1.0, 0.0], [-1.0, 0.0, 0.0]])
+        moved_pdb = self.write_pdb('zip_moved.pdb', atoms, rotation)
+        reference = self.write_zip('reference.zip', {'a.txt': text, 'structure.pdb': reference_pdb})
+        assert fx.compare_zip(self.write_zip('same.zip', {'structure.pdb': reference_pdb, 'a.txt': text}), reference)
+        # Different CRC32, compared by RMSD
+        assert fx.equal(self.write_zip('moved.zip', {'a.txt': text, 'structure.pdb': moved_pdb}), reference, rmsd_cutoff=0.01)
+        assert not fx.compare_zip(self.write_zip('missing.zip', {'a.txt': text}), reference)
+        other = self.write_file('other.txt', b'other contents\n')
+        assert not fx.compare_zip(self.write_zip('other.zip', {'a.txt': other, 'structure.pdb': reference_pdb}), reference)
+
+    def test_equal_batch(self):
+        file_a = self.write_file('batch_a.txt', b'batch\n')
+        file_b = self.write_file('batch_b.txt', b'batch\n')
+        file_c = self.write_file('batch_c.txt', b'other\n')
+        comparisons = [(file_a, file_b), (file_a, file_c, {}), (file_a, file_c, {'ignore_list': [0]}), (file_a, 'missing.txt')]
+        for max_workers in (1, 2):
+            results = fx.equal_batch(comparisons, max_workers=max_workers)
+            assert [result['equal'] for result in results] == [True, False, True, False]
+            assert results[0]['file_b'] == file_b and results[0]['elapsed'] >= 0
+            assert 'File_B: ' + file_b in results[0]['output']
+            assert results[3]['error'].startswith('FileNotFoundError')
+
+    def test_not_empty_zip(self):
+        text = self.write_file('not_empty.txt', b'contents\n')
+        zip_path = self.write_zip('not_empty.zip', {'a.txt': text})
+        empty_zip = self.write_zip('empty.zip', {})
+        assert fx.not_empty(zip_path)
+        assert not fx.not_empty(empty_zip)
+        assert not Path(zip_path[:-4] + '_unzipped').exists()
+
+    def test_compare_zip_streaming(self):
+        rows = [(t, 100.0 + t) for t in range(100)]
+        reference_xvg = self.write_xvg('zip_reference.xvg', rows, legends=('Potential',))
+        close_xvg = self.write_xvg('zip_close.xvg', [(t, value * 1.001) for t, value in rows], legends=('Potential',))
+        reference_top = self.write_file('zip_reference.top', b'; Created 2024\n[ atoms ]\n1 C\n')
+        other_top = self.write_file('zip_other.top', b'; Created 2025\n[ atoms ]\n; comment\n1 C\n')
+        reference = self.write_zip('stream_reference.zip', {'energy.xvg': reference_xvg, 'topology.top': reference_top})
+        close = self.write_zip('stream_close.zip', {'energy.xvg': close_xvg, 'topology.top': other_top})
+        entries = set(Path(self.properties['path']).iterdir())
+        assert fx.compare_zip(close, reference)
+        # Nested zip files
+        assert fx.compare_zip(self.write_zip('outer_close.zip', {'inner.zip': close}), self.write_zip('outer_reference.zip', {'inner.zip': reference}))
+        assert not fx.compare_zip(close, reference, percent_tolerance=0.01)
+        # No temporary files or directories are created
+        assert set(Path(self.properties['path']).iterdir()) - entries == {Path(self.properties['path']).joinpath(name) for name in ('outer_close.zip', 'outer_reference.zip')}
+
+    def test_compare_pdb_missing_atoms(self):
+        atoms = self.pdb_atoms()
+        reference = self.write_pdb('complete.pdb', atoms)
+        truncated = self.write_pdb('truncated.pdb', atoms[:20])
+        assert not fx.compare_pdb(truncated, reference)
+        assert not fx.compare_pdb(reference, truncated)
+
+    def test_read_pdb_atoms_alternate_locations(self):
+        atoms = self.pdb_atoms()[:10]
+        file_path = self.write_pdb('altloc.pdb', atoms + atoms[:5])
+        # Repeated residue numbers (i.e. wrapped numbering) are not dropped
+        assert len(fx.read_pdb_atoms(file_path)['name']) == 15
+        lines = Path(file_path).read_text().splitlines()
+        lines[1] = lines[1][:16] + 'A' + lines[1][17:]
+        lines.insert(2, lines[1][:16] + 'B' + lines[1][17:])
+        Path(file_path).write_text('\n'.join(lines) + '\n')
+        assert len(fx.read_pdb_atoms(file_path)['name']) == 15
+        assert fx.compare_pdb(file_path, file_path)
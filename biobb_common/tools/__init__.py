@@ -1,7 +1,15 @@
-from . import file_utils
-from . import test_fixtures
+import importlib
 
 __all__ = [
     "file_utils",
+    "step_cache",
+    "step_metrics",
     "test_fixtures",
 ]
+
+
+def __getattr__(name):
+    # Submodules are imported on first access to keep the start up of the blocks fast
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,7 @@
 """Tools to work with files
 """
-import difflib
 import functools
+import contextvars
 import logging
 import os
 import errno
@@ -77,11 +77,11 @@ def create_unique_dir(
         new_dir = str(Path(path).joinpath(new_dir))
     for i in range(number_attempts):
         try:
-            oldumask = os.umask(0)
-            Path(new_dir).mkdir(mode=0o777, parents=True, exist_ok=False)
+            Path(new_dir).mkdir(parents=True, exist_ok=False)
+            # chmod instead of clearing the umask, which is process-wide and not thread safe
+            os.chmod(new_dir, 0o777)
             if out_log:
                 out_log.info("Directory successfully created: %s" % new_dir)
-            os.umask(oldumask)
             return new_dir
         except OSError:
             if out_log:
@@ -124,27 +124,104 @@ def get_working_dir_path(working_dir_path: Optional[Union[str, Path]] = None, re
     return str(working_dir_path)
 
 
+ZIP_COMPRESSIONS = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+# Zstandard is only available in Python >= 3.14
+if hasattr(zipfile, "ZIP_ZSTANDARD"):
+    ZIP_COMPRESSIONS["zstd"] = zipfile.ZIP_ZSTANDARD  # type: ignore
+
+# Members bigger than this are not read ahead but streamed from disk when they are written
+ZIP_READ_AHEAD_MAX_SIZE = 16 * 1024 * 1024
+
+
+def get_zip_compression(compression: str = "stored", out_log: Optional[logging.Logger] = None) -> int:
+    """Return the zipfile compression constant of **compression**.
+
+    Args:
+        compression (str): ("stored") Compression method. Values: stored, deflate, bzip2, lzma, zstd (Python >= 3.14, deflate otherwise).
+        out_log (:obj:`logging.Logger`): Input log object.
+
+    Returns:
+        int: zipfile compression constant.
+    """
+    if compression == "zstd" and compression not in ZIP_COMPRESSIONS:
+        log("Zstandard zip compression is not available, using deflate", out_log)
+        compression = "deflate"
+    if compression not in ZIP_COMPRESSIONS:
+        raise ValueError(f"Unknown zip compression: {compression}. Valid compressions: {list(ZIP_COMPRESSIONS)}")
+    return ZIP_COMPRESSIONS[compression]
+
+
+def _read_member(file_path: Union[str, Path]) -> Optional[bytes]:
+    """Return the contents of **file_path**, None if it is too big to be read ahead."""
+    if os.path.getsize(file_path) > ZIP_READ_AHEAD_MAX_SIZE:
+        return None
+    with open(file_path, "rb") as file_handler:
+        return file_handler.read()
+
+
+def _write_member(zip_f: zipfile.ZipFile, file_path: Union[str, Path], arcname: str, data: Optional[bytes]) -> None:
+    """Add **file_path** to **zip_f** from its already read **data** if available."""
+    if data is None:
+        zip_f.write(file_path, arcname=arcname)
+        return
+    zinfo = zipfile.ZipInfo.from_file(file_path, arcname=arcname)
+    zip_f.writestr(zinfo, data, compress_type=zip_f.compression, compresslevel=zip_f.compresslevel)
+
+
 def zip_list(
-    zip_file: Union[str, Path], file_list: typing.Sequence[Union[str, Path]], out_log: Optional[logging.Logger] = None
+    zip_file: Union[str, Path], file_list: typing.Sequence[Union[str, Path]], out_log: Optional[logging.Logger] = None,
+    compression: str = "stored", compresslevel: Optional[int] = None, max_workers: int = 1
 ):
     """Compress all files listed in **file_list** into **zip_file** zip file.
 
+    With **max_workers** > 1 the next members are read in parallel threads
+    while the current one is compressed (zlib, bz2 and lzma release the GIL)
+    and written to the zip file in order.
+
     Args:
         zip_file (str): Output compressed zip file.
         file_list (:obj:`list` of :obj:`str`): Input list of files to be compressed.
         out_log (:obj:`logging.Logger`): Input log object.
+        compression (str): ("stored") Compression method. Values: stored, deflate, bzip2, lzma, zstd (Python >= 3.14, deflate otherwise).
+        compresslevel (int): (None) Compression level, None for the default level of the method.
+        max_workers (int): (1) Number of threads reading members ahead of the compression.
     """
     file_list = list(file_list)
     file_list.sort()
+    compress_type = get_zip_compression(compression, out_log)
     Path(zip_file).parent.mkdir(parents=True, exist_ok=True)
-    with zipfile.ZipFile(zip_file, "w") as zip_f:
-        inserted = []
-        for index, f in enumerate(file_list):
-            base_name = Path(f).name
-            if base_name in inserted:
-                base_name = "file_" + str(index) + "_" + base_name
-            inserted.append(base_name)
-            zip_f.write(f, arcname=base_name)
+
+    arcnames = []
+    for index, f in enumerate(file_list):
+        base_name = Path(f).name
+        if base_name in arcnames:
+            base_name = "file_" + str(index) + "_" + base_name
+        arcnames.append(base_name)
+
+    with zipfile.ZipFile(zip_file, "w", compression=compress_type, compresslevel=compresslevel) as zip_f:
+        if max_workers > 1 and len(file_list) > 1:
+            from collections import deque
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                # Bounded window of pending members to limit the memory used
+                pending: deque = deque()
+                for f, arcname in zip(file_list, arcnames):
+                    pending.append((f, arcname, pool.submit(_read_member, f)))
+                    if len(pending) >= 2 * max_workers:
+                        f_done, arcname_done, future = pending.popleft()
+                        _write_member(zip_f, f_done, arcname_done, future.result())
+                while pending:
+                    f_done, arcname_done, future = pending.popleft()
+                    _write_member(zip_f, f_done, arcname_done, future.result())
+        else:
+            for f, arcname in zip(file_list, arcnames):
+                zip_f.write(f, arcname=arcname)
     if out_log:
         out_log.info("Adding:")
         # out_log.info(list(map(lambda x: str(Path(x).resolve().relative_to(Path.cwd())), file_list)))
@@ -153,22 +230,25 @@ def zip_list(
 
 
 def unzip_list(
-    zip_file: Union[str, Path], dest_dir: Optional[Union[str, Path]] = None, out_log: Optional[logging.Logger] = None
+    zip_file: Union[str, Path], dest_dir: Optional[Union[str, Path]] = None, out_log: Optional[logging.Logger] = None,
+    members: Optional[typing.Iterable[str]] = None
 ) -> list[str]:
-    """Extract all files in the zipball file and return a list containing the
-        absolute path of the extracted files.
+    """Extract all files (or just **members**) in the zipball file and return a
+        list containing the absolute path of the extracted files.
 
     Args:
         zip_file (str): Input compressed zip file.
         dest_dir (str): Path to directory where the files will be extracted.
         out_log (:obj:`logging.Logger`): Input log object.
+        members (:obj:`list` of :obj:`str`): (None) Names of the members to be extracted. None to extract all of them.
 
     Returns:
         :obj:`list` of :obj:`str`: list of paths of the extracted files.
     """
     with zipfile.ZipFile(zip_file, "r") as zip_f:
-        zip_f.extractall(path=dest_dir)
-        file_list = [str(Path(str(dest_dir)).joinpath(f)) for f in zip_f.namelist()]
+        member_list = zip_f.namelist() if members is None else list(members)
+        zip_f.extractall(path=dest_dir, members=member_list)
+        file_list = [str(Path(str(dest_dir)).joinpath(f)) for f in member_list]
 
     if out_log:
         out_log.info("Extracting: " + str(Path(zip_file).resolve()))
@@ -178,33 +258,122 @@ def unzip_list(
     return file_list
 
 
+@contextmanager
+def open_zip_member(zip_file: Union[str, Path], member: str):
+    """Context manager to read the **member** of **zip_file** as a binary stream
+    without extracting it to disk.
+
+    Args:
+        zip_file (str): Input compressed zip file.
+        member (str): Name of the member inside the zip file.
+
+    Yields:
+        Binary file-like object with the uncompressed member contents.
+    """
+    with zipfile.ZipFile(zip_file, "r") as zip_f:
+        with zip_f.open(member, "r") as member_f:
+            yield member_f
+
+
+TOPOLOGY_INCLUDE_PATTERN = re.compile(r"#include\s+\"(.+)\"")
+
+
+@functools.lru_cache(maxsize=1024)
+def _read_topology_includes(top_file: str, mtime_ns: int, size: int) -> tuple[str, ...]:
+    """Return the quoted #include directives of **top_file**. Cached by (path, mtime, size)."""
+    with open(top_file) as tf:
+        return tuple(include_file.group(1) for line in tf if (include_file := TOPOLOGY_INCLUDE_PATTERN.match(line.strip())))
+
+
+def get_topology_includes(top_file: Union[str, Path]) -> tuple[str, ...]:
+    """Return the names of the files included by the GROMACS topology **top_file**.
+
+    Parsed includes are cached for the whole process and only read again
+    if the modification time or the size of the file changes.
+
+    Args:
+        top_file (str): Topology GROMACS top or itp file.
+
+    Returns:
+        :obj:`tuple` of :obj:`str`: Include names as written in the #include directives.
+    """
+    stat = os.stat(top_file)
+    return _read_topology_includes(os.path.realpath(top_file), stat.st_mtime_ns, stat.st_size)
+
+
+def get_gmxlib_paths() -> list[str]:
+    """Return the list of directories in the GMXLIB environment variable."""
+    return [path for path in os.environ.get("GMXLIB", "").split(os.pathsep) if path]
+
+
+def get_topology_include_graph(
+    top_file: Union[str, Path], include_paths: Optional[typing.Sequence[Union[str, Path]]] = None,
+    out_log: Optional[logging.Logger] = None
+) -> dict[str, list[str]]:
+    """Return the include graph of the GROMACS topology **top_file**.
+
+    Includes are searched relative to the directory of the including file and
+    then in **include_paths** (i.e. :func:`get_gmxlib_paths`). Files included
+    several times are only visited once and include cycles are ignored.
+
+    Args:
+        top_file (str): Topology GROMACS top file.
+        include_paths (:obj:`list` of :obj:`str`): (None) Additional directories to search the included files.
+        out_log (:obj:`logging.Logger`): Input log object.
+
+    Returns:
+        dict: Mapping of every found topology file to the list of files it includes.
+        Keys are sorted so that included files appear before the files including them.
+    """
+    include_paths = list(include_paths or [])
+    graph: dict[str, list[str]] = {}
+    top_file = str(top_file)
+    if not Path(top_file).exists():
+        if out_log:
+            out_log.info("Ignored file %s" % top_file)
+        return graph
+
+    children: dict[str, list[str]] = {top_file: []}
+    visited = {os.path.realpath(top_file)}
+    stack = [(top_file, iter(get_topology_includes(top_file)))]
+    while stack:
+        current_file, includes = stack[-1]
+        for include in includes:
+            found_file = str(Path(current_file).parent.joinpath(include))
+            if not Path(found_file).exists():
+                found_file = next((str(Path(include_path).joinpath(include)) for include_path in include_paths if Path(include_path).joinpath(include).exists()), found_file)
+            if not Path(found_file).exists():
+                if out_log:
+                    out_log.info("Ignored file %s" % found_file)
+                continue
+            children[current_file].append(found_file)
+            if (real_path := os.path.realpath(found_file)) in visited:
+                continue
+            visited.add(real_path)
+            children[found_file] = []
+            stack.append((found_file, iter(get_topology_includes(found_file))))
+            break
+        else:
+            stack.pop()
+            graph[current_file] = children[current_file]
+    return graph
+
+
 def search_topology_files(
-    top_file: Union[str, Path], out_log: Optional[logging.Logger] = None
+    top_file: Union[str, Path], out_log: Optional[logging.Logger] = None,
+    include_paths: Optional[typing.Sequence[Union[str, Path]]] = None
 ) -> list[str]:
     """Search the top and itp files to create a list of the topology files
 
     Args:
         top_file (str): Topology GROMACS top file.
         out_log (:obj:`logging.Logger`): Input log object.
+        include_paths (:obj:`list` of :obj:`str`): (None) Additional directories to search the included files.
 
     Returns:
         :obj:`list` of :obj:`str`: list of paths of the extracted files.
     """
-    top_dir_name = str(Path(top_file).parent)
-    file_list = []
-    pattern = re.compile(r"#include\s+\"(.+)\"")
-    if Path(top_file).exists():
-        with open(top_file) as tf:
-            for line in tf:
-                include_file = pattern.match(line.strip())
-                if include_file:
-                    found_file = str(Path(top_dir_name).joinpath(include_file.group(1)))
-                    file_list += search_topology_files(found_file, out_log)
-    else:
-        if out_log:
-            out_log.info("Ignored file %s" % top_file)
-        return file_list
-    return file_list + [str(top_file)]
+    return list(get_topology_include_graph(top_file, include_paths, out_log))
 
 
 def zip_top(
@@ -212,6 +381,7 @@ def zip_top(
     top_file: Union[str, Path],
     out_log: Optional[logging.Logger] = None,
     remove_original_files: bool = True,
+    include_paths: Optional[typing.Sequence[Union[str, Path]]] = None,
 ) -> list[str]:
     """Compress all *.itp and *.top files in the cwd into **zip_file** zip file.
 
@@ -219,11 +389,13 @@ def zip_top(
         zip_file (str): Output compressed zip file.
         top_file (str): Topology TOP GROMACS file.
         out_log (:obj:`logging.Logger`): Input log object.
+        remove_original_files (bool): (True) Remove the compressed files in the directory of **top_file**.
+        include_paths (:obj:`list` of :obj:`str`): (None) Additional directories to search the included files.
 
     Returns:
         :obj:`list` of :obj:`str`: list of compressed paths.
     """
-    file_list = search_topology_files(top_file, out_log)
+    file_list = search_topology_files(top_file, out_log, include_paths)
     zip_list(zip_file, file_list, out_log)
     # Only remove files on the same directory of the top file
     rm_list = [f for f in file_list if Path(f).parent == Path(top_file).parent]
@@ -365,38 +537,68 @@ def get_logs(
 
 
 def launchlogger(func):
-    """Decorator to create the out_log and err_log"""
+    """Decorator to create the out_log and err_log. If the **metrics_path**
+    property of the block is set, the step metrics are also collected and
+    written to it."""
     @functools.wraps(func)
     def wrapper_log(*args, **kwargs):
         create_dir(create_name(path=args[0].path))
-        if args[0].disable_logs:
-            return func(*args, **kwargs)
-
-        # Create local out_log and err_log
-        args[0].out_log, args[0].err_log = get_logs(
-            path=args[0].path,
-            prefix=args[0].prefix,
-            step=args[0].step,
-            can_write_console=args[0].can_write_console_log,
-            can_write_file=args[0].can_write_file_log,
-            out_log_path=args[0].out_log_path,
-            err_log_path=args[0].err_log_path
-        )
+        if getattr(args[0], "metrics_path", None):
+            return _launch_with_metrics(func, *args, **kwargs)
+        return _launch_with_logs(func, *args, **kwargs)
 
-        # Run the function and capture its return value
-        value = func(*args, **kwargs)
+    return wrapper_log
 
-        # Close and remove handlers from out_log and err_log
-        for log in [args[0].out_log, args[0].err_log]:
-            # Create a copy [:] of the handler list to be able to modify it while we are iterating
-            handlers = log.handlers[:]
-            for handler in handlers:
-                handler.close()
-                log.removeHandler(handler)
 
-        return value
+def _launch_with_metrics(func, *args, **kwargs):
+    from biobb_common.tools import step_metrics
 
-    return wrapper_log
+    metrics = step_metrics.StepMetrics(
+        module=type(args[0]).__module__,
+        step=args[0].step,
+        prefix=args[0].prefix,
+        version=getattr(args[0], "version", None),
+    )
+    args[0].step_metrics = metrics
+    metrics.start()
+    try:
+        value = _launch_with_logs(func, *args, **kwargs)
+    except BaseException as error:
+        step_metrics.write_metrics(metrics.stop(error=error), args[0].metrics_path)
+        raise
+    finally:
+        args[0].step_metrics = None
+    step_metrics.write_metrics(metrics.stop(return_code=value), args[0].metrics_path)
+    return value
+
+
+def _launch_with_logs(func, *args, **kwargs):
+    if args[0].disable_logs:
+        return func(*args, **kwargs)
+
+    # Create local out_log and err_log
+    args[0].out_log, args[0].err_log = get_logs(
+        path=args[0].path,
+        prefix=args[0].prefix,
+        step=args[0].step,
+        can_write_console=args[0].can_write_console_log,
+        can_write_file=args[0].can_write_file_log,
+        out_log_path=args[0].out_log_path,
+        err_log_path=args[0].err_log_path
+    )
+
+    # Run the function and capture its return value
+    value = func(*args, **kwargs)
+
+    # Close and remove handlers from out_log and err_log
+    for log in [args[0].out_log, args[0].err_log]:
+        # Create a copy [:] of the handler list to be able to modify it while we are iterating
+        handlers = log.handlers[:]
+        for handler in handlers:
+            handler.close()
+            log.removeHandler(handler)
+
+    return value
 
 
 def log(string: str, local_log: Optional[logging.Logger] = None, global_log: Optional[logging.Logger] = None):
@@ -446,6 +648,8 @@ def check_properties(obj: object, properties: dict, reserved_properties: Optiona
         [prop for prop in properties.keys() if prop not in obj.__dict__.keys()]
     )
     error_properties -= set(["system", "working_dir_path"] + list(reserved_properties))
+    if error_properties:
+        import difflib
     for error_property in error_properties:
         close_property_list = difflib.get_close_matches(
             error_property, obj.__dict__.keys(), n=1, cutoff=0.01
@@ -513,14 +717,420 @@ def rm(file_name: Union[str, Path]) -> Optional[Union[str, Path]]:
 
 
 def rm_file_list(
-    file_list: typing.Sequence[Union[str, Path]], out_log: Optional[logging.Logger] = None
+    file_list: typing.Sequence[Union[str, Path]], out_log: Optional[logging.Logger] = None, deferred: bool = False
 ) -> list[str]:
+    """Remove the files and directories in **file_list**.
+
+    Args:
+        file_list (list): Paths to be removed.
+        out_log (:obj:`logging.Logger`): Input log object.
+        deferred (bool): (False) Move the directories to a trash directory and remove them in background (see :class:`DeferredRemover`).
+
+    Returns:
+        :obj:`list` of :obj:`str`: Removed (or queued to be removed) paths.
+    """
+    if deferred:
+        remover = get_deferred_remover()
+        removed_files = [str(f) for f in file_list if (remover.submit(f) if Path(f).is_dir() else rm(f))]
+        if len(removed_files) > 0 and out_log:
+            log("Removed (deferred): %s" % str(removed_files), out_log)
+        return removed_files
     removed_files = [str(f) for f in file_list if rm(f)]
     if len(removed_files) > 0 and out_log:
         log("Removed: %s" % str(removed_files), out_log)
     return removed_files
 
 
+TRASH_DIR_NAME = ".biobb_trash"
+UNLINK_BATCH_SIZE = 256
+
+
+def _unlink_batch(file_paths: list[str]) -> None:
+    for file_path in file_paths:
+        try:
+            os.unlink(file_path)
+        except FileNotFoundError:
+            pass
+
+
+def rmtree_parallel(dir_path: Union[str, Path], max_workers: int = 4, keep_root: bool = False) -> None:
+    """Remove the **dir_path** directory tree unlinking its files from a pool of threads.
+
+    The tree is walked with :func:`os.scandir` and files are unlinked in
+    batches, so on parallel filesystems (Lustre, GPFS) many metadata
+    operations are in flight at the same time. Directories are removed
+    at the end, deepest first.
+
+    Args:
+        dir_path (str): Path to the directory.
+        max_workers (int): (4) Number of threads unlinking files.
+        keep_root (bool): (False) Remove only the contents of **dir_path**.
+    """
+    dir_list: list[str] = []
+    pending_dirs = [str(dir_path)]
+    batches: list[list[str]] = []
+    while pending_dirs:
+        current_dir = pending_dirs.pop()
+        dir_list.append(current_dir)
+        file_paths = []
+        with os.scandir(current_dir) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    pending_dirs.append(entry.path)
+                else:
+                    file_paths.append(entry.path)
+        batches.extend(file_paths[i:i + UNLINK_BATCH_SIZE] for i in range(0, len(file_paths), UNLINK_BATCH_SIZE))
+
+    if max_workers > 1 and len(batches) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for _ in pool.map(_unlink_batch, batches):
+                pass
+    else:
+        for batch in batches:
+            _unlink_batch(batch)
+
+    # Parents are always listed before their children
+    for current_dir in reversed(dir_list[1:] if keep_root else dir_list):
+        os.rmdir(current_dir)
+
+
+class DeferredRemover:
+    """Background removal of directories.
+
+    :meth:`submit` renames the directory into a **.biobb_trash** directory
+    next to it, which is instantaneous, and the tree is reclaimed by a
+    background thread with :func:`rmtree_parallel`. Call :meth:`flush` to
+    wait for the pending removals, i.e. at the end of a workflow. Pending
+    removals are also flushed when the process exits.
+
+    Args:
+        max_workers (int): (4) Number of threads unlinking the files of each tree.
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        import atexit
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="biobb_trash")
+        self._lock = threading.Lock()
+        self._pending: dict = {}
+        atexit.register(self.flush)
+        if "multiprocessing" in sys.modules:
+            # Process pool workers exit without running atexit handlers
+            from multiprocessing import util
+            util.Finalize(self, self.flush, exitpriority=0)
+
+    def submit(self, dir_path: Union[str, Path]) -> Optional[str]:
+        """Move **dir_path** to the trash and queue its removal.
+
+        Args:
+            dir_path (str): Path to the directory.
+
+        Returns:
+            str: **dir_path** if it has been queued, None if it did not exist.
+        """
+        dir_path = Path(dir_path)
+        if not dir_path.is_dir():
+            return None
+        trash_dir = dir_path.resolve().parent.joinpath(TRASH_DIR_NAME)
+        trash_path = trash_dir.joinpath(f"{dir_path.name}_{uuid.uuid4().hex}")
+        try:
+            trash_dir.mkdir(exist_ok=True)
+            os.rename(dir_path, trash_path)
+        except OSError:
+            # Not renameable, remove it synchronously
+            return str(dir_path) if rm(dir_path) else None
+        future = self._pool.submit(self._remove, trash_path)
+        with self._lock:
+            self._pending[future] = str(dir_path)
+        future.add_done_callback(self._done)
+        resources = get_run_resources()
+        if resources is not None:
+            resources.add_removal(str(dir_path))
+        return str(dir_path)
+
+    def _remove(self, trash_path: Path) -> None:
+        rmtree_parallel(trash_path, self.max_workers)
+        try:
+            # Only succeeds when no other removal is pending in the same trash
+            trash_path.parent.rmdir()
+        except OSError:
+            pass
+
+    def _done(self, future) -> None:
+        with self._lock:
+            self._pending.pop(future, None)
+
+    def pending(self) -> list[str]:
+        """Return the original paths of the directories still being removed."""
+        with self._lock:
+            return list(self._pending.values())
+
+    def flush(self, timeout: Optional[float] = None, paths: Optional[typing.Iterable[str]] = None) -> list[str]:
+        """Wait for the pending removals.
+
+        Args:
+            timeout (float): (None) Maximum time to wait in seconds. None to wait until all the removals finish.
+            paths (list): (None) Original paths of the directories to wait for. None to wait for all of them.
+
+        Returns:
+            :obj:`list` of :obj:`str`: Original paths of the directories that could not be removed or are still pending.
+        """
+        from concurrent.futures import wait
+
+        with self._lock:
+            pending = dict(self._pending)
+        if paths is not None:
+            paths = set(paths)
+            pending = {future: path for future, path in pending.items() if path in paths}
+        done, not_done = wait(list(pending), timeout=timeout)
+        failed = [pending[future] for future in done if future.exception() is not None]
+        return failed + [pending[future] for future in not_done]
+
+
+_deferred_remover: Optional[DeferredRemover] = None
+
+
+def get_deferred_remover() -> DeferredRemover:
+    """Return the :class:`DeferredRemover` shared by the whole process."""
+    global _deferred_remover
+    if _deferred_remover is None:
+        _deferred_remover = DeferredRemover()
+    return _deferred_remover
+
+
+def flush_deferred_removals(timeout: Optional[float] = None, paths: Optional[typing.Iterable[str]] = None) -> list[str]:
+    """Wait for the background removals queued with **deferred** :func:`rm_file_list`.
+
+    Args:
+        timeout (float): (None) Maximum time to wait in seconds. None to wait until all the removals finish.
+        paths (list): (None) Paths passed to :func:`rm_file_list` to wait for. None to wait for all of them.
+
+    Returns:
+        :obj:`list` of :obj:`str`: Paths that could not be removed or are still pending.
+    """
+    if _deferred_remover is None:
+        return []
+    return _deferred_remover.flush(timeout, paths)
+
+
+SANDBOX_POOL_DIR_NAME = ".biobb_sandbox_pool"
+
+
+class SandboxPool:
+    """Pool of reusable sandbox directories inside **sandbox_path**.
+
+    Idle sandboxes are kept empty in a **.biobb_sandbox_pool** directory.
+    :meth:`acquire` claims one with an atomic rename, so pools in different
+    threads or processes can share the same **sandbox_path**, and falls back
+    to :func:`create_unique_dir` when there are no idle sandboxes.
+    :meth:`release` scrubs the sandbox and returns it to the pool, or removes
+    it if the pool already holds **max_size** idle sandboxes. :meth:`drain`
+    removes the idle sandboxes and the pool directory, it is called by
+    :func:`drain_sandbox_pools` at the end of a workflow and when the process
+    exits.
+
+    Args:
+        sandbox_path (str): Parent path of the sandboxes.
+        max_size (int): (4) Maximum number of idle sandboxes.
+        prefix (str): ("sandbox_") Prefix of the acquired sandboxes.
+    """
+
+    def __init__(self, sandbox_path: Union[str, Path], max_size: int = 4, prefix: str = "sandbox_") -> None:
+        self.sandbox_path = Path(sandbox_path).resolve()
+        self.pool_dir = self.sandbox_path.joinpath(SANDBOX_POOL_DIR_NAME)
+        self.max_size = max_size
+        self.prefix = prefix
+        _register_sandbox_pool(self.sandbox_path)
+        resources = get_run_resources()
+        if resources is not None:
+            resources.add_sandbox_pool(str(self.sandbox_path))
+
+    def idle(self) -> list[str]:
+        """Return the paths of the idle sandboxes."""
+        try:
+            with os.scandir(self.pool_dir) as it:
+                return [entry.path for entry in it if entry.is_dir(follow_symlinks=False)]
+        except FileNotFoundError:
+            return []
+
+    def prefill(self, count: Optional[int] = None) -> int:
+        """Create idle sandboxes until the pool holds **count** (default **max_size**) of them.
+
+        Returns:
+            int: Number of sandboxes created.
+        """
+        count = self.max_size if count is None else min(count, self.max_size)
+        missing = count - len(self.idle())
+        for _ in range(missing):
+            create_unique_dir(str(self.pool_dir), "idle_")
+        return max(missing, 0)
+
+    def acquire(self, out_log: Optional[logging.Logger] = None) -> str:
+        """Return the path of an empty sandbox, reusing an idle one if available.
+
+        Args:
+            out_log (:obj:`logging.Logger`): (None) Python logger object.
+
+        Returns:
+            str: Path of the sandbox.
+        """
+        for idle_path in self.idle():
+            sandbox = self.sandbox_path.joinpath(f"{self.prefix}{uuid.uuid4()}")
+            try:
+                os.rename(idle_path, sandbox)
+            except OSError:
+                # Claimed by another thread or process
+                continue
+            log(f"Sandbox reused: {sandbox}", out_log)
+            return str(sandbox)
+        return create_unique_dir(str(self.sandbox_path), self.prefix, out_log=out_log)
+
+    def release(self, sandbox: Union[str, Path], out_log: Optional[logging.Logger] = None) -> bool:
+        """Scrub **sandbox** and return it to the pool, or remove it if the pool is full.
+
+        Args:
+            sandbox (str): Path of a sandbox returned by :meth:`acquire`.
+            out_log (:obj:`logging.Logger`): (None) Python logger object.
+
+        Returns:
+            bool: True if the sandbox has been returned to the pool.
+        """
+        sandbox = Path(sandbox)
+        if not sandbox.is_dir():
+            return False
+        if len(self.idle()) < self.max_size:
+            try:
+                rmtree_parallel(sandbox, keep_root=True)
+                os.chmod(sandbox, 0o777)
+                self.pool_dir.mkdir(exist_ok=True)
+                os.rename(sandbox, self.pool_dir.joinpath(f"idle_{uuid.uuid4().hex}"))
+                log(f"Sandbox released: {sandbox}", out_log)
+                return True
+            except OSError:
+                pass
+        rm(sandbox)
+        log(f"Removed: {sandbox}", out_log)
+        return False
+
+    def drain(self, out_log: Optional[logging.Logger] = None) -> int:
+        """Remove the idle sandboxes and the pool directory.
+
+        Args:
+            out_log (:obj:`logging.Logger`): (None) Python logger object.
+
+        Returns:
+            int: Number of sandboxes removed.
+        """
+        removed = 0
+        for idle_path in self.idle():
+            claimed = self.pool_dir.joinpath(f".drained_{uuid.uuid4().hex}")
+            try:
+                # Claim it first so it is not acquired while being removed
+                os.rename(idle_path, claimed)
+            except OSError:
+                continue
+            rm(claimed)
+            removed += 1
+        try:
+            # Only succeeds if no other pool is releasing a sandbox meanwhile
+            self.pool_dir.rmdir()
+        except OSError:
+            pass
+        if removed:
+            log(f"Sandbox pool drained: {self.pool_dir}", out_log)
+        return removed
+
+
+_sandbox_pool_paths: set[Path] = set()
+_sandbox_pool_exit_handler_registered = False
+
+
+def _register_sandbox_pool(sandbox_path: Path) -> None:
+    global _sandbox_pool_exit_handler_registered
+    _sandbox_pool_paths.add(sandbox_path)
+    if _sandbox_pool_exit_handler_registered:
+        return
+    import atexit
+    atexit.register(drain_sandbox_pools)
+    if "multiprocessing" in sys.modules:
+        # Process pool workers exit without running atexit handlers
+        from multiprocessing import util
+        util.Finalize(None, drain_sandbox_pools, exitpriority=0)
+    _sandbox_pool_exit_handler_registered = True
+
+
+def drain_sandbox_pools(out_log: Optional[logging.Logger] = None, sandbox_paths: Optional[typing.Iterable[str]] = None) -> int:
+    """Drain the :class:`SandboxPool` objects used by the current process.
+
+    Args:
+        out_log (:obj:`logging.Logger`): (None) Python logger object.
+        sandbox_paths (list): (None) Parent paths of the pools to drain. None to drain all the pools used by the process.
+
+    Returns:
+        int: Number of sandboxes removed.
+    """
+    sandbox_paths = list(_sandbox_pool_paths) if sandbox_paths is None else sandbox_paths
+    return sum(SandboxPool(sandbox_path).drain(out_log) for sandbox_path in sandbox_paths)
+
+
+class RunResources:
+    """Resources created by the steps of a run that must be released when it finishes.
+
+    Deferred removals, sandbox pools and persistent containers are recorded in
+    the object active in the current context, so a
+    :class:`Workflow <execution.workflow.Workflow>` waits for and releases only
+    what its own steps created, not the ones of other runs of the process.
+    Steps must be executed with :meth:`context` to be tracked.
+    """
+
+    def __init__(self) -> None:
+        import threading
+
+        self.removals: list[str] = []
+        self.sandbox_paths: list[str] = []
+        self.containers: list[str] = []
+        self._lock = threading.Lock()
+
+    def context(self) -> contextvars.Context:
+        """Return a copy of the current context where this object is active.
+
+        A context can only be entered by one thread at a time, call it once per step.
+        """
+        context = contextvars.copy_context()
+        context.run(_run_resources.set, self)
+        return context
+
+    def _add(self, resources: list[str], resource: str) -> None:
+        with self._lock:
+            if resource not in resources:
+                resources.append(resource)
+
+    def add_removal(self, path: str) -> None:
+        """Record a directory queued in the :class:`DeferredRemover`."""
+        self._add(self.removals, path)
+
+    def add_sandbox_pool(self, sandbox_path: str) -> None:
+        """Record the parent path of a :class:`SandboxPool`."""
+        self._add(self.sandbox_paths, sandbox_path)
+
+    def add_container(self, name: str) -> None:
+        """Record the name of a persistent container."""
+        self._add(self.containers, name)
+
+
+_run_resources: contextvars.ContextVar[Optional[RunResources]] = contextvars.ContextVar("biobb_run_resources", default=None)
+
+
+def get_run_resources() -> Optional[RunResources]:
+    """Return the :class:`RunResources` active in the current context, None outside of a tracked run."""
+    return _run_resources.get()
+
+
 def check_complete_files(output_file_list: list[Union[str, Path]]) -> bool:
     for output_file in filter(None, output_file_list):
         output_file = Path(str(output_file))
@@ -531,28 +1141,289 @@ def check_complete_files(output_file_list: list[Union[str, Path]]) -> bool:
     return True
 
 
+SYNC_COMPARES = ("mtime", "checksum")
+
+
+def file_digest(file_path: Union[str, Path], chunk_size: int = 1024 * 1024) -> str:
+    """Return the sha256 hex digest of **file_path** reading it in chunks.
+
+    Args:
+        file_path (str): Path to the file.
+        chunk_size (int): (1048576) Size in bytes of the chunks.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file_handler:
+        for chunk in iter(lambda: file_handler.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _sync_file(src_file_path: str, dest_file_path: str, move: bool = False) -> None:
+    if move:
+        os.replace(src_file_path, dest_file_path)
+    else:
+        shutil.copy2(src_file_path, dest_file_path)
+
+
+def _is_dir_link(entry: os.DirEntry) -> bool:
+    if not entry.is_symlink():
+        return False
+    try:
+        return entry.is_dir()
+    except OSError:
+        # Links pointing to themselves (ELOOP)
+        return False
+
+
+def sync_tree(
+    source: Union[str, Path],
+    destination: Union[str, Path],
+    max_workers: int = 1,
+    compare: str = "mtime",
+    move: bool = False,
+    out_log: Optional[logging.Logger] = None,
+) -> list[str]:
+    """Recursively synchronize the files of **source** into **destination**.
+
+    Each directory is read with a single :func:`os.scandir` pass on both sides
+    and a file is transferred only if it is missing in the destination or has
+    changed: different size or newer modification time (**compare** mtime) or
+    different contents (**compare** checksum). Symbolic links to directories
+    are recreated as links in the destination and never followed, links to
+    files are copied as regular files.
+
+    Args:
+        source (str): Source directory. Nothing is transferred if it does not exist.
+        destination (str): Destination directory, created if it does not exist.
+        max_workers (int): (1) Number of threads transferring files in parallel.
+        compare (str): ("mtime") Change detection. Values: mtime (size and modification time), checksum (size and sha256 of the contents).
+        move (bool): (False) Rename the files into place instead of copying them when **source** and **destination** share the filesystem. The source files are consumed.
+        out_log (:obj:`logging.Logger`): Input log object.
+
+    Returns:
+        :obj:`list` of :obj:`str`: Relative paths of the transferred files.
+    """
+    if compare not in SYNC_COMPARES:
+        raise ValueError(f"Unknown compare method: {compare}. Valid methods: {SYNC_COMPARES}")
+    source, destination = str(source), str(destination)
+    os.makedirs(destination, exist_ok=True)
+    # A missing source has nothing to synchronize
+    if not os.path.exists(source) or os.path.samefile(source, destination):
+        return []
+    move = move and os.stat(source).st_dev == os.stat(destination).st_dev
+
+    transfers: list[tuple[str, str, str]] = []
+    links: list[tuple[str, str, str]] = []
+    pending_dirs = [""]
+    while pending_dirs:
+        relative_dir = pending_dirs.pop()
+        dest_dir = os.path.join(destination, relative_dir)
+        try:
+            with os.scandir(dest_dir) as dest_it:
+                dest_entries = {entry.name: entry for entry in dest_it}
+        except FileNotFoundError:
+            os.makedirs(dest_dir)
+            dest_entries = {}
+
+        with os.scandir(os.path.join(source, relative_dir)) as src_it:
+            for entry in src_it:
+                relative_path = os.path.join(relative_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    pending_dirs.append(relative_path)
+                    continue
+                if _is_dir_link(entry):
+                    # Never followed, they may point outside source or form cycles
+                    if entry.name not in dest_entries:
+                        links.append((relative_path, entry.path, os.path.join(dest_dir, entry.name)))
+                    continue
+                dest_entry = dest_entries.get(entry.name)
+                if dest_entry is not None and dest_entry.is_file():
+                    src_stat, dest_stat = entry.stat(), dest_entry.stat()
+                    if src_stat.st_size == dest_stat.st_size:
+                        if compare == "mtime" and src_stat.st_mtime <= dest_stat.st_mtime:
+                            continue
+                        if compare == "checksum" and file_digest(entry.path) == file_digest(dest_entry.path):
+                            continue
+                transfers.append((relative_path, entry.path, os.path.join(dest_dir, entry.name)))
+
+    if max_workers > 1 and len(transfers) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(lambda transfer: _sync_file(transfer[1], transfer[2], move), transfers))
+    else:
+        for _, src_file_path, dest_file_path in transfers:
+            _sync_file(src_file_path, dest_file_path, move)
+    for _, src_link_path, dest_link_path in links:
+        if move:
+            os.replace(src_link_path, dest_link_path)
+        else:
+            os.symlink(os.readlink(src_link_path), dest_link_path)
+    transfers.extend(links)
+
+    if out_log and transfers:
+        out_log.info(f"{'Moved' if move else 'Copied'} {len(transfers)} files from {source} to {destination}")
+    return [relative_path for relative_path, _, _ in transfers]
+
+
 def copytree_new_files_only(source, destination):
     """
     Recursively copies files from source to destination only if they don't
-    already exist in the destination.
+    already exist in the destination or have changed (see :func:`sync_tree`).
     """
-    if not os.path.exists(destination):
-        os.makedirs(destination)
+    sync_tree(source, destination)
 
-    for dirpath, dirnames, filenames in os.walk(source):
-        # Create a corresponding directory in the destination
-        relative_path = os.path.relpath(dirpath, source)
-        dest_dir = os.path.join(destination, relative_path)
-        if not os.path.exists(dest_dir):
-            os.makedirs(dest_dir)
 
-        # Copy files that do not exist or have newer modification times
-        for filename in filenames:
-            src_file_path = os.path.join(dirpath, filename)
-            dest_file_path = os.path.join(dest_dir, filename)
+STAGE_MODES = ("copy", "hardlink", "reflink", "symlink", "auto")
+
+# Linux FICLONE ioctl request code (_IOW(0x94, 9, int))
+_FICLONE = 0x40049409
+
+
+def reflink(src: Union[str, Path], dst: Union[str, Path]) -> None:
+    """Create a copy-on-write clone of **src** in **dst**.
+
+    Only supported on Linux filesystems with reflink support (XFS, Btrfs...).
+
+    Args:
+        src (str): Source file path.
+        dst (str): Destination file path.
+
+    Raises:
+        OSError: If the platform or the filesystem does not support reflinks.
+    """
+    if not platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are only supported on Linux", str(src))
+    import fcntl
+
+    with open(src, "rb") as src_f, open(dst, "wb") as dst_f:
+        try:
+            fcntl.ioctl(dst_f.fileno(), _FICLONE, src_f.fileno())
+        except OSError:
+            dst_f.close()
+            Path(dst).unlink()
+            raise
+    shutil.copystat(src, dst)
+
+
+def _stage_chain(stage_mode: str) -> list[str]:
+    """Return the ordered list of staging methods to try for **stage_mode**."""
+    if stage_mode not in STAGE_MODES:
+        raise ValueError(f"Unknown stage_mode: {stage_mode}. Valid modes: {STAGE_MODES}")
+    if stage_mode == "auto":
+        return ["reflink", "copy"]
+    if stage_mode == "copy":
+        return ["copy"]
+    return [stage_mode, "copy"]
+
+
+def _stage_file(src: str, dst: str, method: str) -> None:
+    if method == "hardlink":
+        os.link(src, dst)
+    elif method == "reflink":
+        reflink(src, dst)
+    elif method == "symlink":
+        os.symlink(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+def stage_path(
+    src: Union[str, Path],
+    dest_dir: Union[str, Path],
+    stage_mode: str = "copy",
+    is_dir: bool = False,
+    out_log: Optional[logging.Logger] = None,
+) -> str:
+    """Stage the file or directory **src** inside **dest_dir** avoiding a full
+    copy when possible. Each method in the **stage_mode** chain is tried in
+    order and the first one that succeeds is used:
+
+        * **copy**: Regular copy.
+        * **hardlink**: Hard link, falls back to copy (i.e. different filesystem).
+        * **reflink**: Copy-on-write clone, falls back to copy.
+        * **symlink**: Symbolic link, falls back to copy.
+        * **auto**: reflink and finally copy.
+
+    Copies and reflinks are independent of **src**. Hard and symbolic links
+    share the original file, so a tool writing or truncating a staged input
+    modifies **src**: only use them with tools that never write their inputs.
+
+    Directories are recreated and each file inside is staged with the same chain,
+    except in symlink mode where the directory itself is linked.
+
+    Args:
+        src (str): Path to the file or directory to be staged.
+        dest_dir (str): Directory where **src** will be staged.
+        stage_mode (str): ("copy") Staging mode. Values: copy, hardlink, reflink, symlink, auto.
+        is_dir (bool): (False) Stage **src** as a directory tree.
+        out_log (:obj:`logging.Logger`): Input log object.
+
+    Returns:
+        str: Method used to stage **src** (for directories the last one used).
+    """
+    src = str(Path(src).resolve())
+    return clone_path(src, os.path.join(str(dest_dir), Path(src).name), stage_mode=stage_mode, is_dir=is_dir, out_log=out_log)
+
+
+def clone_path(
+    src: Union[str, Path],
+    dst: Union[str, Path],
+    stage_mode: str = "copy",
+    is_dir: bool = False,
+    out_log: Optional[logging.Logger] = None,
+) -> str:
+    """Copy, link or clone the file or directory **src** to **dst** using the
+    **stage_mode** chain. See :func:`stage_path`.
+
+    Args:
+        src (str): Path to the source file or directory.
+        dst (str): Destination path.
+        stage_mode (str): ("copy") Staging mode. Values: copy, hardlink, reflink, symlink, auto.
+        is_dir (bool): (False) Clone **src** as a directory tree.
+        out_log (:obj:`logging.Logger`): Input log object.
+
+    Returns:
+        str: Method used to clone **src** (for directories the last one used).
+    """
+    src, dst = str(src), str(dst)
+    methods = _stage_chain(stage_mode)
+
+    if is_dir:
+        if methods[0] == "symlink":
+            try:
+                os.symlink(src, dst, target_is_directory=True)
+                return "symlink"
+            except OSError:
+                methods = methods[1:]
+        used = {"method": methods[-1]}
+
+        def _copy_function(file_src, file_dst):
+            used["method"] = _stage_with_fallback(file_src, file_dst, methods, out_log)
+            return file_dst
 
-            if not os.path.exists(dest_file_path) or os.path.getmtime(src_file_path) > os.path.getmtime(dest_file_path):
-                shutil.copy2(src_file_path, dest_file_path)
+        shutil.copytree(src, dst, copy_function=_copy_function, symlinks=True)
+        return used["method"]
+
+    return _stage_with_fallback(src, dst, methods, out_log)
+
+
+def _stage_with_fallback(src: str, dst: str, methods: list[str], out_log: Optional[logging.Logger] = None) -> str:
+    for method in methods:
+        try:
+            _stage_file(src, dst, method)
+            return method
+        except OSError as error:
+            if method == methods[-1]:
+                raise
+            if out_log:
+                out_log.debug(f"Unable to {method} {src}: {error}. Trying next staging method.")
+    return methods[-1]
 
 
 def copy_to_container(container_path: Optional[Union[str, Path]], container_volume_path: str,
@@ -600,6 +1471,131 @@ def copy_to_host(container_path: str, container_io_dict: dict, io_dict: dict):
                 shutil.copy2(container_file_path, io_dict["out"][file_ref])
 
 
+SINGULARITY_CACHE_ENV_VAR = "BIOBB_SINGULARITY_CACHE"
+
+
+def get_singularity_image_path(container_image: Union[str, Path], cache_path: Optional[Union[str, Path]] = None) -> str:
+    """Return the path of the SIF file of **container_image** in the image cache.
+
+    The file name is made of the image name and the sha256 digest of the
+    whole image reference, so different tags, digests or registries never
+    share a file. The registry is not queried: an image referenced by a
+    mutable tag (i.e. ":latest") keeps its first pulled version until the
+    file expires (see **max_age** of :func:`pull_singularity_image`) or is
+    removed.
+
+    Args:
+        container_image (str): Image reference, i.e. "docker://quay.io/biocontainers/gromacs:2022.2".
+        cache_path (str): (None) Image cache directory. If None the **BIOBB_SINGULARITY_CACHE** environment variable or the current working directory.
+
+    Returns:
+        str: Path of the SIF file.
+    """
+    import hashlib
+
+    cache_path = cache_path or os.getenv(SINGULARITY_CACHE_ENV_VAR) or os.getcwd()
+    image_name = re.sub(r"[^\w.-]", "_", str(container_image).rstrip("/").rsplit("/", 1)[-1].split("@")[0])
+    digest = hashlib.sha256(str(container_image).encode("utf-8")).hexdigest()[:16]
+    return str(Path(cache_path).joinpath(f"{Path(image_name).stem}_{digest}.sif"))
+
+
+@contextmanager
+def _file_lock(lock_path: Union[str, Path]):
+    """Exclusive lock on **lock_path** shared by the processes of the host (and of NFS clients supporting it)."""
+    try:
+        import fcntl
+    except ImportError:
+        # No locking available, concurrent pulls use different temporal files anyway
+        yield
+        return
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def pull_singularity_image(
+    container_path: Union[str, Path],
+    container_image: Union[str, Path],
+    cache_path: Optional[Union[str, Path]] = None,
+    out_log: Optional[logging.Logger] = None,
+    global_log: Optional[logging.Logger] = None,
+    max_age: Optional[float] = None
+) -> str:
+    """Return a local SIF file of **container_image**, pulling it into the image cache if needed.
+
+    Pulls are serialized by a lock file per image, so concurrent steps and
+    workers wait for the first pull and reuse its file. The image is pulled
+    to a temporal file renamed into place once it is complete, so a broken
+    pull never leaves a partial image in the cache.
+
+    Cached images are reused without checking the registry. With **max_age**
+    an image pulled more than **max_age** seconds ago is pulled again, so
+    mutable tags are refreshed. Images referenced by digest (i.e.
+    "@sha256:...") are immutable and never expire.
+
+    Args:
+        container_path (str): Path to the singularity binary.
+        container_image (str): Path to a local image or image reference to be pulled.
+        cache_path (str): (None) Image cache directory, see :func:`get_singularity_image_path`.
+        out_log (:obj:`logging.Logger`): (None) Python logger object.
+        global_log (:obj:`logging.Logger`): (None) Python logger object.
+        max_age (float): (None) Maximum age in seconds of a cached image. None to never pull a cached image again, 0 to always pull it.
+
+    Returns:
+        str: Path to the SIF file.
+
+    Raises:
+        FileNotFoundError: If the image can not be pulled.
+    """
+    if Path(str(container_image)).exists():
+        return str(container_image)
+    import time
+
+    image_path = get_singularity_image_path(container_image, cache_path)
+    if "@sha256:" in str(container_image):
+        max_age = None
+
+    def _is_cached() -> bool:
+        try:
+            age = time.time() - os.path.getmtime(image_path)
+        except FileNotFoundError:
+            return False
+        return max_age is None or age < max_age
+
+    if _is_cached():
+        log(f"Using cached image {image_path}", out_log, global_log)
+        return image_path
+
+    Path(image_path).parent.mkdir(parents=True, exist_ok=True)
+    with _file_lock(image_path + ".lock"):
+        # Pulled by another process while waiting for the lock
+        if _is_cached():
+            log(f"Using cached image {image_path}", out_log, global_log)
+            return image_path
+        log(f"{container_image} does not exist trying to pull it", out_log, global_log)
+        tmp_name = f".{Path(image_path).name}.{uuid.uuid4().hex}.tmp"
+        singularity_pull_cmd = [str(container_path), "pull", "--name", tmp_name, str(container_image)]
+        tmp_path = Path(image_path).parent.joinpath(tmp_name)
+        try:
+            from biobb_common.command_wrapper import cmd_wrapper
+
+            cmd_wrapper.CmdWrapper(singularity_pull_cmd, out_log=out_log, global_log=global_log, cwd=str(Path(image_path).parent)).launch()
+            if not tmp_path.exists():
+                raise FileNotFoundError
+            os.replace(tmp_path, image_path)
+        except FileNotFoundError:
+            log(f"{' '.join(singularity_pull_cmd)} not found", out_log, global_log)
+            if not Path(image_path).exists():
+                raise FileNotFoundError
+            log(f"WARNING: Using expired cached image {image_path}", out_log, global_log)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    return image_path
+
+
 def create_cmd_line(
     cmd: list[str],
     container_path: Optional[Union[str, Path]] = "",
@@ -610,36 +1606,15 @@ def create_cmd_line(
     container_shell_path: Optional[Union[str, Path]] = None,
     container_image: Optional[Union[str, Path]] = None,
     out_log: Optional[logging.Logger] = None,
-    global_log: Optional[logging.Logger] = None
+    global_log: Optional[logging.Logger] = None,
+    container_cache_path: Optional[Union[str, Path]] = None,
+    container_cache_max_age: Optional[float] = None
 ) -> list[str]:
     container_path = container_path or ""
     if str(container_path).endswith("singularity"):
         log("Using Singularity image %s" % container_image, out_log, global_log)
-        if not Path(str(container_image)).exists():
-            log(
-                f"{container_image} does not exist trying to pull it",
-                out_log,
-                global_log,
-            )
-            container_image_name = str(Path(str(container_image)).with_suffix(".sif").name)
-            singularity_pull_cmd = [
-                str(container_path),
-                "pull",
-                "--name",
-                str(container_image_name),
-                str(container_image),
-            ]
-            try:
-                from biobb_common.command_wrapper import cmd_wrapper
-
-                cmd_wrapper.CmdWrapper(cmd=singularity_pull_cmd, out_log=out_log).launch()
-                if Path(container_image_name).exists():
-                    container_image = container_image_name
-                else:
-                    raise FileNotFoundError
-            except FileNotFoundError:
-                log(f"{' '.join(singularity_pull_cmd)} not found", out_log, global_log)
-                raise FileNotFoundError
+        container_image = pull_singularity_image(str(container_path), str(container_image), container_cache_path, out_log, global_log,
+                                                 container_cache_max_age)
         singularity_cmd: list[str] = [
             str(container_path),
             "exec",
@@ -699,20 +1674,56 @@ def create_cmd_line(
         return cmd
 
 
-def get_doc_dicts(doc: Optional[str]):
-    regex_argument = re.compile(
-        r"(?P<argument>\w*)\ *(?:\()(?P<type>\w*)(?:\)):?\ *(?P<optional>\(\w*\):)?\ *(?P<description>.*?)(?:\.)\ *(?:File type:\ *)(?P<input_output>\w+)\.\ *(\`(?:.+)\<(?P<sample_file>.*?)\>\`\_\.)?\ *(?:Accepted formats:\ *)(?P<formats>.+)(?:\.)?"
-    )
-    regex_argument_formats = re.compile(
-        r"(?P<extension>\w*)\ *(\(\ *)\ *edam\ *:\ *(?P<edam>\w*)"
-    )
-    regex_property = re.compile(
-        r"(?:\*\ *\*\*)(?P<property>.*?)(?:\*\*)\ *(?:\(\*)(?P<type>\w*)(?:\*\))\ *\-\ ?(?:\()(?P<default_value>.*?)(?:\))\ *(?:(?:\[)(?P<wf_property>WF property)(?:\]))?\ *(?:(?:\[)(?P<range_start>[\-]?\d+(?:\.\d+)?)\~(?P<range_stop>[\-]?\d+(?:\.\d+)?)(?:\|)?(?P<range_step>\d+(?:\.\d+)?)?(?:\]))?\ *(?:(?:\[)(.*?)(?:\]))?\ *(?P<description>.*)"
-    )
-    regex_property_value = re.compile(
-        r"(?P<value>\w*)\ *(?:(?:\()(?P<description>.*?)?(?:\)))?"
-    )
+# Regular expressions to parse the Args and properties sections of the block docstrings
+REGEX_ARGUMENT = re.compile(
+    r"(?P<argument>\w*)\ *(?:\()(?P<type>\w*)(?:\)):?\ *(?P<optional>\(\w*\):)?\ *(?P<description>.*?)(?:\.)\ *(?:File type:\ *)(?P<input_output>\w+)\.\ *(\`(?:.+)\<(?P<sample_file>.*?)\>\`\_\.)?\ *(?:Accepted formats:\ *)(?P<formats>.+)(?:\.)?"
+)
+REGEX_ARGUMENT_FORMATS = re.compile(
+    r"(?P<extension>\w*)\ *(\(\ *)\ *edam\ *:\ *(?P<edam>\w*)"
+)
+REGEX_PROPERTY = re.compile(
+    r"(?:\*\ *\*\*)(?P<property>.*?)(?:\*\*)\ *(?:\(\*)(?P<type>\w*)(?:\*\))\ *\-\ ?(?:\()(?P<default_value>.*?)(?:\))\ *(?:(?:\[)(?P<wf_property>WF property)(?:\]))?\ *(?:(?:\[)(?P<range_start>[\-]?\d+(?:\.\d+)?)\~(?P<range_stop>[\-]?\d+(?:\.\d+)?)(?:\|)?(?P<range_step>\d+(?:\.\d+)?)?(?:\]))?\ *(?:(?:\[)(.*?)(?:\]))?\ *(?P<description>.*)"
+)
+REGEX_PROPERTY_VALUE = re.compile(
+    r"(?P<value>\w*)\ *(?:(?:\()(?P<description>.*?)?(?:\)))?"
+)
+
+
+class ReadOnlyDict(dict):
+    """Dictionary that can not be modified after its creation.
+
+    Pickle and (deep)copy friendly, :meth:`copy` returns a regular mutable dict.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} object does not support item assignment")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only  # type: ignore
+    clear = pop = popitem = setdefault = update = _read_only  # type: ignore
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
 
+
+def freeze_dict(dictionary: dict) -> ReadOnlyDict:
+    """Return a recursive read-only copy of **dictionary**.
+
+    Args:
+        dictionary (dict): Dictionary to be frozen, nested dictionaries are frozen too.
+
+    Returns:
+        :obj:`ReadOnlyDict`: Read-only dictionary.
+    """
+    return ReadOnlyDict({key: freeze_dict(value) if isinstance(value, dict) else value for key, value in dictionary.items()})
+
+
+def get_doc_dicts(doc: Optional[str]):
     doc_lines = list(
         map(str.strip, filter(lambda line: line.strip(), str(doc).splitlines()))
     )
@@ -730,17 +1741,17 @@ def get_doc_dicts(doc: Optional[str]):
 
     doc_arguments_dict = {}
     for argument_line in arguments_lines_list:
-        match_argument = regex_argument.match(argument_line)
+        match_argument = REGEX_ARGUMENT.match(argument_line)
         argument_dict = match_argument.groupdict() if match_argument is not None else {}
         argument_dict["formats"] = {
             match.group("extension"): match.group("edam")
-            for match in regex_argument_formats.finditer(argument_dict["formats"])
+            for match in REGEX_ARGUMENT_FORMATS.finditer(argument_dict["formats"])
         }
         doc_arguments_dict[argument_dict.pop("argument")] = argument_dict
 
     doc_properties_dict = {}
     for property_line in properties_lines_list:
-        match_property = regex_property.match(property_line)
+        match_property = REGEX_PROPERTY.match(property_line)
         property_dict = match_property.groupdict() if match_property is not None else {}
         property_dict["values"] = None
         if "Values:" in property_dict["description"]:
@@ -749,7 +1760,7 @@ def get_doc_dicts(doc: Optional[str]):
             ].split("Values:")
             property_dict["values"] = {
                 match.group("value"): match.group("description")
-                for match in regex_property_value.finditer(property_dict["values"])
+                for match in REGEX_PROPERTY_VALUE.finditer(property_dict["values"])
                 if match.group("value")
             }
         doc_properties_dict[property_dict.pop("property")] = property_dict
@@ -0,0 +1,232 @@
+"""Persistent content-addressed cache of step results
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Optional, Union
+from biobb_common.tools import file_utils as fu
+
+FINGERPRINTS = ("content", "stat")
+
+# Properties that do not change the results of a step
+NON_RESULT_PROPERTIES = frozenset([
+    "global_log", "out_log", "err_log", "out_log_path", "err_log_path", "can_write_console_log",
+    "can_write_file_log", "disable_logs", "prefix", "step", "path", "working_dir_path", "sandbox_path",
+    "remove_tmp", "restart", "global_properties_list", "tool", "system", "stage_mode", "stream_output",
+    "stream_tail_lines", "use_shell", "cache_dir", "cache_max_size", "cache_fingerprint", "copy_workers",
+    "move_to_host", "metrics_path", "deferred_remove_tmp", "sandbox_pool_size", "container_persistent",
+    "container_cache_path", "container_cache_max_age",
+])
+
+MANIFEST_FILE = "manifest.json"
+# Copy-on-write clone falling back to copy, entries never share storage with the step outputs
+CLONE_MODE = "reflink"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_properties(properties: dict[str, Any]) -> str:
+    """Return the sha256 hex digest of the properties that can change the results of a step.
+
+    Args:
+        properties (dict): Properties dictionary of the step.
+
+    Returns:
+        str: Hex digest of the properties.
+    """
+    result_properties = {k: v for k, v in properties.items() if k not in NON_RESULT_PROPERTIES}
+    return hashlib.sha256(json.dumps(result_properties, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def fingerprint_path(path: Union[str, Path], fingerprint: str = "content") -> str:
+    """Return a fingerprint of the file or directory **path**.
+
+    Args:
+        path (str): Path to the file or directory.
+        fingerprint (str): ("content") Values: content (sha256 of the file contents), stat (file size and modification time).
+
+    Returns:
+        str: Hex digest of the file or directory.
+    """
+    if fingerprint not in FINGERPRINTS:
+        raise ValueError(f"Unknown fingerprint: {fingerprint}. Valid fingerprints: {FINGERPRINTS}")
+    path = Path(path)
+    digest = hashlib.sha256()
+    if path.is_dir():
+        file_list = sorted(p for p in path.rglob("*") if p.is_file())
+    else:
+        file_list = [path]
+    for file_path in file_list:
+        digest.update(str(file_path.relative_to(path) if file_path != path else "").encode("utf-8"))
+        if fingerprint == "stat":
+            stat = file_path.stat()
+            digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+        else:
+            with open(file_path, "rb") as file_handler:
+                for chunk in iter(lambda: file_handler.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StepCache:
+    """Persistent cache of step results keyed by the module and version of the
+    block, the properties of the step and the contents of its input files.
+
+    Each entry is a directory inside **cache_dir** named after its key,
+    containing a copy of every output and a manifest. Outputs are
+    materialised with reflinks falling back to copies, never hardlinks. When
+    **max_size** is reached the least recently used entries are evicted.
+
+    Args:
+        cache_dir (str): Path to the cache directory.
+        max_size (int): (None) Maximum size of the cache in bytes. None for unlimited.
+        fingerprint (str): ("content") Input files fingerprint. Values: content (sha256 of the file contents), stat (file size and modification time).
+        out_log (:obj:`logging.Logger`): (None) Python logger object.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], max_size: Optional[int] = None, fingerprint: str = "content",
+                 out_log: Optional[logging.Logger] = None) -> None:
+        if fingerprint not in FINGERPRINTS:
+            raise ValueError(f"Unknown fingerprint: {fingerprint}. Valid fingerprints: {FINGERPRINTS}")
+        self.cache_dir = Path(cache_dir).resolve()
+        self.max_size = max_size
+        self.fingerprint = fingerprint
+        self.out_log = out_log
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get_key(self, module: str, version: Optional[str], properties_hash: str, io_dict: dict[str, dict[str, Any]]) -> str:
+        """Return the cache key of a step.
+
+        Args:
+            module (str): Module of the block.
+            version (str): Version of the block package.
+            properties_hash (str): Hash of the properties (see :func:`hash_properties`).
+            io_dict (dict): Input/Output files dictionary of the step.
+
+        Returns:
+            str: Hex digest key.
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{module}:{version}:{properties_hash}".encode("utf-8"))
+        for file_ref, file_path in sorted((io_dict.get("in") or {}).items()):
+            if not file_path:
+                continue
+            digest.update(f"in:{file_ref}:".encode("utf-8"))
+            # Default files like GMXLIB ones are identified by their name
+            digest.update((fingerprint_path(file_path, self.fingerprint) if Path(file_path).exists() else str(file_path)).encode("utf-8"))
+        for file_ref, file_path in sorted((io_dict.get("out") or {}).items()):
+            if file_path:
+                digest.update(f"out:{file_ref}:{Path(file_path).name}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def fetch(self, key: str, out_dict: dict[str, Any]) -> bool:
+        """Materialise the cached outputs of **key** in the paths of **out_dict**.
+
+        Args:
+            key (str): Cache key.
+            out_dict (dict): Output files dictionary of the step.
+
+        Returns:
+            bool: True if the outputs were found and materialised.
+        """
+        entry_dir = self.cache_dir.joinpath(key)
+        manifest_path = entry_dir.joinpath(MANIFEST_FILE)
+        try:
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+            if set(manifest["outputs"]) != {file_ref for file_ref, file_path in out_dict.items() if file_path}:
+                return False
+            for file_ref, is_dir in manifest["outputs"].items():
+                dest_path = Path(out_dict[file_ref])
+                fu.rm(dest_path)
+                dest_path.parent.mkdir(parents=True, exist_ok=True)
+                # Never hardlinked, editing the output in place would corrupt the entry
+                fu.clone_path(entry_dir.joinpath("outputs", file_ref), dest_path, stage_mode=CLONE_MODE, is_dir=is_dir, out_log=self.out_log)
+            # Mark the entry as recently used
+            os.utime(manifest_path)
+        except (OSError, ValueError, KeyError):
+            return False
+        fu.log(f"Step cache hit: {key}", self.out_log)
+        return True
+
+    def store(self, key: str, out_dict: dict[str, Any]) -> bool:
+        """Store the outputs in **out_dict** under **key** and evict old entries if needed.
+
+        Args:
+            key (str): Cache key.
+            out_dict (dict): Output files dictionary of the step.
+
+        Returns:
+            bool: True if the outputs were stored.
+        """
+        entry_dir = self.cache_dir.joinpath(key)
+        if entry_dir.exists():
+            return False
+        tmp_dir = Path(fu.create_unique_dir(str(self.cache_dir), ".tmp_"))
+        try:
+            outputs: dict[str, bool] = {}
+            size = 0
+            for file_ref, file_path in out_dict.items():
+                if not file_path:
+                    continue
+                is_dir = Path(file_path).is_dir()
+                cached_path = tmp_dir.joinpath("outputs", file_ref)
+                cached_path.parent.mkdir(parents=True, exist_ok=True)
+                fu.clone_path(file_path, cached_path, stage_mode=CLONE_MODE, is_dir=is_dir, out_log=self.out_log)
+                size += sum(p.stat().st_size for p in cached_path.rglob("*") if p.is_file()) if is_dir else cached_path.stat().st_size
+                outputs[file_ref] = is_dir
+            with open(tmp_dir.joinpath(MANIFEST_FILE), "w") as manifest_file:
+                json.dump({"outputs": outputs, "size": size, "created": time.time()}, manifest_file)
+            # Atomic publication, other process may have stored the same key meanwhile
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+        fu.log(f"Step results stored in cache: {key}", self.out_log)
+        self.evict()
+        return True
+
+    def entries(self) -> list[tuple[float, int, Path]]:
+        """Return the (last use time, size, path) tuples of the cache entries sorted from least to most recently used."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            manifest_path = Path(entry.path).joinpath(MANIFEST_FILE)
+            try:
+                with open(manifest_path) as manifest_file:
+                    size = json.load(manifest_file).get("size", 0)
+                entries.append((manifest_path.stat().st_mtime, size, Path(entry.path)))
+            except (OSError, ValueError):
+                continue
+        return sorted(entries)
+
+    def evict(self) -> list[str]:
+        """Remove the least recently used entries until the cache size is below **max_size**.
+
+        Returns:
+            :obj:`list` of :obj:`str`: Keys of the removed entries.
+        """
+        if self.max_size is None:
+            return []
+        entries = self.entries()
+        total_size = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, entry_path in entries:
+            if total_size <= self.max_size:
+                break
+            # Rename first so concurrent fetches never see a half removed entry
+            trash_path = entry_path.with_name(f".evicted_{entry_path.name}")
+            try:
+                os.rename(entry_path, trash_path)
+            except OSError:
+                continue
+            shutil.rmtree(trash_path, ignore_errors=True)
+            total_size -= size
+            removed.append(entry_path.name)
+        if removed:
+            fu.log(f"Evicted from step cache: {removed}", self.out_log)
+        return removed
@@ -0,0 +1,145 @@
+"""Timing and resource usage metrics of the biobb steps
+"""
+import os
+import sys
+import json
+import time
+import functools
+import threading
+from pathlib import Path
+from typing import Any, Optional, Union
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None  # type: ignore
+
+_write_lock = threading.Lock()
+# Same value as inspect.CO_COROUTINE, inspect is not imported to keep the start up fast
+CO_COROUTINE = 0x0080
+
+
+def _get_rusage(who: int) -> tuple[float, float, int]:
+    """Return (user time, system time, max RSS in KiB) for **who**."""
+    if resource is None:
+        return 0.0, 0.0, 0
+    usage = resource.getrusage(who)
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    maxrss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return usage.ru_utime, usage.ru_stime, maxrss
+
+
+class StepMetrics:
+    """Wall time of every phase and resource usage of a biobb step.
+
+    CPU times are computed as the difference of :func:`resource.getrusage`
+    before and after the step, for the Python process (RUSAGE_SELF) and its
+    finished children (RUSAGE_CHILDREN). Children peak RSS is the maximum of
+    all the children waited by the process, not only the ones of this step.
+    Both are process-wide, so steps running concurrently in threads of the
+    same process share them.
+
+    Args:
+        module (str): Module of the block.
+        step (str): (None) Name of the step.
+        prefix (str): (None) Prefix of the step.
+        version (str): (None) Version of the block package.
+    """
+
+    def __init__(self, module: str, step: Optional[str] = None, prefix: Optional[str] = None, version: Optional[str] = None) -> None:
+        self.module = module
+        self.step = step
+        self.prefix = prefix
+        self.version = version
+        self.phases: dict[str, float] = {}
+        self._start_time = 0.0
+        self._start_self = (0.0, 0.0, 0)
+        self._start_children = (0.0, 0.0, 0)
+
+    def start(self) -> None:
+        """Start the step timers."""
+        self._start_time = time.perf_counter()
+        if resource is not None:
+            self._start_self = _get_rusage(resource.RUSAGE_SELF)
+            self._start_children = _get_rusage(resource.RUSAGE_CHILDREN)
+
+    def add_phase(self, phase: str, elapsed: float) -> None:
+        """Add **elapsed** seconds to **phase**."""
+        self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+
+    def stop(self, return_code: Optional[int] = None, error: Optional[BaseException] = None) -> dict[str, Any]:
+        """Stop the step timers and return the metrics record."""
+        wall_time = time.perf_counter() - self._start_time
+        self_user, self_system, self_maxrss = _get_rusage(resource.RUSAGE_SELF) if resource else (0.0, 0.0, 0)
+        children_user, children_system, children_maxrss = _get_rusage(resource.RUSAGE_CHILDREN) if resource else (0.0, 0.0, 0)
+        record: dict[str, Any] = {
+            "timestamp": time.time(),
+            "pid": os.getpid(),
+            "module": self.module,
+            "version": self.version,
+            "step": self.step,
+            "prefix": self.prefix,
+            "return_code": return_code,
+            "wall_time": wall_time,
+            "phases": self.phases,
+            "self_user_time": self_user - self._start_self[0],
+            "self_system_time": self_system - self._start_self[1],
+            "self_maxrss_kb": self_maxrss,
+            "children_user_time": children_user - self._start_children[0],
+            "children_system_time": children_system - self._start_children[1],
+            "children_maxrss_kb": children_maxrss,
+        }
+        if error is not None:
+            record["error"] = repr(error)
+        return record
+
+
+def write_metrics(record: dict[str, Any], metrics_path: Union[str, Path]) -> None:
+    """Append **record** as a JSON line to the **metrics_path** file.
+
+    Every record is written with a single append so lines of concurrent
+    steps and processes do not get mixed.
+
+    Args:
+        record (dict): Metrics record.
+        metrics_path (str): Path to the JSON lines file.
+    """
+    line = (json.dumps(record, default=str) + "\n").encode("utf-8")
+    Path(metrics_path).parent.mkdir(parents=True, exist_ok=True)
+    with _write_lock:
+        fd = os.open(metrics_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+
+def timed_phase(phase: str):
+    """Decorator adding the wall time of a BiobbObject method to the **phase**
+    of its `step_metrics` attribute. Does nothing if metrics are disabled."""
+    def decorator(func):
+        if func.__code__.co_flags & CO_COROUTINE:
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                step_metrics = getattr(self, "step_metrics", None)
+                if step_metrics is None:
+                    return await func(self, *args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(self, *args, **kwargs)
+                finally:
+                    step_metrics.add_phase(phase, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            step_metrics = getattr(self, "step_metrics", None)
+            if step_metrics is None:
+                return func(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                step_metrics.add_phase(phase, time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -1,19 +1,21 @@
 """Boiler plate functions for testsys
 """
 import os
+import io
+import time
 import pickle
-from typing import Optional, Union, Any
+import zipfile
+import contextlib
+from typing import Optional, Union, Any, Iterable
 from pathlib import Path
 import sys
 import shutil
-import hashlib
-from Bio.PDB import Superimposer, PDBParser  # type: ignore
+import functools
+import itertools
 import codecs
 from biobb_common.configuration import settings
 from biobb_common.tools import file_utils as fu
-import numpy as np
 import json
-import jsonschema
 
 
 def test_setup(test_object, dict_key: Optional[str] = None, config: Optional[str] = None):
@@ -38,8 +40,8 @@ def test_setup(test_object, dict_key: Optional[str] = None, config: Optional[str
     conf = settings.ConfReader(test_object.conf_file_path)
 
     if dict_key:
-        test_object.properties = conf.get_prop_dic()[dict_key]
-        test_object.paths = {k: v.replace('test_data_dir', test_object.data_dir, 1).replace('test_reference_dir', test_object.reference_dir, 1) for k, v in conf.get_paths_dic()[dict_key].items()}
+        test_object.properties = conf.get_step_properties(dict_key)
+        test_object.paths = {k: v.replace('test_data_dir', test_object.data_dir, 1).replace('test_reference_dir', test_object.reference_dir, 1) for k, v in conf.get_step_paths(dict_key).items()}
     else:
         test_object.properties = conf.get_prop_dic()
         test_object.paths = {k: v.replace('test_data_dir', test_object.data_dir, 1).replace('test_reference_dir', test_object.reference_dir, 1) for k, v in conf.get_paths_dic().items()}
@@ -83,12 +85,9 @@ def not_empty(file_path: str) -> bool:
     """
     if file_path.endswith('.zip'):
         print("Checking if empty zip: "+file_path)
-        dst = file_path[:-4] + '_unzipped'
-        os.makedirs(dst, exist_ok=True)
-        # Extract zip and get list of files
-        unzipped_files = fu.unzip_list(file_path, dest_dir=dst)
-        # Check if there are any files in the zip
-        return len(unzipped_files) > 0
+        # Members listed in the central directory, nothing is extracted
+        with zipfile.ZipFile(file_path) as zip_file:
+            return len(zip_file.namelist()) > 0
     elif Path(file_path).is_dir():
         print("Checking if empty dir: "+file_path)
         return len(os.listdir(file_path)) > 0
@@ -97,66 +96,175 @@ def not_empty(file_path: str) -> bool:
     return Path(file_path).is_file() and Path(file_path).stat().st_size > 0
 
 
-def compare_hash(file_a: str, file_b: str) -> bool:
-    """Compute and compare the hashes of two files"""
+COMPARE_CHUNK_SIZE = 1024 * 1024
+
+
+def _open_source(file: Union[str, Path, zipfile.Path], mode: str = "r", **kwargs):
+    """Open a file path or a member of an open zip file (:obj:`zipfile.Path`) without extracting it."""
+    if isinstance(file, zipfile.Path):
+        return file.open(mode, **kwargs)
+    return open(file, mode, **kwargs)
+
+
+def _source_size(file: Union[str, Path, zipfile.Path]) -> int:
+    """Size in bytes of a file path or of the uncompressed member of a zip file."""
+    if isinstance(file, zipfile.Path):
+        return file.root.getinfo(file.at).file_size
+    return os.stat(file).st_size
+
+
+@functools.lru_cache(maxsize=256)
+def _reference_digest(file_path: str, mtime_ns: int, size: int) -> str:
+    """Cached sha256 digest of a reference file, **mtime_ns** and **size** identify its version."""
+    return fu.file_digest(file_path, COMPARE_CHUNK_SIZE)
+
+
+def compare_hash(file_a: str, file_b: str, cache_reference: bool = False) -> bool:
+    """Compare the contents of two files.
+
+    Sizes are compared first, then both files are read in chunks in lockstep
+    stopping at the first difference, so memory usage is bounded and
+    different files are usually detected without reading them completely.
+    Two members of zip files (:obj:`zipfile.Path`) are compared by the CRC32
+    of their central directories, without decompressing them.
+
+    Args:
+        file_a (str): Path to the file.
+        file_b (str): Path to the reference file.
+        cache_reference (bool): (False) Compare the sha256 digest of **file_a** with the digest of **file_b** cached by the process, so a reference file compared several times is read only once.
+
+    Returns:
+        bool: True if both files have the same contents.
+    """
     print("Comparing: ")
-    print("        File_A: "+file_a)
-    print("        File_B: "+file_b)
-    file_a_hash = hashlib.sha256(open(file_a, 'rb').read()).digest()
-    file_b_hash = hashlib.sha256(open(file_b, 'rb').read()).digest()
-    print("        File_A hash: "+str(file_a_hash))
-    print("        File_B hash: "+str(file_b_hash))
-    return file_a_hash == file_b_hash
+    print(f"        File_A: {file_a}")
+    print(f"        File_B: {file_b}")
+    size_a, size_b = _source_size(file_a), _source_size(file_b)
+    if size_a != size_b:
+        print(f"        Different sizes: {size_a} != {size_b}")
+        return False
+
+    if isinstance(file_a, zipfile.Path) and isinstance(file_b, zipfile.Path):
+        crc_a, crc_b = file_a.root.getinfo(file_a.at).CRC, file_b.root.getinfo(file_b.at).CRC
+        print(f"        File_A CRC32: {crc_a:08x}")
+        print(f"        File_B CRC32: {crc_b:08x}")
+        return crc_a == crc_b
+
+    if cache_reference and not isinstance(file_a, zipfile.Path) and not isinstance(file_b, zipfile.Path):
+        stat_b = os.stat(file_b)
+        file_a_hash = fu.file_digest(file_a, COMPARE_CHUNK_SIZE)
+        file_b_hash = _reference_digest(str(Path(file_b).resolve()), stat_b.st_mtime_ns, stat_b.st_size)
+        print("        File_A hash: "+file_a_hash)
+        print("        File_B hash: "+file_b_hash)
+        return file_a_hash == file_b_hash
+
+    offset = 0
+    with _open_source(file_a, 'rb') as f_a, _open_source(file_b, 'rb') as f_b:
+        while True:
+            chunk_a = f_a.read(COMPARE_CHUNK_SIZE)
+            chunk_b = f_b.read(COMPARE_CHUNK_SIZE)
+            if chunk_a != chunk_b:
+                offset += next((i for i, (byte_a, byte_b) in enumerate(zip(chunk_a, chunk_b)) if byte_a != byte_b), min(len(chunk_a), len(chunk_b)))
+                print(f"        First difference at byte: {offset}")
+                return False
+            if not chunk_a:
+                return True
+            offset += len(chunk_a)
 
 
 def equal(file_a: str, file_b: str, ignore_list: Optional[list[Union[str, int]]] = None, **kwargs) -> bool:
     """Check if two files are equal"""
+    # Members of zip files are zipfile.Path objects
+    name_a, name_b = str(file_a), str(file_b)
     if ignore_list:
         # Line by line comparison
         return compare_line_by_line(file_a, file_b, ignore_list)
 
-    if file_a.endswith(".zip") and file_b.endswith(".zip"):
-        return compare_zip(file_a, file_b)
+    if name_a.endswith(".zip") and name_b.endswith(".zip"):
+        return compare_zip(file_a, file_b, **kwargs)
 
-    if file_a.endswith(".pdb") and file_b.endswith(".pdb"):
+    if name_a.endswith(".pdb") and name_b.endswith(".pdb"):
         return compare_pdb(file_a, file_b, **kwargs)
 
-    if file_a.endswith(".top") and file_b.endswith(".top"):
+    if name_a.endswith(".top") and name_b.endswith(".top"):
         return compare_top_itp(file_a, file_b)
 
-    if file_a.endswith(".itp") and file_b.endswith(".itp"):
+    if name_a.endswith(".itp") and name_b.endswith(".itp"):
         return compare_top_itp(file_a, file_b)
 
-    if file_a.endswith(".gro") and file_b.endswith(".gro"):
+    if name_a.endswith(".gro") and name_b.endswith(".gro"):
         return compare_ignore_first(file_a, file_b)
 
-    if file_a.endswith(".prmtop") and file_b.endswith(".prmtop"):
+    if name_a.endswith(".prmtop") and name_b.endswith(".prmtop"):
         return compare_ignore_first(file_a, file_b)
 
-    if file_a.endswith(".inp") and file_b.endswith(".inp"):
+    if name_a.endswith(".inp") and name_b.endswith(".inp"):
         return compare_ignore_first(file_a, file_b)
 
-    if file_a.endswith(".par") and file_b.endswith(".par"):
+    if name_a.endswith(".par") and name_b.endswith(".par"):
         return compare_ignore_first(file_a, file_b)
 
-    if file_a.endswith((".nc", ".netcdf", ".xtc")) and file_b.endswith((".nc", ".netcdf", ".xtc")):
+    if name_a.endswith((".nc", ".netcdf", ".xtc")) and name_b.endswith((".nc", ".netcdf", ".xtc")):
         return compare_size(file_a, file_b, kwargs.get('percent_tolerance', 1.0))
 
-    if file_a.endswith(".xvg") and file_b.endswith(".xvg"):
+    if name_a.endswith(".xvg") and name_b.endswith(".xvg"):
         return compare_xvg(file_a, file_b, kwargs.get('percent_tolerance', 1.0))
 
     image_extensions = ('.png', '.jfif', '.ppm', '.tiff', '.jpg', '.dib', '.pgm', '.bmp', '.jpeg', '.pbm', '.jpe', '.apng', '.pnm', '.gif', '.tif')
-    if file_a.endswith(image_extensions) and file_b.endswith(image_extensions):
+    if name_a.endswith(image_extensions) and name_b.endswith(image_extensions):
         return compare_images(file_a, file_b, kwargs.get('percent_tolerance', 1.0))
 
-    return compare_hash(file_a, file_b)
+    return compare_hash(file_a, file_b, kwargs.get('cache_reference', False))
+
+
+def _equal_task(comparison: tuple[str, str, dict[str, Any]]) -> dict[str, Any]:
+    """Run a single comparison of :func:`equal_batch` capturing its output."""
+    file_a, file_b, options = comparison
+    output = io.StringIO()
+    error = None
+    start_time = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            result = bool(equal(file_a, file_b, **options))
+    except Exception as exception:
+        result = False
+        error = f"{type(exception).__name__}: {exception}"
+    return {"file_a": file_a, "file_b": file_b, "options": options, "equal": result, "error": error,
+            "elapsed": time.perf_counter() - start_time, "output": output.getvalue()}
+
+
+def equal_batch(comparisons: Iterable[Union[tuple[str, str], tuple[str, str, dict[str, Any]]]], max_workers: Optional[int] = None) -> list[dict[str, Any]]:
+    """Run many :func:`equal` comparisons in a pool of processes.
+
+    Examples:
+        results = equal_batch([(output_pdb, reference_pdb, {"rmsd_cutoff": 2}), (output_xvg, reference_xvg)])
+        assert all(result["equal"] for result in results), [result["output"] for result in results if not result["equal"]]
+
+    Args:
+        comparisons (list): Tuples (file_a, file_b) or (file_a, file_b, options), options is a dict of picklable keyword arguments of :func:`equal`.
+        max_workers (int): (None) Number of processes, None to use the number of CPUs. With 1 the comparisons run in the current process.
+
+    Returns:
+        :obj:`list` of :obj:`dict`: Result of each comparison in the input order with the keys "file_a", "file_b", "options", "equal" (bool), "error" (exception message or None), "elapsed" (seconds) and "output" (printed text).
+    """
+    tasks = [(str(comparison[0]), str(comparison[1]), dict(comparison[2]) if len(comparison) > 2 else {}) for comparison in comparisons]  # type: ignore[misc]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(tasks))
+    if max_workers <= 1:
+        return [_equal_task(task) for task in tasks]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_equal_task, tasks, chunksize=max(1, len(tasks) // (max_workers * 4))))
 
 
 def compare_line_by_line(file_a: str, file_b: str, ignore_list: list[Union[str, int]]) -> bool:
     print(f"Comparing ignoring lines containing this words: {ignore_list}")
-    print("     FILE_A: "+file_a)
-    print("     FILE_B: "+file_b)
-    with open(file_a) as fa, open(file_b) as fb:
+    print(f"     FILE_A: {file_a}")
+    print(f"     FILE_B: {file_b}")
+    with _open_source(file_a) as fa, _open_source(file_b) as fb:
         for index, (line_a, line_b) in enumerate(zip(fa, fb)):
             if index in ignore_list or any(word in line_a for word in ignore_list if isinstance(word, str)):
                 continue
@@ -165,95 +273,255 @@ def compare_line_by_line(file_a: str, file_b: str, ignore_list: list[Union[str,
         return True
 
 
-def equal_txt(file_a: str, file_b: str) -> bool:
+def equal_txt(file_a: str, file_b: str, cache_reference: bool = False) -> bool:
     """Check if two text files are equal"""
-    return compare_hash(file_a, file_b)
+    return compare_hash(file_a, file_b, cache_reference)
 
 
-def compare_zip(zip_a: str, zip_b: str) -> bool:
-    """ Compare zip files """
-    print("This is a ZIP comparison!")
-    print("Unzipping:")
-    print("Creating a unique_dir for: %s" % zip_a)
-    zip_a_dir = fu.create_unique_dir()
-    zip_a_list = fu.unzip_list(zip_a, dest_dir=zip_a_dir)
-    print("Creating a unique_dir for: %s" % zip_b)
-    zip_b_dir = fu.create_unique_dir()
-    zip_b_list = fu.unzip_list(zip_b, dest_dir=zip_b_dir)
-
-    if not len(zip_a_list) == len(zip_b_list):
-        return False
+def compare_zip(zip_a: Union[str, zipfile.Path], zip_b: Union[str, zipfile.Path], **kwargs) -> bool:
+    """Compare zip files member by member without extracting them.
 
-    for uncompressed_zip_a in zip_a_list:
-        uncompressed_zip_b = str(Path(zip_b_dir).joinpath(Path(uncompressed_zip_a).name))
-        if not equal(uncompressed_zip_a, uncompressed_zip_b):
-            return False
+    Both archives must have the same member names. Members with the same
+    CRC32 and size in the central directory of both archives are equal
+    without being decompressed. The remaining ones are compared with
+    :func:`equal`, streaming their contents with :meth:`zipfile.ZipFile.open`,
+    so no temporary file is written.
+
+    Args:
+        zip_a (str): Path to the zip file.
+        zip_b (str): Path to the reference zip file.
+        **kwargs: Options passed to :func:`equal` for the members.
 
+    Returns:
+        bool: True if all the members are equal.
+    """
+    print("This is a ZIP comparison!")
+    print(f"     ZIP_A: {zip_a}")
+    print(f"     ZIP_B: {zip_b}")
+    with contextlib.ExitStack() as stack:
+        # Nested zip members are opened as seekable streams
+        zip_file_a = stack.enter_context(zipfile.ZipFile(stack.enter_context(_open_source(zip_a, 'rb'))))
+        zip_file_b = stack.enter_context(zipfile.ZipFile(stack.enter_context(_open_source(zip_b, 'rb'))))
+        members_a = {info.filename: info for info in zip_file_a.infolist() if not info.is_dir()}
+        members_b = {info.filename: info for info in zip_file_b.infolist() if not info.is_dir()}
+        if members_a.keys() != members_b.keys():
+            print(f"     Different members: {sorted(members_a.keys() ^ members_b.keys())}")
+            return False
+        different = [name for name, info in members_a.items()
+                     if (info.CRC, info.file_size) != (members_b[name].CRC, members_b[name].file_size)]
+        print(f"     Members with the same CRC32: {len(members_a) - len(different)}/{len(members_a)}")
+        for name in different:
+            if not equal(zipfile.Path(zip_file_a, name), zipfile.Path(zip_file_b, name), **kwargs):
+                return False
     return True
 
 
+PDB_WATER_NAMES = (b"HOH", b"WAT")
+
+
+def read_pdb_atoms(pdb_path: Union[str, Path, zipfile.Path]) -> dict[str, Any]:
+    """Read the atoms of the first model of a PDB file into NumPy arrays.
+
+    ATOM and HETATM records are sliced by their fixed columns, so no Python
+    object is created per atom. For atoms with alternate locations (column
+    17) only the first location is kept, the rest of the records are kept
+    even if they repeat the atom name and residue number.
+
+    Args:
+        pdb_path (str): Path to the PDB file or :obj:`zipfile.Path` member.
+
+    Returns:
+        dict: Arrays with one item per atom: "name", "resname", "chain", "resnum" (including the insertion code) as bytes, "hetatm", "water" and "hydrogen" as bool and "coords" as float with shape (N, 3).
+    """
+    import numpy as np
+
+    records = []
+    with _open_source(pdb_path, "rb") as pdb_file:
+        for line in pdb_file:
+            if line.startswith((b"ATOM  ", b"HETATM")):
+                records.append(line)
+            elif line.startswith(b"ENDMDL") and records:
+                break
+    # Shorter lines are padded with null bytes
+    lines = np.array(records, dtype="S80").view(np.uint8).reshape(len(records), 80)
+
+    def column(first: int, last: int):
+        return np.ascontiguousarray(lines[:, first:last]).view(f"S{last - first}").ravel()
+
+    name = np.char.strip(column(12, 16))
+    alternate = ~np.isin(column(16, 17), (b" ", b""))
+    first_location = ~alternate
+    if alternate.any():
+        key = np.char.add(np.char.add(name, b":"), column(17, 27))[alternate]
+        _, first_alternate = np.unique(key, return_index=True)
+        first_location[np.flatnonzero(alternate)[first_alternate]] = True
+    atoms = {
+        "name": name[first_location],
+        "resname": np.char.strip(column(17, 20))[first_location],
+        "chain": column(21, 22)[first_location],
+        "resnum": np.char.strip(column(22, 27))[first_location],
+        "hetatm": (column(0, 6) == b"HETATM")[first_location],
+    }
+    atoms["water"] = np.isin(atoms["resname"], PDB_WATER_NAMES)
+    atoms["hydrogen"] = np.char.startswith(atoms["name"], b"H")
+    atoms["coords"] = column(30, 54)[first_location].view("S8").reshape(-1, 3).astype(float)
+    for array in atoms.values():
+        array.flags.writeable = False
+    return atoms
+
+
+@functools.lru_cache(maxsize=16)
+def _reference_pdb_atoms(pdb_path: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    """Cached atoms of a reference PDB file, **mtime_ns** and **size** identify its version."""
+    return read_pdb_atoms(pdb_path)
+
+
+def kabsch_rmsd(coords_a, coords_b) -> float:
+    """RMSD between two sets of coordinates after their optimal superposition.
+
+    Args:
+        coords_a (:obj:`numpy.ndarray`): Coordinates with shape (N, 3).
+        coords_b (:obj:`numpy.ndarray`): Coordinates with shape (N, 3).
+
+    Returns:
+        float: Root mean square deviation, inf if there are no coordinates.
+    """
+    import numpy as np
+
+    if not len(coords_a):
+        return float("inf")
+    coords_a = coords_a - coords_a.mean(axis=0)
+    coords_b = coords_b - coords_b.mean(axis=0)
+    singular_values = np.linalg.svd(coords_b.T @ coords_a, compute_uv=False)
+    if np.linalg.det(coords_b.T @ coords_a) < 0:
+        # Avoid the reflection
+        singular_values[-1] = -singular_values[-1]
+    squared_deviation = (coords_a * coords_a).sum() + (coords_b * coords_b).sum() - 2 * singular_values.sum()
+    return float(np.sqrt(max(squared_deviation, 0.0) / len(coords_a)))
+
+
+def match_pdb_atoms(atoms_a: dict[str, Any], atoms_b: dict[str, Any]) -> tuple[Any, Any]:
+    """Indices of the atoms of **atoms_a** and **atoms_b** with the same chain, residue number, insertion code and name.
+
+    If the keys are repeated in any of the structures or not all the atoms
+    are matched, and both structures have the same number of atoms (i.e.
+    renumbered residues), atoms are matched by position. Otherwise only the
+    atoms with the same key are returned.
+
+    Args:
+        atoms_a (dict): Atoms returned by :func:`read_pdb_atoms`.
+        atoms_b (dict): Atoms returned by :func:`read_pdb_atoms`.
+
+    Returns:
+        tuple: Index arrays of the matched atoms of **atoms_a** and **atoms_b**.
+    """
+    import numpy as np
+
+    def keys(atoms):
+        return np.char.add(np.char.add(np.char.add(atoms["chain"], b":"), atoms["resnum"]), np.char.add(b":", atoms["name"]))
+
+    keys_a, keys_b = keys(atoms_a), keys(atoms_b)
+    n_atoms_a, n_atoms_b = len(keys_a), len(keys_b)
+    unique_keys = len(np.unique(keys_a)) == n_atoms_a and len(np.unique(keys_b)) == n_atoms_b
+    if unique_keys:
+        _, index_a, index_b = np.intersect1d(keys_a, keys_b, assume_unique=True, return_indices=True)
+    else:
+        index_a = index_b = np.array([], dtype=int)
+    if len(index_a) < max(n_atoms_a, n_atoms_b) and n_atoms_a == n_atoms_b:
+        print("     Atoms matched by position")
+        return np.arange(n_atoms_a), np.arange(n_atoms_b)
+    order = np.argsort(index_a)
+    return index_a[order], index_b[order]
+
+
 def compare_pdb(pdb_a: str, pdb_b: str, rmsd_cutoff: int = 1, remove_hetatm: bool = True, remove_hydrogen: bool = True, **kwargs):
-    """ Compare pdb files """
+    """Compare two PDB files by the RMSD of their matched atoms after superposition.
+
+    Only the first model is compared, atoms are matched with
+    :func:`match_pdb_atoms` and the comparison fails if any atom of any of
+    the structures is left without match. The reference structure (**pdb_b**) is parsed
+    once per process and version of the file.
+
+    Args:
+        pdb_a (str): Path to the PDB file.
+        pdb_b (str): Path to the reference PDB file.
+        rmsd_cutoff (float): (1) Maximum RMSD in Angstroms.
+        remove_hetatm (bool): (True) Ignore the HETATM records except waters.
+        remove_hydrogen (bool): (True) Ignore the atoms with names starting by H.
+
+    Returns:
+        bool: True if the RMSD is lower than **rmsd_cutoff**.
+    """
+    import numpy as np
+
     print("Checking RMSD between:")
-    print("     PDB_A: "+pdb_a)
-    print("     PDB_B: "+pdb_b)
-    pdb_parser = PDBParser(PERMISSIVE=True, QUIET=True)
-    st_a = pdb_parser.get_structure("st_a", pdb_a)
-    st_b = pdb_parser.get_structure("st_b", pdb_b)
-    if st_a is None or st_b is None:
-        print("    One of the PDB structures could not be parsed.")
+    print(f"     PDB_A: {pdb_a}")
+    print(f"     PDB_B: {pdb_b}")
+    try:
+        atoms_a = read_pdb_atoms(pdb_a)
+        if isinstance(pdb_b, zipfile.Path):
+            atoms_b = read_pdb_atoms(pdb_b)
+        else:
+            stat_b = os.stat(pdb_b)
+            atoms_b = _reference_pdb_atoms(str(Path(pdb_b).resolve()), stat_b.st_mtime_ns, stat_b.st_size)
+    except ValueError as error:
+        print(f"    One of the PDB structures could not be parsed: {error}")
         return False
-    st_a = st_a[0]
-    st_b = st_b[0]
 
+    selections = []
+    for atoms in (atoms_a, atoms_b):
+        selection = np.ones(len(atoms["name"]), dtype=bool)
+        if remove_hetatm:
+            selection = ~atoms["hetatm"] | atoms["water"]
+        if remove_hydrogen:
+            selection = selection & ~atoms["hydrogen"]
+        selections.append(selection)
     if remove_hetatm:
         print("     Ignoring HETAMT in RMSD")
-        residues_a = [list(res.get_atoms()) for res in st_a.get_residues() if not res.id[0].startswith('H_')]
-        residues_b = [list(res.get_atoms()) for res in st_b.get_residues() if not res.id[0].startswith('H_')]
-        atoms_a = [atom for residue in residues_a for atom in residue]
-        atoms_b = [atom for residue in residues_b for atom in residue]
-    else:
-        atoms_a = st_a.get_atoms()
-        atoms_b = st_b.get_atoms()
-
     if remove_hydrogen:
         print("     Ignoring Hydrogen atoms in RMSD")
-        atoms_a = [atom for atom in atoms_a if not atom.get_name().startswith('H')]
-        atoms_b = [atom for atom in atoms_b if not atom.get_name().startswith('H')]
-
-    atoms_a_list = list(atoms_a)
-    atoms_b_list = list(atoms_b)
-    print("     Atoms ALIGNED in PDB_A: "+str(len(atoms_a_list)))
-    print("     Atoms ALIGNED in PDB_B: "+str(len(atoms_b_list)))
-    super_imposer = Superimposer()
-    super_imposer.set_atoms(atoms_a, atoms_b)
-    super_imposer.apply(atoms_b)
-    super_imposer_rms = super_imposer.rms if super_imposer.rms is not None else float('inf')
-    print('     RMS: '+str(super_imposer_rms))
+    atoms_a = {key: array[selections[0]] for key, array in atoms_a.items()}
+    atoms_b = {key: array[selections[1]] for key, array in atoms_b.items()}
+
+    index_a, index_b = match_pdb_atoms(atoms_a, atoms_b)
+    n_atoms_a, n_atoms_b = len(atoms_a["name"]), len(atoms_b["name"])
+    print("     Atoms in PDB_A: "+str(n_atoms_a))
+    print("     Atoms in PDB_B: "+str(n_atoms_b))
+    print("     Atoms ALIGNED: "+str(len(index_a)))
+    if len(index_a) != n_atoms_a or len(index_b) != n_atoms_b:
+        for label, atoms, index in (("PDB_A", atoms_a, index_a), ("PDB_B", atoms_b, index_b)):
+            unmatched = np.setdiff1d(np.arange(len(atoms["name"])), index)
+            keys = [f"{atoms['chain'][i].decode()}:{atoms['resnum'][i].decode()}:{atoms['name'][i].decode()}" for i in unmatched[:10]]
+            if len(unmatched):
+                print(f"     Atoms of {label} without match ({len(unmatched)}): {' '.join(keys)}{' ...' if len(unmatched) > 10 else ''}")
+        return False
+    rmsd = kabsch_rmsd(atoms_a["coords"][index_a], atoms_b["coords"][index_b])
+    print('     RMS: '+str(rmsd))
     print('     RMS_CUTOFF: '+str(rmsd_cutoff))
-    return super_imposer_rms < rmsd_cutoff
+    return rmsd < rmsd_cutoff
 
 
 def compare_top_itp(file_a: str, file_b: str) -> bool:
     """ Compare top/itp files """
     print("Comparing TOP/ITP:")
-    print("     FILE_A: "+file_a)
-    print("     FILE_B: "+file_b)
-    with codecs.open(file_a, 'r', encoding='utf-8', errors='ignore') as f_a:
+    print(f"     FILE_A: {file_a}")
+    print(f"     FILE_B: {file_b}")
+    with _open_source(file_a, 'rb') as raw_a, _open_source(file_b, 'rb') as raw_b:
+        f_a = codecs.getreader('utf-8')(raw_a, errors='ignore')
+        f_b = codecs.getreader('utf-8')(raw_b, errors='ignore')
         next(f_a)
-        with codecs.open(file_b, 'r', encoding='utf-8', errors='ignore') as f_b:
-            next(f_b)
-            return [line.strip() for line in f_a if not line.strip().startswith(';')] == [line.strip() for line in f_b if not line.strip().startswith(';')]
+        next(f_b)
+        return [line.strip() for line in f_a if not line.strip().startswith(';')] == [line.strip() for line in f_b if not line.strip().startswith(';')]
 
 
 def compare_ignore_first(file_a: str, file_b: str) -> bool:
     """ Compare two files ignoring the first line """
     print("Comparing ignoring first line of both files:")
-    print("     FILE_A: "+file_a)
-    print("     FILE_B: "+file_b)
-    with open(file_a) as f_a:
+    print(f"     FILE_A: {file_a}")
+    print(f"     FILE_B: {file_b}")
+    with _open_source(file_a) as f_a:
         next(f_a)
-        with open(file_b) as f_b:
+        with _open_source(file_b) as f_b:
             next(f_b)
             return [line.strip() for line in f_a] == [line.strip() for line in f_b]
 
@@ -263,8 +531,8 @@ def compare_size(file_a: str, file_b: str, percent_tolerance: float = 1.0) -> bo
     print("Comparing size of both files:")
     print(f"     FILE_A: {file_a}")
     print(f"     FILE_B: {file_b}")
-    size_a = Path(file_a).stat().st_size
-    size_b = Path(file_b).stat().st_size
+    size_a = _source_size(file_a)
+    size_b = _source_size(file_b)
     average_size = (size_a + size_b) / 2
     tolerance = average_size * percent_tolerance / 100
     tolerance_low = average_size - tolerance
@@ -275,17 +543,187 @@ def compare_size(file_a: str, file_b: str, percent_tolerance: float = 1.0) -> bo
     return (tolerance_low <= size_a <= tolerance_high) and (tolerance_low <= size_b <= tolerance_high)
 
 
+XVG_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def read_xvg_header(file_path: Union[str, Path]) -> dict[str, Any]:
+    """Parse the @ and # header lines of a Grace XVG file.
+
+    Args:
+        file_path (str): Path to the XVG file.
+
+    Returns:
+        dict: Header with the title, subtitle, xaxis, yaxis and legends (list of the data columns legends, None for the columns without legend).
+    """
+    header: dict[str, Any] = {"title": None, "subtitle": None, "xaxis": None, "yaxis": None, "legends": []}
+    legends: dict[int, str] = {}
+    with _open_source(file_path) as xvg_file:
+        for line in xvg_file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if not line.startswith("@"):
+                break
+            tokens = line[1:].split(None, 1)
+            if len(tokens) < 2:
+                continue
+            keyword, value = tokens
+            value = value.strip()
+            if keyword in ("title", "subtitle"):
+                header[keyword] = value.strip('"')
+            elif keyword in ("xaxis", "yaxis") and value.startswith("label"):
+                header[keyword] = value[len("label"):].strip().strip('"')
+            elif keyword.startswith("s") and keyword[1:].isdigit() and value.startswith("legend"):
+                legends[int(keyword[1:])] = value[len("legend"):].strip().strip('"')
+    header["legends"] = [legends.get(i) for i in range(max(legends) + 1)] if legends else []
+    return header
+
+
+def _is_xvg_data_line(line: str) -> bool:
+    line = line.lstrip()
+    return bool(line) and line[0] not in "@#&"
+
+
+def iter_xvg_chunks(file_path: Union[str, Path], chunk_size: int = XVG_CHUNK_SIZE):
+    """Yield the numeric data of a XVG file as 2D arrays read from blocks of about **chunk_size** bytes.
+
+    Each block is parsed at once with :func:`numpy.fromstring`. Lines are
+    only inspected one by one in the blocks containing header, comment or
+    blank lines.
+
+    Args:
+        file_path (str): Path to the XVG file.
+        chunk_size (int): (16777216) Size in bytes of the text blocks.
+
+    Raises:
+        ValueError: If the data contains non numeric values or the rows do not have the same number of columns.
+    """
+    import numpy as np
+
+    n_columns = None
+    remainder = ""
+    with _open_source(file_path) as xvg_file:
+        while True:
+            block = xvg_file.read(chunk_size)
+            text = remainder + block
+            if block:
+                # Only complete lines, the rest is parsed with the next block
+                last_newline = text.rfind("\n") + 1
+                text, remainder = text[:last_newline], text[last_newline:]
+            elif not text:
+                return
+            else:
+                text, remainder = text + "\n", ""
+            n_rows = text.count("\n")
+            if any(character in text for character in "@#&") or "\n\n" in text or text.startswith("\n"):
+                lines = [line for line in text.splitlines(True) if _is_xvg_data_line(line)]
+                text, n_rows = "".join(lines), len(lines)
+            if not n_rows:
+                continue
+            if n_columns is None:
+                n_columns = len(text[:text.find("\n")].split())
+            try:
+                values = np.fromstring(text, dtype=float, sep=" ")
+            except ValueError as error:
+                raise ValueError(f"Non numeric data in {file_path}: {error}")
+            if values.size != n_rows * n_columns:
+                raise ValueError(f"Irregular numeric data in {file_path}, expected {n_columns} columns per row")
+            yield values.reshape(n_rows, n_columns)
+
+
+def compare_xvg_report(file_a: str, file_b: str, percent_tolerance: float = 1.0, chunk_size: int = XVG_CHUNK_SIZE) -> dict[str, Any]:
+    """Compare the numeric data of two XVG files in chunks.
+
+    Values are equal if abs(a - b) <= 1e-08 + percent_tolerance / 100 * abs(b).
+    If both files have legends for every data column and the same set of
+    legends, columns are matched by legend, otherwise by position.
+
+    Args:
+        file_a (str): Path to the XVG file.
+        file_b (str): Path to the reference XVG file.
+        percent_tolerance (float): (1.0) Relative tolerance in percentage.
+        chunk_size (int): (16777216) Size in bytes of the text blocks read from each file.
+
+    Returns:
+        dict: Report with the keys equal (bool), rows (int), error (str or None) and columns (list of dicts with the column, legend, max_abs_error, max_rel_error and first_failing_row of each column of **file_a**).
+    """
+    report: dict[str, Any] = {"equal": False, "rows": 0, "error": None, "columns": []}
+    legends_a = read_xvg_header(file_a)["legends"]
+    legends_b = read_xvg_header(file_b)["legends"]
+    chunks_a = iter_xvg_chunks(file_a, chunk_size)
+    chunks_b = iter_xvg_chunks(file_b, chunk_size)
+    try:
+        return _compare_xvg_chunks(report, chunks_a, chunks_b, legends_a, legends_b, file_a, file_b, percent_tolerance)
+    except ValueError as error:
+        # Malformed rows or values
+        report["equal"] = False
+        report["error"] = str(error)
+        return report
+
+
+def _compare_xvg_chunks(report: dict[str, Any], chunks_a, chunks_b, legends_a: list, legends_b: list, file_a: str, file_b: str,
+                        percent_tolerance: float) -> dict[str, Any]:
+    import numpy as np
+
+    column_map = None
+    buffer_b = None
+    for chunk_a in chunks_a:
+        # Chunks of both files are aligned by row, the files may have blank or comment lines in different places
+        while buffer_b is None or len(buffer_b) < len(chunk_a):
+            next_b = next(chunks_b, None)
+            if next_b is None:
+                break
+            buffer_b = next_b if buffer_b is None else np.concatenate((buffer_b, next_b))
+        if buffer_b is None or len(buffer_b) < len(chunk_a):
+            report["error"] = f"Different number of rows: {file_b} has fewer rows than {file_a}"
+            return report
+        chunk_b, buffer_b = buffer_b[:len(chunk_a)], buffer_b[len(chunk_a):]
+
+        if column_map is None:
+            if chunk_a.shape[1] != chunk_b.shape[1]:
+                report["error"] = f"Different number of columns: {chunk_a.shape[1]} != {chunk_b.shape[1]}"
+                return report
+            column_map = list(range(chunk_a.shape[1]))
+            n_data_columns = chunk_a.shape[1] - 1
+            if (len(legends_a) == len(legends_b) == n_data_columns and None not in legends_a
+                    and None not in legends_b and set(legends_a) == set(legends_b) and legends_a != legends_b):
+                column_map = [0] + [legends_b.index(legend) + 1 for legend in legends_a]
+            report["columns"] = [{"column": i, "legend": legends_a[i - 1] if 0 < i <= len(legends_a) else None,
+                                  "max_abs_error": 0.0, "max_rel_error": 0.0, "first_failing_row": None}
+                                 for i in range(chunk_a.shape[1])]
+        chunk_b = chunk_b[:, column_map]
+
+        abs_error = np.abs(chunk_a - chunk_b)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel_error = np.where(chunk_b != 0, abs_error / np.abs(chunk_b), np.where(abs_error == 0, 0.0, np.inf))
+        failing = ~np.isclose(chunk_a, chunk_b, rtol=percent_tolerance / 100)
+        for column_report, column_abs, column_rel, column_failing in zip(report["columns"], abs_error.T, rel_error.T, failing.T):
+            column_report["max_abs_error"] = max(column_report["max_abs_error"], float(column_abs.max()))
+            column_report["max_rel_error"] = max(column_report["max_rel_error"], float(column_rel.max()))
+            if column_report["first_failing_row"] is None and column_failing.any():
+                column_report["first_failing_row"] = report["rows"] + int(column_failing.argmax())
+        report["rows"] += len(chunk_a)
+
+    if (buffer_b is not None and len(buffer_b)) or next(chunks_b, None) is not None:
+        report["error"] = f"Different number of rows: {file_a} has fewer rows than {file_b}"
+        return report
+    report["equal"] = all(column["first_failing_row"] is None for column in report["columns"])
+    return report
+
+
 def compare_xvg(file_a: str, file_b: str, percent_tolerance: float = 1.0) -> bool:
-    """ Compare two files using size """
-    print("Comparing size of both files:")
+    """ Compare the numeric data of two XVG files (see :func:`compare_xvg_report`) """
+    print("Comparing data of both XVG files:")
     print(f"     FILE_A: {file_a}")
     print(f"     FILE_B: {file_b}")
-    arrays_tuple_a = np.loadtxt(file_a, comments=["@", '#'], unpack=True)
-    arrays_tuple_b = np.loadtxt(file_b, comments=["@", '#'], unpack=True)
-    for array_a, array_b in zip(arrays_tuple_a, arrays_tuple_b):
-        if not np.allclose(array_a, array_b, rtol=percent_tolerance / 100):
-            return False
-    return True
+    report = compare_xvg_report(file_a, file_b, percent_tolerance)
+    if report["error"]:
+        print(f"     {report['error']}")
+    for column in report["columns"]:
+        if column["first_failing_row"] is not None:
+            print(f"     Column {column['column']} ({column['legend']}): max abs error {column['max_abs_error']:g}, "
+                  f"max rel error {column['max_rel_error']:g}, first failing row {column['first_failing_row']}")
+    return report["equal"]
 
 
 def compare_images(file_a: str, file_b: str, percent_tolerance: float = 1.0) -> bool:
@@ -300,8 +738,9 @@ def compare_images(file_a: str, file_b: str, percent_tolerance: float = 1.0) ->
     print("Comparing images of both files:")
     print(f"     IMAGE_A: {file_a}")
     print(f"     IMAGE_B: {file_b}")
-    hash_a = imagehash.average_hash(Image.open(file_a))
-    hash_b = imagehash.average_hash(Image.open(file_b))
+    with _open_source(file_a, 'rb') as image_a, _open_source(file_b, 'rb') as image_b:
+        hash_a = imagehash.average_hash(Image.open(image_a))
+        hash_b = imagehash.average_hash(Image.open(image_b))
     tolerance = (len(hash_a) + len(hash_b)) / 2 * percent_tolerance / 100
     if tolerance < 1:
         tolerance = 1
@@ -392,6 +831,7 @@ def validate_json(json_file_path: Union[str, Path], json_schema_path: Union[str,
     print("Validating JSON file:")
     print(f"     JSON file: {json_file_path}")
     print(f"     JSON schema: {json_schema_path}")
+    import jsonschema
     try:
         # Load the JSON file
         with open(json_file_path, 'r') as json_file:
@@ -24,6 +24,7 @@ setuptools.setup(
     entry_points={
         "console_scripts": [
             "folder_test = biobb_common.generic.folder_test:main",
+            "biobb_worker = biobb_common.execution.worker:main",
         ]
     },
     classifiers=[